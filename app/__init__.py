@@ -2,11 +2,18 @@
 应用工厂函数 - 创建Flask应用
 """
 
-from flask import Flask
+import random
+import time
+
+from flask import Flask, g, request
 from flask_cors import CORS
 
 from app.api.routes import create_api_routes
 from app.config import config
+from app.utils.logging_utils import get_logger, new_request_id, setup_logging
+
+logger = get_logger("server")
+access_logger = get_logger("access")
 
 
 def create_app(config_name="development"):
@@ -24,6 +31,9 @@ def create_app(config_name="development"):
     # 加载配置
     app.config.from_object(config[config_name])
 
+    # 结构化日志（后台线程写出）
+    setup_logging(config[config_name])
+
     # 设置JSON响应不转义ASCII
     app.config["JSON_AS_ASCII"] = False
 
@@ -39,20 +49,140 @@ def create_app(config_name="development"):
     api_routes = create_api_routes()
     app.register_blueprint(api_routes)
 
+    _register_request_hooks(app, config[config_name])
+    _register_profiling_hooks(app, config[config_name])
+
     # 预加载模型（可选，也可以在首次调用时加载）
     with app.app_context():
-        _initialize_models()
+        _initialize_models(config[config_name])
 
     return app
 
 
-def _initialize_models():
+def _register_request_hooks(app, app_config):
+    """
+    为每个请求分配请求ID（沿用上游传入的X-Request-ID），记录访问日志和耗时指标
+
+    耗时按路由模板（而非实际路径）统计，避免标签数量无限增长
+    """
+    from app.utils.metrics import http_request_duration
+
+    @app.before_request
+    def _start_request():
+        g.request_id = request.headers.get("X-Request-ID", "")[:64] or new_request_id()
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _finish_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        if app_config.METRICS_ENABLED:
+            http_request_duration.observe(
+                elapsed, route, request.method, response.status_code
+            )
+
+        # 服务端错误始终记录，其余按采样比例记录
+        log = (
+            access_logger.warning if response.status_code >= 500 else access_logger.info
+        )
+        log(
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                "route": route,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000.0, 2),
+                "remote_addr": request.remote_addr,
+            },
+        )
+        response.headers["X-Request-ID"] = g.request_id
+        return response
+
+
+def _register_profiling_hooks(app, app_config):
+    """
+    按需剖析：请求头 X-Profile: 1（需通过管理接口鉴权）或按比例抽取的请求
+
+    被剖析的请求返回Server-Timing响应头（流式响应只含生成响应头之前的阶段）；
+    调用栈采样在响应发送完成后（流式响应为最后一块之后）停止，
+    结果按路由和模型分目录写出，完整的分阶段耗时记入日志
+    """
+    from app.services.model_admin_service import ModelAdminService
+    from app.utils import profiling
+
+    @app.before_request
+    def _start_profiling():
+        requested = (
+            app_config.PROFILING_ENABLED
+            and request.headers.get("X-Profile") == "1"
+            and ModelAdminService.is_authorized(request)
+        )
+        sample_rate = profiling.settings["sample_rate"]
+        if not requested and not (sample_rate > 0 and random.random() < sample_rate):
+            profiling.end_request()
+            return
+
+        session = profiling.profiler.start_session()
+        g.profile_timings = profiling.begin_request(session)
+
+    @app.after_request
+    def _finish_profiling(response):
+        timings = g.pop("profile_timings", None)
+        if timings is None:
+            return response
+
+        response.headers["Server-Timing"] = timings.server_timing()
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        request_id = g.get("request_id")
+
+        def _write_profile():
+            # 流式响应在生成器结束后才清除，批量预测的各阶段耗时仍计入该请求
+            profiling.end_request()
+            session = timings.session
+            if session is None:
+                return
+            profiling.profiler.stop_session(session)
+            try:
+                path = profiling.write_profile(
+                    session, route, timings.labels.get("model", "none"), request_id
+                )
+            except OSError as e:
+                logger.warning("写出剖析结果失败: %s", e)
+                return
+            logger.info(
+                "剖析结果已保存",
+                extra={
+                    "route": route,
+                    "path": path,
+                    "samples": session.samples,
+                    "stages_ms": {
+                        stage: round(seconds * 1000.0, 2)
+                        for stage, seconds in timings.stages().items()
+                    },
+                },
+            )
+
+        if response.direct_passthrough:
+            # 文件响应直接交给服务器发送，不会调用关闭回调
+            _write_profile()
+        else:
+            response.call_on_close(_write_profile)
+        return response
+
+
+def _initialize_models(app_config):
     """初始化模型"""
     try:
         from app.models.model_manager import model_manager
 
         # 只加载YOLO模型，LSTM模型在需要时再加载
-        print("正在加载YOLO模型...")
+        logger.info("正在加载YOLO模型...")
         yolo_results = {
             "yolo_grow": model_manager.load_model("yolo_grow"),
             "yolo_disease": model_manager.load_model("yolo_disease"),
@@ -60,12 +190,21 @@ def _initialize_models():
 
         for model_name, success in yolo_results.items():
             if success:
-                print(f"✓ {model_name} 加载成功")
+                logger.info("✓ %s 加载成功", model_name)
             else:
-                print(f"✗ {model_name} 加载失败")
+                logger.error("✗ %s 加载失败", model_name)
+
+        logger.info("模型初始化完成")
+
+        # 预热模型，预热完成前/health报告未就绪
+        model_manager.start_warmup(background=app_config.WARMUP_BACKGROUND)
+
+        # 监视权重文件，替换后自动热更新
+        if app_config.HOT_RELOAD_ENABLED:
+            from app.models.hot_reload import model_watcher
 
-        print("模型初始化完成")
+            model_watcher.start()
 
     except Exception as e:
-        print(f"模型初始化失败: {e}")
+        logger.error("模型初始化失败: %s", e)
         # 不阻止应用启动，允许运行时加载
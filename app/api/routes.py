@@ -5,7 +5,9 @@ API路由模块 - 定义所有API端点（移除登录相关功能）
 from flask import Blueprint
 
 from app.services.image_service import ImageService
+from app.services.model_admin_service import ModelAdminService
 from app.services.prediction_service import PredictionService
+from app.services.profiling_service import ProfilingService
 
 
 def create_api_routes():
@@ -27,6 +29,13 @@ def create_api_routes():
 
         return ImageService.upload_disease_image(request)
 
+    @api.route("/upload_and_predict", methods=["POST", "GET"])
+    def upload_and_predict():
+        """上传图像并立即预测，一次请求返回文件名和预测结果"""
+        from flask import request
+
+        return PredictionService.upload_and_predict(request)
+
     # ============ 模型预测接口 ============
     @api.route("/predict_image", methods=["POST", "GET"])
     def predict_image():
@@ -38,7 +47,14 @@ def create_api_routes():
 
         return PredictionService.predict_image(request)
 
-    # ============ LSTM预测接口（预留扩展）============
+    @api.route("/predict_images", methods=["POST"])
+    def predict_images():
+        """批量图像预测接口 - 以NDJSON流逐张返回结果"""
+        from flask import request
+
+        return PredictionService.predict_images(request)
+
+    # ============ LSTM预测接口 ============
     @api.route("/predict_weather_lstm", methods=["POST"])
     def predict_weather_lstm():
         """LSTM天气预测接口"""
@@ -57,27 +73,37 @@ def create_api_routes():
     @api.route("/show_grow_image/<imageId>")
     def show_grow_image(imageId):
         """展示生长期图像"""
-        return ImageService.show_grow_image(imageId)
+        from flask import request
+
+        return ImageService.show_grow_image(imageId, request)
 
     @api.route("/show_disease_image/<imageId>")
     def show_disease_image(imageId):
         """展示病害图像"""
-        return ImageService.show_disease_image(imageId)
+        from flask import request
+
+        return ImageService.show_disease_image(imageId, request)
 
     @api.route("/show_predict_grow_image/<imageId>")
     def show_predict_grow_image(imageId):
         """展示预测后的生长期图像"""
-        return ImageService.show_predict_grow_image(imageId)
+        from flask import request
+
+        return ImageService.show_predict_grow_image(imageId, request)
 
     @api.route("/show_predict_disease_image/<imageId>")
     def show_predict_disease_image(imageId):
         """展示预测后的病害图像"""
-        return ImageService.show_predict_disease_image(imageId)
+        from flask import request
+
+        return ImageService.show_predict_disease_image(imageId, request)
 
     @api.route("/user_image/<imageId>")
     def show_user_image(imageId):
         """展示用户头像（保留以防前端仍在使用）"""
-        return ImageService.show_user_image(imageId)
+        from flask import request
+
+        return ImageService.show_user_image(imageId, request)
 
     # ============ 健康检查接口 ============
     @api.route("/health", methods=["GET"])
@@ -89,11 +115,35 @@ def create_api_routes():
         for model_name in ["yolo_grow", "yolo_disease"]:
             model_status[model_name] = model_manager.is_model_loaded(model_name)
 
-        return {
-            "status": "healthy",
+        readiness = model_manager.get_readiness()
+
+        if readiness["ready"]:
+            status = "healthy"
+        elif readiness["warmup"] in ("pending", "running"):
+            status = "warming_up"
+        else:
+            status = "saturated"
+
+        body = {
+            "status": status,
             "service": "paddy-prediction-service",
             "models": model_status,
+            "ready": readiness["ready"],
+            "warmup": readiness["warmup"],
+            "admission": readiness["admission"],
         }
+        # 未就绪时返回503，负载均衡据此把流量转向其他节点
+        return body, 200 if readiness["ready"] else 503
+
+    # ============ 指标接口 ============
+    @api.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        """Prometheus格式的运行指标（仅统计处理该请求的进程）"""
+        from flask import Response
+
+        from app.utils.metrics import metrics
+
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
     # ============ 模型信息接口 ============
     @api.route("/model_info", methods=["GET"])
@@ -103,4 +153,29 @@ def create_api_routes():
 
         return model_manager.get_model_info()
 
+    # ============ 模型管理接口 ============
+    @api.route("/admin/reload_model", methods=["POST"])
+    def reload_model():
+        """
+        热更新模型：{"model": "yolo_grow"}
+        多进程部署时只作用于处理该请求的进程，其余进程由权重文件监视器更新
+        """
+        from flask import request
+
+        return ModelAdminService.reload_model(request)
+
+    @api.route("/admin/rollback_model", methods=["POST"])
+    def rollback_model():
+        """回滚模型到上一版本：{"model": "yolo_grow"}"""
+        from flask import request
+
+        return ModelAdminService.rollback_model(request)
+
+    @api.route("/admin/profiling", methods=["GET", "POST"])
+    def profiling_settings():
+        """查看/调整自动剖析的请求比例：{"sample_rate": 0.05}"""
+        from flask import request
+
+        return ProfilingService.configure(request)
+
     return api
@@ -0,0 +1,302 @@
+"""
+ASGI适配 - 在事件循环中收发请求/响应，Flask视图（推理）在有界线程池中执行
+
+慢速客户端上传大图时只占用一个协程，请求体完整接收后才占用线程；
+响应体逐块在线程池中生成、在事件循环中发送，慢速下载同样不占用线程。
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.wsgi import FileWrapper
+
+from app.config import Config
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("server")
+
+_END = object()
+
+
+class _BodyError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AsgiAdapter:
+    """
+    把create_app创建的Flask应用包装为ASGI应用，路由和响应格式完全不变
+
+    - 请求体超过MAX_CONTENT_LENGTH时直接返回413，不进入线程池
+    - 两次收到请求体数据的间隔超过ASGI_RECEIVE_TIMEOUT时返回408
+    - 线程池大小即同时执行视图的请求数，超出的请求在事件循环中排队
+    """
+
+    def __init__(
+        self,
+        wsgi_app,
+        max_workers: int = None,
+        max_body: int = None,
+        spool_bytes: int = 1024 * 1024,
+        receive_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            wsgi_app: Flask应用
+            max_workers: 执行视图的线程数，None表示CPU核数
+            max_body: 请求体上限（字节），None表示不限制
+            spool_bytes: 请求体超过该大小时转存到临时文件
+            receive_timeout: 接收请求体时相邻两块数据的最长间隔（秒）
+        """
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_body = max_body
+        self.spool_bytes = spool_bytes
+        self.receive_timeout = receive_timeout
+
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建线程池（fork后的子进程中会重新创建）"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="asgi-view"
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        try:
+            body = await self._read_body(scope, receive)
+        except _BodyError as e:
+            await self._send_simple(send, e.status, e.message)
+            return
+        if body is None:  # 客户端已断开
+            return
+
+        try:
+            await self._run_app(scope, body, send)
+        finally:
+            body.close()
+
+    # ============ 请求 ============
+
+    async def _read_body(self, scope, receive):
+        """在事件循环中接收完整请求体"""
+        content_length = _header(scope, b"content-length")
+        if content_length is not None:
+            try:
+                content_length = int(content_length)
+            except ValueError:
+                raise _BodyError(400, "Bad Request") from None
+            if content_length < 0:
+                raise _BodyError(400, "Bad Request")
+            if self.max_body and content_length > self.max_body:
+                raise _BodyError(413, "Request Entity Too Large")
+
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        size = 0
+        more_body = True
+        try:
+            while more_body:
+                try:
+                    message = await asyncio.wait_for(receive(), self.receive_timeout)
+                except asyncio.TimeoutError:
+                    raise _BodyError(408, "Request Timeout")
+
+                if message["type"] == "http.disconnect":
+                    body.close()
+                    return None
+
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if self.max_body and size > self.max_body:
+                    raise _BodyError(413, "Request Entity Too Large")
+                body.write(chunk)
+                more_body = message.get("more_body", False)
+        except BaseException:
+            body.close()
+            raise
+
+        body.seek(0)
+        return body
+
+    def _build_environ(self, scope, body):
+        """按PEP 3333由ASGI scope构建WSGI environ"""
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        script_name = scope.get("root_path", "")
+        path = scope["path"]
+        if script_name and path.startswith(script_name):
+            path = path[len(script_name) :]
+
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": script_name.encode("utf-8").decode("latin-1"),
+            "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "REMOTE_PORT": str(client[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            # 请求体已完整接收，没有Content-Length（分块上传）时视图也能读到全部内容
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "wsgi.file_wrapper": lambda f, block_size=64 * 1024: FileWrapper(
+                f, block_size
+            ),
+        }
+
+        for name, value in scope.get("headers", []):
+            name = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+            elif name == "CONTENT_LENGTH":
+                environ["CONTENT_LENGTH"] = value
+            else:
+                key = f"HTTP_{name}"
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        return environ
+
+    # ============ 响应 ============
+
+    async def _run_app(self, scope, body, send):
+        """
+        在线程池中执行视图，逐块生成响应体并在事件循环中发送
+
+        视图调用和之后每次迭代可能在不同的线程中执行，都在同一个contextvars.Context中
+        运行，stream_with_context等依赖上下文变量的流式响应才能在后续迭代中取到请求上下文
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        environ = self._build_environ(scope, body)
+        response_start = {}
+        context = contextvars.copy_context()
+
+        def run(fn, *args):
+            # 同一响应的调用依次执行，不会同时进入该Context
+            return loop.run_in_executor(executor, context.run, fn, *args)
+
+        def start_response(status, headers, exc_info=None):
+            response_start["status"] = int(status.split(" ", 1)[0])
+            response_start["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+            return lambda data: None  # 不支持write()回调
+
+        def call_app():
+            iterable = self.wsgi_app(environ, start_response)
+            return iterable, iter(iterable)
+
+        try:
+            iterable, iterator = await run(call_app)
+        except Exception as e:
+            logger.error("ASGI请求处理失败: %s", e)
+            await self._send_simple(send, 500, "Internal Server Error")
+            return
+
+        try:
+            try:
+                # 生成器响应在第一次迭代时才调用start_response
+                chunk = await run(next, iterator, _END)
+            except Exception as e:
+                logger.error("ASGI请求处理失败: %s", e)
+                await self._send_simple(send, 500, "Internal Server Error")
+                return
+
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response_start["status"],
+                    "headers": response_start["headers"],
+                }
+            )
+            while chunk is not _END:
+                if chunk:
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+                try:
+                    chunk = await run(next, iterator, _END)
+                except Exception as e:
+                    # 响应头已发出，只能记录错误并结束响应体
+                    logger.error("ASGI响应生成失败: %s", e)
+                    break
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(iterable, "close"):
+                try:
+                    await run(iterable.close)
+                except Exception as e:
+                    logger.error("ASGI响应关闭失败: %s", e)
+
+    @staticmethod
+    async def _send_simple(send, status, message):
+        body = message.encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._get_executor()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _header(scope, name: bytes):
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def create_asgi_app(wsgi_app, app_config=Config):
+    """按配置包装Flask应用"""
+    return AsgiAdapter(
+        wsgi_app,
+        max_workers=app_config.ASGI_VIEW_THREADS,
+        max_body=app_config.MAX_CONTENT_LENGTH,
+        spool_bytes=app_config.ASGI_BODY_SPOOL_BYTES,
+        receive_timeout=app_config.ASGI_RECEIVE_TIMEOUT,
+    )
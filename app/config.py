@@ -26,20 +26,178 @@ class Config:
         "grow": os.path.join(STATIC_BASE_PATH, "predict_image/grow"),
         "disease": os.path.join(STATIC_BASE_PATH, "predict_image/disease"),
     }
+    # 上传预处理配置 - 校验文件头、按EXIF方向摆正，另存一份工作分辨率副本供预测读取
+    INGEST_WORKING_SIZE = 640  # 工作副本短边像素数（不小于各模型输入尺寸）
+    INGEST_WORKING_DIR = ".work"  # 工作副本所在的子目录（位于原图目录下）
+    INGEST_WORKING_QUALITY = 90  # 工作副本JPEG质量
+    INGEST_KEEP_ORIGINAL = True  # 是否保留原图，False时展示接口返回工作副本
+    UPLOAD_PERSIST_WORKERS = 4  # /upload_and_predict 后台保存原图的线程数
+    # 静态图像发送配置 - 默认经wsgi.file_wrapper零拷贝发送
+    USE_X_SENDFILE = False  # 前置Apache/lighttpd时设为True，由其通过X-Sendfile发送
+    X_ACCEL_REDIRECT_PREFIX = (
+        None  # 前置nginx时设为映射到STATIC_BASE_PATH的internal location
+    )
+    IMAGE_MAX_AGE = 3600  # 上传原图的缓存时间（秒），同名重新上传后经ETag重新验证
+    # 预测结果图像的缓存时间（秒）：同名图像重新预测、不同模型版本会原地覆盖结果文件，
+    # 只短期缓存，之后经ETag/Last-Modified重新验证
+    PREDICT_IMAGE_MAX_AGE = 60
+    # 派生图像配置 - show_*接口的 ?w=/?h= 缩略图和按Accept头的WebP/AVIF转码
+    DERIVED_IMAGE_DIR = os.path.join(STATIC_BASE_PATH, "derived")
+    DERIVED_IMAGE_MAX_MB = 1024  # 派生图像磁盘缓存上限，超出后按最近使用时间淘汰
+    DERIVED_IMAGE_MAX_DIMENSION = 2048  # ?w=/?h= 允许的最大值
+    THUMBNAIL_PREGENERATE_WIDTHS = [200]  # 上传时预生成的缩略图宽度
+    THUMBNAIL_PREGENERATE_FORMATS = ["jpeg", "webp"]
+    # 预测结果按文件名哈希分目录的层数（每层256个子目录），0表示不分目录
+    RESULT_STORE_SHARD_DEPTH = 2
 
     # 模型配置
     MODEL_PATHS = {
         "yolo_grow": "models/paddy-grow.pt",
         "yolo_disease": "models/paddy-disease.pt",
-        "lstm_weather": "models/lstm_weather.pt",  # 为LSTM预留
-        "lstm_growth": "models/lstm_growth.pt",  # 为LSTM预留
+        "lstm_weather": "models/lstm_weather.pt",  # TorchScript或state_dict
+        "lstm_growth": "models/lstm_growth.pt",
+    }
+    # YOLO模型推理后端：torch / onnx（ONNX Runtime）/ openvino
+    # 非torch后端首次加载时从.pt自动导出，产物缓存在权重文件旁
+    MODEL_BACKENDS = {
+        "yolo_grow": "torch",
+        "yolo_disease": "torch",
+    }
+    # 模型注册表 - 模型名 -> 构建参数，新增模型（如地区病害变体）只需在此追加
+    # kind: yolo / lstm_weather / lstm_growth；模型在首次使用时才加载
+    MODEL_REGISTRY = {
+        "yolo_grow": {
+            "kind": "yolo",
+            "path": MODEL_PATHS["yolo_grow"],
+            "model_type": "grow",
+        },
+        "yolo_disease": {
+            "kind": "yolo",
+            "path": MODEL_PATHS["yolo_disease"],
+            "model_type": "disease",
+        },
+        "lstm_weather": {"kind": "lstm_weather", "path": MODEL_PATHS["lstm_weather"]},
+        "lstm_growth": {"kind": "lstm_growth", "path": MODEL_PATHS["lstm_growth"]},
+    }
+    # 模型内存预算（MB），超出时按LRU卸载空闲模型，0表示不限制
+    MODEL_MEMORY_BUDGET_MB = 2048
+    # 永不卸载的模型
+    PINNED_MODELS = ["yolo_grow", "yolo_disease"]
+    # 模型的可选版本（如INT8量化版），以 "模型名@版本" 注册，请求中通过modelversion选择
+    # 量化模型由 scripts/quantize_models.py 生成
+    MODEL_VARIANTS = {
+        "yolo_grow@int8": {
+            "path": "models/paddy-grow_int8.onnx",
+            "backend": "onnx",
+        },
+        "yolo_disease@int8": {
+            "path": "models/paddy-disease_int8.onnx",
+            "backend": "onnx",
+        },
+    }
+
+    # 模型热更新配置 - 权重文件被替换后在后台加载、预热新版本，就绪后原子切换
+    HOT_RELOAD_ENABLED = True  # 监视权重文件变化并自动更新
+    HOT_RELOAD_POLL_SECONDS = 5.0  # 检查权重文件的间隔（秒）
+    HOT_RELOAD_DRAIN_TIMEOUT = 30  # 切换后等待旧版本上进行中请求完成的最长时间（秒）
+    # 管理接口（/admin/*）令牌，通过X-Admin-Token请求头传入；未设置时只在调试模式下
+    # 允许本机直接访问（带X-Forwarded-For等转发头的请求一律拒绝），生产环境必须设置
+    ADMIN_TOKEN = os.environ.get("PADDY_ADMIN_TOKEN")
+
+    # LSTM预测配置 - 请求中的多个序列一次转换并按批前向推理
+    LSTM_MAX_SEQUENCES = 10000  # 单次请求最多序列数
+    LSTM_BATCH_SIZE = 1024  # 单次前向推理的最大序列数
+    # 按地块预测：服务端保存每个地块最近sequence_length步观测和LSTM隐状态（只在本进程内）
+    LSTM_HISTORY_MAX_PLOTS = 100000  # 每个模型最多保存的地块数，超出时淘汰最久未使用的
+    LSTM_STATE_REFRESH_STEPS = (
+        None  # 隐状态从窗口重建的间隔（步），None为序列长度，0为不重建
+    )
+
+    # 动态批处理配置 - 合并并发的图像预测请求为一次批量推理
+    BATCH_ENABLED = True
+    BATCH_MAX_SIZE = 8  # 单批最多图像数
+    BATCH_MAX_WAIT_MS = 15  # 凑批最长等待时间（毫秒）
+    BATCH_PREDICT_MAX_IMAGES = 500  # /predict_images 单次请求最多图像数
+
+    # 内存推理模式 - 图像只解码一次直接送入模型，结果图直接编码到目标目录，
+    # 不使用ultralytics的save=True，也不产生runs/临时目录
+    INMEMORY_INFERENCE = True
+    # 图像解码器：opencv（完整解码）/ opencv_reduced / pillow_draft（JPEG按1/2、1/4、1/8缩小解码）
+    # 缩小倍数取缩小后短边仍不小于模型输入尺寸的最大值，对比见 scripts/decode_benchmark.py
+    IMAGE_DECODER = "opencv_reduced"
+
+    # 预测结果缓存配置 - 键为图像内容哈希+模型权重哈希
+    RESULT_CACHE_ENABLED = True
+    RESULT_CACHE_MAX_ENTRIES = 1024  # 内存LRU层最大条目数
+    RESULT_CACHE_TTL_SECONDS = 3600  # 条目有效期（秒）
+    RESULT_CACHE_DISK_DIR = None  # 设置目录路径以启用磁盘缓存层
+
+    # 结果图像异步渲染配置 - 绘制/编码结果图像不阻塞预测响应
+    RENDER_ASYNC = True
+    RENDER_WORKERS = 2  # 后台渲染线程数
+    RENDER_MAX_PENDING = 64  # 最多排队任务数，超出后在请求线程中直接渲染
+    RENDER_WAIT_TIMEOUT = 2.0  # 展示接口等待进行中渲染的最长时间（秒）
+
+    # 准入控制配置 - 每个模型的并发推理上限与有界等待队列
+    MODEL_MAX_CONCURRENCY = {"yolo_grow": 8, "yolo_disease": 8}
+    MODEL_MAX_QUEUE = {"yolo_grow": 32, "yolo_disease": 32}
+    ADMISSION_QUEUE_TIMEOUT = 10.0  # 排队最长等待时间（秒），超时返回503
+    READINESS_P99_MS = 5000  # 近期p99超过该值时/health报告未就绪
+
+    # 模型预热配置 - 预热完成前/health报告未就绪
+    WARMUP_ENABLED = True
+    WARMUP_BACKGROUND = True  # 在后台线程中预热，不阻塞服务启动
+    WARMUP_IMAGE_SIZES = {}  # 模型名 -> 合成图像尺寸列表，未配置时使用模型输入尺寸
+    WARMUP_BATCH_SIZES = [1, BATCH_MAX_SIZE]
+    WARMUP_ITERATIONS = 3  # 每种尺寸/批大小的推理次数（第一次为冷启动耗时）
+    WARMUP_REPORT_PATH = (
+        "logs/warmup.jsonl"  # 每次启动追加一条预热耗时记录，None表示不记录
+    )
+
+    # 日志配置 - 结构化JSON日志，经有界队列由后台线程写出，请求线程不等待日志I/O
+    LOG_LEVEL = "INFO"
+    LOG_QUEUE_SIZE = 10000  # 队列满时丢弃新日志而不是阻塞请求
+    LOG_MAX_FIELD_CHARS = 1024  # 消息和每个字段的最大长度，超出部分截断
+    # 各类别INFO及以下日志的保留比例（WARNING及以上始终保留），未列出的类别使用default
+    # request：请求头和请求体；access：每个请求一条的访问日志；
+    # werkzeug：预fork模式下werkzeug自带的访问日志（与access重复）
+    LOG_SAMPLE_RATES = {
+        "request": 0.01,
+        "access": 0.1,
+        "werkzeug": 0.0,
+        "default": 1.0,
     }
 
+    # 运行指标配置 - /metrics 输出Prometheus格式的耗时直方图和计数
+    METRICS_ENABLED = True  # 是否按路由记录HTTP请求耗时（推理阶段指标始终记录）
+
+    # 按需性能剖析 - 带 X-Profile: 1 请求头（需通过管理接口鉴权）或按比例抽取的请求
+    # 返回Server-Timing分阶段耗时，并把调用栈采样结果写为折叠栈文件
+    PROFILING_ENABLED = True  # 是否接受X-Profile请求头
+    PROFILING_SAMPLE_RATE = (
+        0.0  # 自动剖析的请求比例，运行时可通过 /admin/profiling 调整
+    )
+    PROFILING_INTERVAL_MS = 5  # 调用栈采样间隔（毫秒）
+    PROFILING_MAX_CONCURRENT = 4  # 同时采样的请求数上限，超出时只返回Server-Timing
+    PROFILING_MAX_SECONDS = 60  # 单个请求最长采样时间（秒）
+    PROFILING_OUTPUT_DIR = "logs/profiles"  # 按 <路由>/<模型>/ 分目录保存
+
     # API配置
     HOST = "127.0.0.1"
     PORT = 5050
     DEBUG = True
 
+    # 多进程服务配置（serve.py / gunicorn.conf.py）
+    WORKERS = None  # 工作进程数，None表示CPU核数
+    GRACEFUL_TIMEOUT = 30  # 重载/停止时等待进行中请求完成的最长时间（秒）
+    TORCH_THREADS_PER_WORKER = None  # 每个工作进程的PyTorch线程数，None表示核数/进程数
+
+    # ASGI服务配置（asgi.py）- 请求/响应I/O在事件循环中处理，视图在有界线程池中执行
+    # 线程数即同时执行视图（推理）的请求数，需不小于BATCH_MAX_SIZE才能凑满批
+    ASGI_VIEW_THREADS = 16
+    ASGI_BODY_SPOOL_BYTES = 1024 * 1024  # 请求体超过该大小时转存到临时文件
+    ASGI_RECEIVE_TIMEOUT = 60  # 上传时两次收到数据的最长间隔（秒），超时返回408
+
     # CORS配置
     CORS_ORIGINS = [
         "http://localhost:8080",
@@ -52,12 +210,16 @@ class DevelopmentConfig(Config):
     """开发环境配置"""
 
     DEBUG = True
+    LOG_LEVEL = "DEBUG"
+    LOG_SAMPLE_RATES = {"default": 1.0}
 
 
 class ProductionConfig(Config):
     """生产环境配置"""
 
     DEBUG = False
+    # 多进程模式下必须在fork之前完成预热
+    WARMUP_BACKGROUND = False
 
 
 # 根据环境变量选择配置
@@ -0,0 +1,135 @@
+"""
+准入控制 - 按模型限制并发推理数，排队已满时快速失败
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class OverloadedError(Exception):
+    """模型过载，请求被拒绝"""
+
+    def __init__(self, model_name: str, retry_after: int):
+        super().__init__(f"模型繁忙，请稍后重试: {model_name}")
+        self.model_name = model_name
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    单个模型的准入控制器
+
+    - 同时执行推理的请求数不超过max_concurrency
+    - 超出的请求进入有界等待队列，最多max_queue个
+    - 队列已满或等待超时时抛出OverloadedError
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        latency_window: int = 512,
+        latency_horizon: float = 60.0,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._latencies = deque(maxlen=latency_window)
+        self.latency_horizon = latency_horizon
+
+        # 统计信息
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def admit(self):
+        """获取执行名额，退出时释放并记录耗时（含排队时间）"""
+        start = time.perf_counter()
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def _acquire(self):
+        with self._cond:
+            if self._active < self.max_concurrency and self._waiting == 0:
+                self._active += 1
+                self.admitted += 1
+                return
+
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise OverloadedError(self.name, self.retry_after())
+
+            self._waiting += 1
+            try:
+                ok = self._cond.wait_for(
+                    lambda: self._active < self.max_concurrency, self.queue_timeout
+                )
+            finally:
+                self._waiting -= 1
+
+            if not ok:
+                self.timeouts += 1
+                raise OverloadedError(self.name, self.retry_after())
+
+            self._active += 1
+            self.admitted += 1
+
+    def _release(self, latency: float):
+        with self._cond:
+            self._active -= 1
+            self._latencies.append((time.monotonic(), latency))
+            self._cond.notify()
+
+    def percentile(self, q: float) -> float:
+        """最近latency_horizon秒内请求耗时的分位数（毫秒）"""
+        since = time.monotonic() - self.latency_horizon
+        samples = sorted(
+            latency for ts, latency in list(self._latencies) if ts >= since
+        )
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(math.ceil(q * len(samples))) - 1)
+        return samples[max(0, index)] * 1000.0
+
+    def retry_after(self) -> int:
+        """根据排队深度和近期耗时估算建议的重试间隔（秒）"""
+        p50 = self.percentile(0.5) / 1000.0
+        waves = (self._waiting + self._active) / self.max_concurrency
+        return max(1, int(math.ceil(waves * p50)))
+
+    def is_saturated(self, p99_limit_ms: float = None) -> bool:
+        """等待队列接近满载，或近期p99超过阈值"""
+        if self.max_queue and self._waiting >= self.max_queue * 0.8:
+            return True
+        if p99_limit_ms and self.percentile(0.99) > p99_limit_ms:
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取准入控制统计信息"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "p50_ms": round(self.percentile(0.5), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+        }
@@ -0,0 +1,209 @@
+"""
+YOLO推理后端 - torch / ONNX Runtime / OpenVINO，导出产物缓存在权重文件旁
+"""
+
+import ast
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows：只有进程内的锁
+    fcntl = None
+
+from ultralytics import YOLO
+
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("model")
+
+# 后端名称 -> ultralytics导出格式
+BACKEND_FORMATS = {
+    "torch": None,
+    "onnx": "onnx",
+    "openvino": "openvino",
+}
+
+# 模型类型 -> ultralytics任务类型
+TASKS = {
+    "grow": "classify",
+    "disease": "detect",
+}
+
+_export_lock = threading.Lock()
+
+
+@contextmanager
+def _exclusive_export(artifact_path: str):
+    """
+    导出产物的跨进程互斥锁（旁路的.lock文件上的flock）
+
+    多进程部署时每个工作进程的热更新监视都会看到同一次权重变化，
+    只有一个进程导出，其他进程等待后直接使用导出结果
+    """
+    with _export_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{artifact_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def exported_path(model_path: str, backend: str) -> str:
+    """获取指定后端导出产物的路径（与ultralytics导出命名一致）"""
+    stem = os.path.splitext(model_path)[0]
+    if backend == "onnx":
+        return f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_openvino_model"
+    return model_path
+
+
+def _is_fresh(artifact_path: str, model_path: str) -> bool:
+    """导出产物存在且不早于权重文件"""
+    if not os.path.exists(artifact_path):
+        return False
+    return os.path.getmtime(artifact_path) >= os.path.getmtime(model_path)
+
+
+def resolve_backend_weights(model_path: str, backend: str, **export_kwargs) -> str:
+    """
+    获取指定后端可加载的权重路径，必要时从.pt自动导出并缓存
+
+    Args:
+        model_path: .pt权重路径
+        backend: 后端名称（torch / onnx / openvino）
+        **export_kwargs: 传给YOLO.export的额外参数（如imgsz、int8）
+
+    Returns:
+        str: 可直接传给YOLO()的权重路径
+    """
+    if backend not in BACKEND_FORMATS:
+        raise ValueError(f"不支持的推理后端: {backend}")
+
+    # torch后端或已是导出产物（如量化后的.onnx）时直接使用
+    if backend == "torch" or not model_path.endswith(".pt"):
+        return model_path
+
+    artifact = exported_path(model_path, backend)
+    with _exclusive_export(artifact):
+        # 等锁期间其他进程可能已完成导出
+        if not _is_fresh(artifact, model_path):
+            logger.info("正在导出 %s 模型: %s -> %s", backend, model_path, artifact)
+            # dynamic=True：支持动态批大小，供批处理调度器使用
+            export_kwargs.setdefault("dynamic", True)
+            artifact = YOLO(model_path).export(
+                format=BACKEND_FORMATS[backend], **export_kwargs
+            )
+    return str(artifact)
+
+
+def read_model_imgsz(model_path: str):
+    """
+    读取.pt权重训练时的输入尺寸
+
+    导出的动态形状模型不记录该尺寸，推理时需要显式传入imgsz，
+    否则ultralytics会退回默认的640，导致与torch后端的输出不一致。
+    """
+    try:
+        if model_path.endswith(".onnx"):
+            # 导出产物的元数据中记录了imgsz
+            import onnxruntime
+
+            session = onnxruntime.InferenceSession(
+                model_path, providers=["CPUExecutionProvider"]
+            )
+            metadata = session.get_modelmeta().custom_metadata_map
+            return ast.literal_eval(metadata.get("imgsz", "None"))
+        return YOLO(model_path).model.args.get("imgsz")
+    except Exception as e:
+        logger.warning("读取模型输入尺寸失败: %s", e)
+        return None
+
+
+def _summarize(result, model_type: str) -> Dict[str, Any]:
+    """提取用于一致性比较的关键输出"""
+    if model_type == "grow":
+        return {
+            "top1": int(result.probs.top1),
+            "probs": result.probs.data.tolist(),
+        }
+    return {"classes": sorted({int(c) for c in result.boxes.cls.tolist()})}
+
+
+def run_parity_check(
+    model_path: str,
+    model_type: str,
+    image_paths: List[str],
+    backends: List[str] = ("torch", "onnx", "openvino"),
+    repeats: int = 3,
+) -> Dict[str, Any]:
+    """
+    在一组基准图像上比较各后端的输出一致性和推理延迟
+
+    Args:
+        model_path: .pt权重路径
+        model_type: 模型类型（grow / disease）
+        image_paths: 基准图像路径列表
+        backends: 需要比较的后端，以第一个为参照
+        repeats: 每张图像重复推理次数（取中位数延迟）
+
+    Returns:
+        各后端的延迟和与参照后端的一致率
+    """
+    task = TASKS[model_type]
+    imgsz = read_model_imgsz(model_path)
+    predict_kwargs = {"imgsz": imgsz} if imgsz else {}
+    outputs: Dict[str, List[Dict[str, Any]]] = {}
+    report: Dict[str, Any] = {}
+
+    for backend in backends:
+        try:
+            model = YOLO(resolve_backend_weights(model_path, backend), task=task)
+        except Exception as e:
+            report[backend] = {"error": str(e)}
+            continue
+
+        summaries, latencies = [], []
+        for image_path in image_paths:
+            timings = []
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                result = model(image_path, save=False, verbose=False, **predict_kwargs)[
+                    0
+                ]
+                timings.append(time.perf_counter() - start)
+            latencies.append(sorted(timings)[len(timings) // 2] * 1000.0)
+            summaries.append(_summarize(result, model_type))
+
+        outputs[backend] = summaries
+        report[backend] = {
+            "images": len(image_paths),
+            "mean_latency_ms": round(sum(latencies) / max(1, len(latencies)), 2),
+        }
+
+    reference = next((b for b in backends if b in outputs), None)
+    for backend, summaries in outputs.items():
+        agree = 0
+        max_prob_diff = 0.0
+        for ref, cur in zip(outputs[reference], summaries):
+            if model_type == "grow":
+                agree += ref["top1"] == cur["top1"]
+                diffs = [abs(a - b) for a, b in zip(ref["probs"], cur["probs"])]
+                max_prob_diff = max([max_prob_diff] + diffs)
+            else:
+                agree += ref["classes"] == cur["classes"]
+
+        report[backend]["reference"] = reference
+        report[backend]["agreement"] = round(agree / max(1, len(summaries)), 4)
+        if model_type == "grow":
+            report[backend]["max_prob_diff"] = round(max_prob_diff, 6)
+
+    return report
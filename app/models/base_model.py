@@ -33,6 +33,11 @@ class BaseModel(ABC):
         """检查模型是否已加载"""
         return self.is_loaded
 
+    def unload_model(self):
+        """卸载模型，释放权重占用的内存"""
+        self.model = None
+        self.is_loaded = False
+
 
 class ImageClassificationModel(BaseModel):
     """图像分类模型基类"""
@@ -55,7 +60,7 @@ class ImageClassificationModel(BaseModel):
 
 
 class TimeSeriesModel(BaseModel):
-    """时间序列模型基类（为LSTM预留）"""
+    """时间序列模型基类"""
 
     @abstractmethod
     def predict_sequence(self, sequence_data: Any, **kwargs) -> Dict[str, Any]:
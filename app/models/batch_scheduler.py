@@ -0,0 +1,144 @@
+"""
+动态批处理调度器 - 将并发的预测请求合并为一次批量前向推理
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, List
+
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import batch_duration, batch_size
+from app.utils.profiling import bind_timings, current_timings
+
+logger = get_logger("model")
+
+
+class BatchScheduler:
+    """
+    单个模型的批处理队列
+
+    收集并发请求，直到凑满最大批大小或达到最大等待时间，
+    然后执行一次批量推理，并把结果逐条分发回等待中的请求。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Dict[str, Any]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 15,
+    ):
+        """
+        Args:
+            name: 调度器名称（通常为模型名）
+            batch_fn: 批量推理函数，输入请求列表，返回等长的结果列表
+            max_batch_size: 单批最多请求数
+            max_wait_ms: 凑批最长等待时间（毫秒）
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+
+        self._queue: Queue = Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+
+        # 统计信息
+        self.batches_run = 0
+        self.items_processed = 0
+        self.max_batch_seen = 0
+
+    def submit(self, item: Any) -> Future:
+        """提交一个请求，返回可等待结果的Future"""
+        future: Future = Future()
+        self._ensure_worker()
+        # 被剖析的请求：批内各阶段耗时同样计入该请求
+        self._queue.put((item, future, current_timings()))
+        return future
+
+    def predict(self, item: Any, timeout: float = None) -> Dict[str, Any]:
+        """提交请求并阻塞等待结果"""
+        return self.submit(item).result(timeout)
+
+    def _ensure_worker(self):
+        """按需启动后台线程（fork后的子进程中会重新创建）"""
+        pid = os.getpid()
+        if self._pid == pid and self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._pid != pid:
+                # 父进程的队列和线程不会跟随fork，丢弃后重建
+                self._queue = Queue()
+                self._worker = None
+                self._pid = pid
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"batch-{self.name}", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        """后台循环：凑批并执行"""
+        queue = self._queue
+        while True:
+            batch = [queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        """执行一批请求并分发结果"""
+        # 跳过已被调用方取消的请求
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        items = [item for item, _, _ in batch]
+        start = time.perf_counter()
+        try:
+            with bind_timings(timings for _, _, timings in batch):
+                results = self.batch_fn(items)
+        except Exception as e:
+            logger.error("批量推理失败 [%s]: %s", self.name, e)
+            results = [{"error": f"预测失败: {str(e)}"} for _ in items]
+        batch_duration.observe(time.perf_counter() - start, self.name)
+        batch_size.observe(len(items), self.name)
+
+        if len(results) != len(items):
+            results = [{"error": "批量推理结果数量不匹配"} for _ in items]
+
+        self.batches_run += 1
+        self.items_processed += len(items)
+        self.max_batch_seen = max(self.max_batch_seen, len(items))
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取批处理统计信息"""
+        avg = self.items_processed / self.batches_run if self.batches_run else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "avg_batch_size": round(avg, 2),
+            "max_batch_seen": self.max_batch_seen,
+        }
@@ -0,0 +1,121 @@
+"""
+模型热更新 - 轮询权重文件，文件变化且写入完成后在后台加载新版本并原子替换
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.config import Config
+from app.models.model_manager import model_manager
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("model")
+
+
+class ModelWatcher:
+    """
+    权重文件监视器
+
+    - 每隔poll_seconds检查一次已加载模型的权重文件（mtime、大小）
+    - 文件签名变化后需在下一次检查时保持不变才触发更新，避免读到写了一半的文件
+    - 更新在监视线程中串行执行，不占用请求线程
+    - 多进程部署时每个进程各自监视（fork后在子进程中自动重启）
+    """
+
+    def __init__(self, manager, poll_seconds: float = 5.0):
+        """
+        Args:
+            manager: 模型管理器，需提供models、reload_model
+            poll_seconds: 轮询间隔（秒）
+        """
+        self.manager = manager
+        self.poll_seconds = max(0.5, float(poll_seconds))
+
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        """启动监视线程（已启动时忽略）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop.set()
+
+    def _restart_in_child(self):
+        # 线程不会被fork继承，子进程中按父进程的状态重新启动
+        if self._thread is not None and not self._stop.is_set():
+            self._thread = None
+            self.start()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning("检查模型文件失败: %s", e)
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _snapshot(self):
+        """记录当前所有权重文件的签名，作为比较基准"""
+        for model_name, model in list(self.manager.models.items()):
+            signature = self._signature(model.model_path)
+            if signature is not None:
+                self._signatures[model_name] = signature
+
+    def check(self) -> Dict[str, dict]:
+        """
+        检查一次权重文件，对已变化且写入完成的已加载模型执行热更新
+
+        Returns:
+            模型名 -> 更新记录
+        """
+        records = {}
+        for model_name, model in list(self.manager.models.items()):
+            signature = self._signature(model.model_path)
+            if signature is None or signature == self._signatures.get(model_name):
+                self._pending.pop(model_name, None)
+                continue
+
+            # 第一次发现变化只记下签名，下一轮仍不变时才认为写入完成
+            if self._pending.get(model_name) != signature:
+                self._pending[model_name] = signature
+                continue
+
+            del self._pending[model_name]
+            self._signatures[model_name] = signature
+
+            # 未加载的模型下次按需加载时自然会读到新文件
+            if not model.is_model_loaded():
+                continue
+
+            logger.info("检测到模型文件变化，开始热更新: %s", model_name)
+            record = self.manager.reload_model(model_name)
+            if "error" in record:
+                logger.error("模型热更新失败: %s", record["error"])
+            records[model_name] = record
+
+        return records
+
+
+# 全局权重文件监视器实例
+model_watcher = ModelWatcher(model_manager, Config.HOT_RELOAD_POLL_SECONDS)
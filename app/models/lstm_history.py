@@ -0,0 +1,285 @@
+"""
+地块时间序列存储 - 每个地块最近的观测（环形缓冲区）与缓存的LSTM隐状态
+
+客户端只需追加新的观测，预测时LSTM只从缓存的隐状态出发处理新追加的步，
+不必每次重算整个窗口。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 预测函数：(原始观测 (n, 步数, 特征), 初始h, 初始c) -> (输出, h, c)，
+# h/c 形状为 (层, n, 隐藏维度)，为None时从零状态开始
+AdvanceFn = Callable[
+    [np.ndarray, Optional[np.ndarray], Optional[np.ndarray]],
+    Tuple[np.ndarray, np.ndarray, np.ndarray],
+]
+
+
+class PlotHistoryStore:
+    """
+    多个地块的观测历史
+
+    - 所有地块共用一个 (槽位, capacity, 特征) 的float32数组作为环形缓冲区，
+      写入位置、观测数等也是按槽位排列的数组，按组整体索引而不逐个地块处理
+    - 缓存每个地块的隐状态和最近一次的网络输出；没有新观测的地块直接返回缓存输出
+    - 状态从窗口重建后，累计处理的新步数超过refresh_steps时再次从窗口重建，
+      使状态覆盖的历史保持在训练窗口附近（0表示从不重建）
+    - 地块数超过max_plots时淘汰最久未使用的地块
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        feature_dim: int,
+        max_plots: int = 100000,
+        refresh_steps: int = None,
+        initial_slots: int = 64,
+    ):
+        """
+        Args:
+            capacity: 每个地块保留的观测步数（模型的序列长度）
+            feature_dim: 每步的特征数
+            max_plots: 最多保存的地块数
+            refresh_steps: 状态从窗口重建的间隔（步），None表示等于capacity
+            initial_slots: 初始分配的槽位数，不够时按倍数扩容
+        """
+        self.capacity = int(capacity)
+        self.feature_dim = int(feature_dim)
+        self.max_plots = max(1, int(max_plots))
+        self.refresh_steps = (
+            self.capacity if refresh_steps is None else int(refresh_steps)
+        )
+        self.state_version = None  # 隐状态对应的模型权重版本
+
+        self._slots: "OrderedDict[str, int]" = (
+            OrderedDict()
+        )  # 地块ID -> 槽位，按使用时间排序
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self._allocate(min(max(1, initial_slots), self.max_plots))
+
+        # 统计信息
+        self.steps_advanced = 0  # 从缓存状态继续处理的步数
+        self.steps_replayed = 0  # 从窗口重建状态时处理的步数
+        self.evictions = 0
+
+    def _allocate(self, slots: int):
+        self._buffer = np.zeros((slots, self.capacity, self.feature_dim), np.float32)
+        self._write = np.zeros(slots, np.int64)  # 下一次写入的位置
+        self._count = np.zeros(slots, np.int64)  # 缓冲区中的观测数（不超过capacity）
+        self._pending = np.zeros(slots, np.int64)  # 尚未送入LSTM的观测数
+        self._since_refresh = np.zeros(slots, np.int64)  # 上次重建后处理的步数
+        self._valid = np.zeros(slots, bool)  # 是否有可用的缓存状态
+        self._h = self._c = self._output = None  # 第一次预测时按网络输出分配
+        self._free = list(range(slots - 1, -1, -1))
+
+    def _grow(self):
+        """槽位用完时扩容（已有数据原样复制）"""
+        old = len(self._write)
+        new = min(old * 2, self.max_plots)
+        pad = new - old
+
+        def extend(array, axis=0):
+            shape = list(array.shape)
+            shape[axis] = pad
+            return np.concatenate([array, np.zeros(shape, array.dtype)], axis=axis)
+
+        self._buffer = extend(self._buffer)
+        self._write = extend(self._write)
+        self._count = extend(self._count)
+        self._pending = extend(self._pending)
+        self._since_refresh = extend(self._since_refresh)
+        self._valid = extend(self._valid)
+        if self._h is not None:
+            self._h = extend(self._h, axis=1)
+            self._c = extend(self._c, axis=1)
+            self._output = extend(self._output)
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def _slot(self, plot_id: str, create: bool = False) -> Optional[int]:
+        slot = self._slots.get(plot_id)
+        if slot is not None:
+            self._slots.move_to_end(plot_id)
+            return slot
+        if not create:
+            return None
+
+        if not self._free:
+            if len(self._write) < self.max_plots:
+                self._grow()
+            else:
+                _, evicted = self._slots.popitem(last=False)
+                self._reset_slot(evicted)
+                self._free.append(evicted)
+                self.evictions += 1
+        slot = self._free.pop()
+        self._slots[plot_id] = slot
+        return slot
+
+    def _reset_slot(self, slot: int):
+        self._write[slot] = 0
+        self._count[slot] = 0
+        self._pending[slot] = 0
+        self._since_refresh[slot] = 0
+        self._valid[slot] = False
+
+    # ============ 写入 ============
+
+    def update(self, observations: Dict[str, np.ndarray], resets: Iterable[str] = ()):
+        """
+        追加观测
+
+        Args:
+            observations: 地块ID -> (步数, 特征)数组，步数可以为0
+            resets: 追加前先清空历史的地块ID
+        """
+        with self._lock:
+            for plot_id in resets:
+                slot = self._slots.pop(plot_id, None)
+                if slot is not None:
+                    self._reset_slot(slot)
+                    self._free.append(slot)
+
+            for plot_id, steps in observations.items():
+                n = len(steps)
+                # 没有新观测时不为未知地块分配槽位（预测时报错）
+                slot = self._slot(plot_id, create=n > 0)
+                if n == 0:
+                    continue
+                kept = steps[-self.capacity :]
+                start = self._write[slot] + n - len(kept)
+                positions = (start + np.arange(len(kept))) % self.capacity
+                self._buffer[slot, positions] = kept
+                self._write[slot] = (self._write[slot] + n) % self.capacity
+                self._count[slot] = min(self._count[slot] + n, self.capacity)
+                self._pending[slot] += n
+
+    def invalidate_states(self, version=None):
+        """模型权重变化后丢弃所有缓存状态（观测保留，下次预测时从窗口重建）"""
+        with self._lock:
+            self._valid[:] = False
+            self.state_version = version
+
+    # ============ 读取 ============
+
+    def _resolve(self, plot_ids: List[str]) -> np.ndarray:
+        slots = []
+        for plot_id in plot_ids:
+            slot = self._slot(plot_id)
+            if slot is None or self._count[slot] == 0:
+                raise KeyError(plot_id)
+            slots.append(slot)
+        return np.asarray(slots, np.int64)
+
+    def _gather(self, slots: np.ndarray, length: int) -> np.ndarray:
+        """各槽位最近length步观测，(len(slots), length, 特征)"""
+        offsets = np.arange(length) - length
+        positions = (self._write[slots, None] + offsets[None, :]) % self.capacity
+        return self._buffer[slots[:, None], positions]
+
+    def history_steps(self, plot_ids: List[str]) -> List[int]:
+        """各地块缓冲区中的观测步数"""
+        with self._lock:
+            return self._count[self._resolve(plot_ids)].tolist()
+
+    def windows(self, plot_ids: List[str]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        各地块缓冲区中的完整窗口，按长度分组
+
+        Returns:
+            [(在plot_ids中的序号, (n, 步数, 特征)数组)]
+
+        Raises:
+            KeyError: 地块没有观测
+        """
+        with self._lock:
+            slots = self._resolve(plot_ids)
+            counts = self._count[slots]
+            groups = []
+            for length in np.unique(counts):
+                indices = np.flatnonzero(counts == length)
+                groups.append((indices, self._gather(slots[indices], int(length))))
+            self._pending[slots] = 0
+            return groups
+
+    def forecast(self, plot_ids: List[str], advance: AdvanceFn) -> np.ndarray:
+        """
+        从缓存状态继续处理新观测并返回各地块的网络输出
+
+        - 没有可用状态、新观测已超出缓冲区、或距上次重建超过refresh_steps的地块，
+          从零状态重放缓冲区中的窗口
+        - 其余有新观测的地块只处理新观测
+        两类地块都按步数分组，每组一次前向
+
+        Returns:
+            (len(plot_ids), 输出维度)数组（网络原始输出）
+
+        Raises:
+            KeyError: 地块没有观测
+        """
+        with self._lock:
+            slots = self._resolve(plot_ids)
+            pending = self._pending[slots]
+            replay = ~self._valid[slots] | (pending >= self.capacity)
+            if self.refresh_steps > 0:
+                replay |= self._since_refresh[slots] + pending > self.refresh_steps
+            if self._h is None:
+                replay[:] = True
+
+            for mask, from_state in ((replay, False), (~replay & (pending > 0), True)):
+                group_slots = np.unique(slots[mask])
+                lengths = (
+                    self._pending[group_slots]
+                    if from_state
+                    else self._count[group_slots]
+                )
+                for length in np.unique(lengths):
+                    batch = group_slots[lengths == length]
+                    self._advance(batch, int(length), advance, from_state)
+
+            return self._output[slots].copy()
+
+    def _advance(self, slots, length, advance, from_state):
+        x = self._gather(slots, length)
+        if from_state:
+            output, h, c = advance(x, self._h[:, slots], self._c[:, slots])
+            self._since_refresh[slots] += length
+            self.steps_advanced += length * len(slots)
+        else:
+            output, h, c = advance(x, None, None)
+            self._since_refresh[slots] = 0
+            self.steps_replayed += length * len(slots)
+
+        if self._h is None:
+            size = len(self._write)
+            self._h = np.zeros((h.shape[0], size, h.shape[2]), np.float32)
+            self._c = np.zeros_like(self._h)
+            self._output = np.zeros((size, output.shape[1]), np.float32)
+        self._h[:, slots] = h
+        self._c[:, slots] = c
+        self._output[slots] = output
+        self._valid[slots] = True
+        self._pending[slots] = 0
+
+    def get_stats(self):
+        """获取存储统计信息"""
+        with self._lock:
+            state_bytes = (
+                0 if self._h is None else self._h.nbytes * 2 + self._output.nbytes
+            )
+            return {
+                "plots": len(self._slots),
+                "slots_allocated": len(self._write),
+                "max_plots": self.max_plots,
+                "capacity": self.capacity,
+                "memory_mb": round(
+                    (self._buffer.nbytes + state_bytes) / (1024 * 1024), 2
+                ),
+                "steps_advanced": self.steps_advanced,
+                "steps_replayed": self.steps_replayed,
+                "evictions": self.evictions,
+            }
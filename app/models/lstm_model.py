@@ -1,42 +1,235 @@
 """
-LSTM模型实现（预留扩展）
+LSTM模型实现 - 天气预测与作物生长预测
+
+权重文件支持两种格式：
+- TorchScript（torch.jit.save），可通过 _extra_files={"config.json": ...} 附带配置
+- state_dict：{"state_dict": 权重, "config": 配置}，或直接保存 LSTMForecaster 的权重；
+  网络结构（层数、隐藏维度、输入/输出维度）由权重形状推断
+
+配置（均可省略）：sequence_length、feature_dim、horizon、stage_names，
+以及归一化参数 input_mean/input_std（按特征）、output_mean/output_std（按输出）
+
+网络输入 (批大小, 时间步, 特征)，输出 (批大小, 输出维度)，输出按 [目标][时间] 排列。
+网络另有 forward_with_state(x, h, c) -> (输出, h, c) 方法时（LSTMForecaster自带，
+TorchScript模型可用 @torch.jit.export 导出），按地块预测只处理新追加的观测
 """
 
+import json
 import os
-from typing import Any, Dict
-
-from app.models.base_model import TimeSeriesModel
+import threading
+from abc import abstractmethod
+from typing import Any, Dict, List, Tuple
 
+import numpy as np
+import torch
+from torch import nn
 
-class LSTMWeatherModel(TimeSeriesModel):
-    """LSTM天气预测模型（预留实现）"""
+from app.config import Config
+from app.models.base_model import TimeSeriesModel
+from app.models.lstm_history import PlotHistoryStore
+from app.models.result_cache import hash_file
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("model")
+
+
+class LSTMForecaster(nn.Module):
+    """多层LSTM + 线性输出层：用最后一个时间步的隐状态预测全部输出"""
+
+    def __init__(
+        self,
+        input_size: int,
+        hidden_size: int = 64,
+        num_layers: int = 2,
+        output_size: int = 1,
+        dropout: float = 0.0,
+    ):
+        super().__init__()
+        self.lstm = nn.LSTM(
+            input_size,
+            hidden_size,
+            num_layers,
+            batch_first=True,
+            dropout=dropout if num_layers > 1 else 0.0,
+        )
+        self.head = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x):
+        out, _ = self.lstm(x)
+        return self.head(out[:, -1])
+
+    @torch.jit.export
+    def forward_with_state(
+        self, x: torch.Tensor, h: torch.Tensor, c: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """从给定隐状态继续处理x，返回输出和新的隐状态"""
+        out, (h, c) = self.lstm(x, (h, c))
+        return self.head(out[:, -1]), h, c
+
+
+def _infer_architecture(state_dict) -> Dict[str, int]:
+    """由state_dict的权重形状推断LSTMForecaster的结构参数"""
+    num_layers = 0
+    while f"lstm.weight_ih_l{num_layers}" in state_dict:
+        num_layers += 1
+    if not num_layers or "head.weight" not in state_dict:
+        raise ValueError("权重不是LSTMForecaster格式（缺少lstm.*或head.*）")
+    return {
+        "input_size": state_dict["lstm.weight_ih_l0"].shape[1],
+        "hidden_size": state_dict["lstm.weight_hh_l0"].shape[1],
+        "num_layers": num_layers,
+        "output_size": state_dict["head.weight"].shape[0],
+    }
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    """保留两位小数（转为float64后再取整，避免float32转列表时出现长尾小数和-0.0）"""
+    return np.round(values.astype(np.float64), 2) + 0.0
+
+
+class LSTMSequenceModel(TimeSeriesModel):
+    """
+    LSTM时间序列模型基类
+
+    sequence_data 可以是一个序列（时间步×特征）或序列列表，列表中的所有序列
+    一次转换为numpy数组并按批前向推理；长度不同的序列按长度分组，每组一次前向。
+    超过sequence_length的序列只使用最后sequence_length步。
+    """
+
+    model_label = "LSTM"  # 日志中的模型名称
+    result_type = "LSTM"  # 返回结果中的model_type
+    task_type = "time_series"
+    default_sequence_length = 30
+    default_feature_dim = 1
+    default_horizon = 1
 
     def __init__(self, model_path: str):
         super().__init__(model_path)
-        self.sequence_length = 30  # 默认序列长度
-        self.feature_dim = 5  # 特征维度（温度、湿度、降雨量等）
+        self.sequence_length = self.default_sequence_length
+        self.feature_dim = self.default_feature_dim
+        self.horizon = self.default_horizon
+        self.model_format = None  # torchscript / state_dict
+        self.weights_hash = None  # 加载时权重文件的哈希，变化后地块的缓存状态失效
+        self.state_shape = (
+            None  # (层数, 隐藏维度)，网络不支持forward_with_state时为None
+        )
+        self.settings: Dict[str, Any] = {}
+        self._input_mean = None
+        self._input_std = None
+        self._output_mean = None
+        self._output_std = None
+        self._lock = threading.Lock()
+
+    @property
+    @abstractmethod
+    def output_size(self) -> int:
+        """网络输出维度"""
+        pass
 
     def load_model(self) -> bool:
-        """加载LSTM模型"""
-        try:
-            # TODO: 实现模型加载逻辑
-            # 这里可以使用 PyTorch、TensorFlow 或其他框架
-            print(f"准备加载LSTM天气模型: {self.model_path}")
-
-            if not os.path.exists(self.model_path):
-                print(f"模型文件不存在: {self.model_path}")
+        """加载LSTM模型（TorchScript或state_dict）"""
+        with self._lock:
+            if self.is_loaded:
+                return True
+            try:
+                logger.debug("准备加载%s: %s", self.model_label, self.model_path)
+
+                if not os.path.exists(self.model_path):
+                    logger.warning("模型文件不存在: %s", self.model_path)
+                    return False
+
+                self.weights_hash = hash_file(self.model_path)[:16]
+                module, settings = self._load_network()
+                self._apply_settings(settings)
+                self._check_output_size(module)
+                self.state_shape = self._probe_state_shape(module)
+
+                self.model = module.eval()
+                self.is_loaded = True
+                logger.info(
+                    "%s加载成功: %s (%s)",
+                    self.model_label,
+                    self.model_path,
+                    self.model_format,
+                )
+                return True
+
+            except Exception as e:
+                logger.error("%s加载失败: %s", self.model_label, e)
+                self.model = None
+                self.is_loaded = False
                 return False
 
-            # 模拟加载过程
-            # self.model = torch.load(self.model_path)
-            self.is_loaded = True
-            print("LSTM天气模型加载成功")
-            return True
-
+    def _load_network(self) -> Tuple[nn.Module, Dict[str, Any]]:
+        """依次尝试TorchScript和state_dict格式"""
+        extra_files = {"config.json": ""}
+        try:
+            module = torch.jit.load(
+                self.model_path, map_location="cpu", _extra_files=extra_files
+            )
+            self.model_format = "torchscript"
+            raw = extra_files["config.json"]
+            return module, json.loads(raw) if raw else {}
+        except RuntimeError:
+            pass  # 不是TorchScript归档，按state_dict加载
+
+        # weights_only：只反序列化张量和基本类型，不执行权重文件中的任意代码
+        checkpoint = torch.load(self.model_path, map_location="cpu", weights_only=True)
+        if not isinstance(checkpoint, dict):
+            raise ValueError("无法识别的权重格式")
+        state_dict = checkpoint.get("state_dict") or checkpoint.get("model_state_dict")
+        settings = checkpoint.get("config") or {}
+        if state_dict is None:
+            state_dict = checkpoint
+
+        architecture = _infer_architecture(state_dict)
+        module = LSTMForecaster(**architecture)
+        module.load_state_dict(state_dict)
+        self.model_format = "state_dict"
+        settings.setdefault("feature_dim", architecture["input_size"])
+        return module, settings
+
+    def _apply_settings(self, settings: Dict[str, Any]):
+        """读取权重附带的配置（未提供的项保留默认值）"""
+        self.settings = dict(settings)
+        for name in ("sequence_length", "feature_dim", "horizon"):
+            setattr(self, name, int(settings.get(name, getattr(self, name))))
+
+        def vector(name):
+            value = settings.get(name)
+            return None if value is None else np.asarray(value, dtype=np.float32)
+
+        self._input_mean = vector("input_mean")
+        self._input_std = vector("input_std")
+        self._output_mean = vector("output_mean")
+        self._output_std = vector("output_std")
+
+    def _check_output_size(self, module):
+        """用一个全零序列验证网络的输入/输出维度与配置一致"""
+        probe = torch.zeros(1, 1, self.feature_dim)
+        with torch.inference_mode():
+            output = module(probe)
+        if tuple(output.shape) != (1, self.output_size):
+            raise ValueError(
+                f"模型输出维度 {tuple(output.shape[1:])} 与配置不符，期望 {self.output_size}"
+            )
+
+    def _probe_state_shape(self, module):
+        """网络支持forward_with_state时返回隐状态的(层数, 隐藏维度)"""
+        if not hasattr(module, "forward_with_state"):
+            return None
+        try:
+            shape = (module.lstm.num_layers, module.lstm.hidden_size)
+            state = torch.zeros(shape[0], 1, shape[1])
+            with torch.inference_mode():
+                output, h, _ = module.forward_with_state(
+                    torch.zeros(1, 1, self.feature_dim), state, state
+                )
+            if tuple(output.shape) == (1, self.output_size) and h.shape == state.shape:
+                return shape
         except Exception as e:
-            print(f"LSTM天气模型加载失败: {e}")
-            self.is_loaded = False
-            return False
+            logger.warning("%s不支持增量预测，按窗口重算: %s", self.model_label, e)
+        return None
 
     def predict(self, input_data: Any, **kwargs) -> Dict[str, Any]:
         """基础预测方法"""
@@ -44,136 +237,385 @@ class LSTMWeatherModel(TimeSeriesModel):
 
     def predict_sequence(self, sequence_data: Any, **kwargs) -> Dict[str, Any]:
         """
-        预测天气序列
+        预测一个或多个序列
 
         Args:
-            sequence_data: 历史天气数据序列
-            **kwargs: 其他参数（如预测天数等）
+            sequence_data: 单个序列 [[特征...], ...]，或序列列表
+            **kwargs: 各模型的其他参数
 
         Returns:
-            预测结果
+            预测结果；输入为序列列表时各项为按序列排列的列表
         """
         if not self.is_loaded:
             if not self.load_model():
                 return {"error": "模型加载失败"}
 
         try:
-            # TODO: 实现实际的预测逻辑
-            print("执行LSTM天气预测...")
-
-            # 示例返回格式
-            prediction_days = kwargs.get("prediction_days", 7)
-
-            # 模拟预测结果
-            mock_predictions = {
-                "temperature": [25.5, 26.1, 24.8, 23.9, 25.2, 26.7, 27.1],
-                "humidity": [65.2, 68.1, 72.5, 70.3, 67.8, 64.9, 62.1],
-                "rainfall": [0.0, 2.5, 15.3, 8.7, 0.0, 0.0, 1.2],
-                "prediction_days": prediction_days,
-                "confidence_scores": [0.85, 0.82, 0.78, 0.80, 0.83, 0.86, 0.84],
-            }
-
-            return {
-                "predictions": mock_predictions,
-                "model_type": "LSTM_Weather",
-                "status": "success",
-            }
+            single, groups, count = self.to_batches(sequence_data)
+        except ValueError as e:
+            return {"error": f"序列数据无效: {e}"}
 
+        try:
+            logger.debug("执行%s预测", self.model_label, extra={"sequences": count})
+            outputs = self.forward_batches(groups, count)
+            result = self._format_outputs(outputs, single, **kwargs)
+        except ValueError as e:
+            return {"error": str(e)}
         except Exception as e:
-            print(f"LSTM天气预测失败: {e}")
+            logger.error("%s预测失败: %s", self.model_label, e)
             return {"error": f"预测失败: {str(e)}"}
 
-    def get_model_info(self) -> Dict[str, Any]:
-        """获取模型信息"""
-        return {
-            "model_type": "LSTM",
-            "model_path": self.model_path,
-            "task_type": "weather_prediction",
-            "sequence_length": self.sequence_length,
-            "feature_dim": self.feature_dim,
-            "is_loaded": self.is_loaded,
+        response = {
+            "predictions": result,
+            "model_type": self.result_type,
+            "status": "success",
         }
+        if not single:
+            response["count"] = count
+        return response
 
+    def to_batches(
+        self, sequence_data
+    ) -> Tuple[bool, List[Tuple[np.ndarray, np.ndarray]], int]:
+        """
+        校验并转换输入
 
-class LSTMGrowthModel(TimeSeriesModel):
-    """LSTM作物生长预测模型（预留实现）"""
+        Returns:
+            (是否为单个序列, [(在输入中的序号, (n, 时间步, 特征)数组)], 序列总数)
 
-    def __init__(self, model_path: str):
-        super().__init__(model_path)
-        self.sequence_length = 45  # 生长周期序列长度
-        self.feature_dim = 8  # 特征维度（生长指标等）
+        Raises:
+            ValueError: 格式、特征维度或数值无效
+        """
+        if sequence_data is None:
+            raise ValueError("缺少sequence_data")
 
-    def load_model(self) -> bool:
-        """加载LSTM生长模型"""
         try:
-            print(f"准备加载LSTM生长模型: {self.model_path}")
-
-            if not os.path.exists(self.model_path):
-                print(f"模型文件不存在: {self.model_path}")
-                return False
-
-            # TODO: 实现实际的模型加载
-            self.is_loaded = True
-            print("LSTM生长模型加载成功")
-            return True
-
-        except Exception as e:
-            print(f"LSTM生长模型加载失败: {e}")
-            self.is_loaded = False
-            return False
-
-    def predict(self, input_data: Any, **kwargs) -> Dict[str, Any]:
-        """基础预测方法"""
-        return self.predict_sequence(input_data, **kwargs)
+            array = np.asarray(sequence_data, dtype=np.float32)
+        except (ValueError, TypeError):
+            array = None  # 各序列长度不同（或含非数值），逐个序列转换
+
+        if array is not None:
+            if array.ndim == 2:
+                single, batches = True, [array[None]]
+            elif array.ndim == 3:
+                single, batches = False, [array]
+            else:
+                raise ValueError("应为 时间步×特征 的序列或序列列表")
+            count = batches[0].shape[0]
+            groups = [(np.arange(count), batches[0])]
+        else:
+            single = False
+            groups, count = self._group_ragged(sequence_data)
+
+        if count == 0:
+            raise ValueError("序列列表为空")
+        if count > Config.LSTM_MAX_SEQUENCES:
+            raise ValueError(f"单次最多 {Config.LSTM_MAX_SEQUENCES} 个序列")
+
+        checked = []
+        for indices, batch in groups:
+            if batch.shape[1] == 0:
+                raise ValueError("序列不能为空")
+            if batch.shape[2] != self.feature_dim:
+                raise ValueError(
+                    f"特征维度应为 {self.feature_dim}，实际为 {batch.shape[2]}"
+                )
+            if not np.isfinite(batch).all():
+                raise ValueError("序列包含NaN或无穷大")
+            checked.append((indices, batch[:, -self.sequence_length :]))
+        return single, checked, count
+
+    @staticmethod
+    def _group_ragged(sequence_data):
+        """长度不同的序列按长度分组，每组堆叠为一个数组"""
+        if not isinstance(sequence_data, (list, tuple)):
+            raise ValueError("应为 时间步×特征 的序列或序列列表")
+
+        arrays = []
+        for i, sequence in enumerate(sequence_data):
+            try:
+                array = np.asarray(sequence, dtype=np.float32)
+            except (ValueError, TypeError):
+                raise ValueError(f"第 {i} 个序列格式错误") from None
+            if array.ndim != 2:
+                raise ValueError(f"第 {i} 个序列应为 时间步×特征")
+            arrays.append(array)
+
+        lengths = np.array([array.shape[0] for array in arrays])
+        groups = []
+        for length in np.unique(lengths):
+            indices = np.flatnonzero(lengths == length)
+            groups.append((indices, np.stack([arrays[i] for i in indices])))
+        return groups, len(arrays)
+
+    def forward_batches(self, groups, count: int) -> np.ndarray:
+        """
+        按LSTM_BATCH_SIZE分块前向推理
 
-    def predict_sequence(self, sequence_data: Any, **kwargs) -> Dict[str, Any]:
+        Returns:
+            (序列总数, 输出维度)数组，已反归一化，顺序与输入一致
         """
-        预测作物生长趋势
+        outputs = np.empty((count, self.output_size), dtype=np.float32)
+        chunk = max(1, Config.LSTM_BATCH_SIZE)
+        with torch.inference_mode():
+            for indices, batch in groups:
+                batch = self._normalize(batch)
+                for start in range(0, len(batch), chunk):
+                    tensor = torch.from_numpy(batch[start : start + chunk])
+                    outputs[indices[start : start + chunk]] = self.model(tensor).numpy()
+        return self._denormalize(outputs)
+
+    def _normalize(self, batch: np.ndarray) -> np.ndarray:
+        if self._input_mean is not None:
+            batch = batch - self._input_mean
+        if self._input_std is not None:
+            batch = batch / self._input_std
+        return np.ascontiguousarray(batch, dtype=np.float32)
+
+    def _denormalize(self, outputs: np.ndarray) -> np.ndarray:
+        if self._output_std is not None:
+            outputs = outputs * self._output_std
+        if self._output_mean is not None:
+            outputs = outputs + self._output_mean
+        return outputs
+
+    # ============ 按地块预测 ============
+
+    def create_history_store(self, max_plots: int, refresh_steps: int = None):
+        """创建与本模型输入维度一致的地块历史存储"""
+        return PlotHistoryStore(
+            self.sequence_length,
+            self.feature_dim,
+            max_plots=max_plots,
+            refresh_steps=refresh_steps,
+        )
+
+    def predict_plots(
+        self,
+        store: PlotHistoryStore,
+        observations: Dict[str, Any],
+        resets=(),
+        single: bool = False,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        追加各地块的新观测并预测
 
         Args:
-            sequence_data: 历史生长数据
-            **kwargs: 其他参数
+            store: 地块历史存储（create_history_store创建）
+            observations: 地块ID -> 新观测（步数×特征，可以为空列表）
+            resets: 追加前先清空历史的地块ID
+            single: 是否只有一个地块（结果不按地块排列）
+            **kwargs: 各模型的其他参数
 
         Returns:
-            预测结果
+            预测结果，另附plot_ids和各地块缓冲区中的观测步数history_steps
         """
         if not self.is_loaded:
             if not self.load_model():
                 return {"error": "模型加载失败"}
 
         try:
-            print("执行LSTM生长预测...")
-
-            # TODO: 实现实际预测逻辑
-            # 模拟预测结果
-            mock_predictions = {
-                "growth_stage": ["tillering", "heading", "flowering", "maturity"],
-                "growth_metrics": {
-                    "plant_height": [45.2, 52.1, 58.7, 62.3],
-                    "leaf_area": [120.5, 145.8, 165.2, 158.9],
-                    "biomass": [85.3, 125.7, 180.4, 220.1],
-                },
-                "predicted_yield": 8.5,  # tons per hectare
-                "confidence": 0.88,
-            }
-
-            return {
-                "predictions": mock_predictions,
-                "model_type": "LSTM_Growth",
-                "status": "success",
-            }
+            observations = self._check_observations(observations)
+        except ValueError as e:
+            return {"error": f"观测数据无效: {e}"}
+
+        if store.state_version != self.weights_hash:
+            store.invalidate_states(self.weights_hash)
+        store.update(observations, resets)
+        plot_ids = list(observations)
 
+        try:
+            if self.state_shape:
+                outputs = self._denormalize(store.forecast(plot_ids, self._advance))
+            else:
+                outputs = self.forward_batches(store.windows(plot_ids), len(plot_ids))
+            history_steps = store.history_steps(plot_ids)
+            result = self._format_outputs(outputs, single, **kwargs)
+        except KeyError as e:
+            return {"error": f"地块没有历史观测: {e.args[0]}"}
+        except ValueError as e:
+            return {"error": str(e)}
         except Exception as e:
-            print(f"LSTM生长预测失败: {e}")
+            logger.error("%s预测失败: %s", self.model_label, e)
             return {"error": f"预测失败: {str(e)}"}
 
+        response = {
+            "predictions": result,
+            "plot_ids": plot_ids[0] if single else plot_ids,
+            "history_steps": history_steps[0] if single else history_steps,
+            "model_type": self.result_type,
+            "status": "success",
+        }
+        if not single:
+            response["count"] = len(plot_ids)
+        return response
+
+    def _check_observations(self, observations) -> Dict[str, np.ndarray]:
+        """地块ID -> (步数, 特征)数组；单步观测可以直接给出特征列表"""
+        if not isinstance(observations, dict) or not observations:
+            raise ValueError("应为 地块ID -> 观测 的映射")
+        if len(observations) > Config.LSTM_MAX_SEQUENCES:
+            raise ValueError(f"单次最多 {Config.LSTM_MAX_SEQUENCES} 个地块")
+
+        checked = {}
+        for plot_id, steps in observations.items():
+            try:
+                array = np.asarray(steps if steps is not None else [], dtype=np.float32)
+            except (ValueError, TypeError):
+                raise ValueError(f"地块 {plot_id} 的观测格式错误") from None
+            if array.size == 0:
+                array = array.reshape(0, self.feature_dim)
+            elif array.ndim == 1:
+                array = array[None]
+            if array.ndim != 2 or array.shape[1] != self.feature_dim:
+                raise ValueError(f"地块 {plot_id} 的观测应为 步数×{self.feature_dim}")
+            if not np.isfinite(array).all():
+                raise ValueError(f"地块 {plot_id} 的观测包含NaN或无穷大")
+            checked[str(plot_id)] = array
+        return checked
+
+    def _advance(self, x, h, c):
+        """
+        从隐状态(h, c)继续处理x（h为None时从零状态开始），按LSTM_BATCH_SIZE分块
+
+        Returns:
+            (网络原始输出, h, c)，均为numpy数组
+        """
+        x = self._normalize(x)
+        if h is None:
+            layers, hidden = self.state_shape
+            h = np.zeros((layers, len(x), hidden), np.float32)
+            c = np.zeros_like(h)
+
+        chunk = max(1, Config.LSTM_BATCH_SIZE)
+        outputs, hs, cs = [], [], []
+        with torch.inference_mode():
+            for start in range(0, len(x), chunk):
+                end = start + chunk
+                output, h_out, c_out = self.model.forward_with_state(
+                    torch.from_numpy(x[start:end]),
+                    torch.from_numpy(np.ascontiguousarray(h[:, start:end])),
+                    torch.from_numpy(np.ascontiguousarray(c[:, start:end])),
+                )
+                outputs.append(output.numpy())
+                hs.append(h_out.numpy())
+                cs.append(c_out.numpy())
+        return (
+            np.concatenate(outputs),
+            np.concatenate(hs, axis=1),
+            np.concatenate(cs, axis=1),
+        )
+
+    @abstractmethod
+    def _format_outputs(
+        self, outputs: np.ndarray, single: bool, **kwargs
+    ) -> Dict[str, Any]:
+        """
+        (序列数, 输出维度)数组 -> 预测结果
+
+        各项按序列排列（整体转换为列表，不逐个序列处理）；single为True时只取第一个
+        """
+        pass
+
+    def memory_footprint(self) -> int:
+        """模型权重占用的内存（字节）"""
+        if not self.is_loaded or self.model is None:
+            return 0
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
     def get_model_info(self) -> Dict[str, Any]:
         """获取模型信息"""
         return {
             "model_type": "LSTM",
             "model_path": self.model_path,
-            "task_type": "growth_prediction",
+            "model_format": self.model_format,
+            "task_type": self.task_type,
             "sequence_length": self.sequence_length,
             "feature_dim": self.feature_dim,
+            "horizon": self.horizon,
+            "incremental": self.state_shape is not None,
             "is_loaded": self.is_loaded,
         }
+
+
+class LSTMWeatherModel(LSTMSequenceModel):
+    """LSTM天气预测模型：输出未来horizon天的温度、湿度、降雨量"""
+
+    model_label = "LSTM天气模型"
+    result_type = "LSTM_Weather"
+    task_type = "weather_prediction"
+    default_sequence_length = 30  # 默认序列长度
+    default_feature_dim = 5  # 特征维度（温度、湿度、降雨量等）
+    default_horizon = 7  # 最多预测天数
+    targets = ("temperature", "humidity", "rainfall")
+
+    @property
+    def output_size(self) -> int:
+        return len(self.targets) * self.horizon
+
+    def _format_outputs(self, outputs, single, prediction_days=7, **kwargs):
+        try:
+            days = int(prediction_days)
+        except (TypeError, ValueError):
+            raise ValueError("prediction_days 应为整数") from None
+        if not 1 <= days <= self.horizon:
+            raise ValueError(f"prediction_days 应在1到{self.horizon}之间")
+
+        if single:
+            outputs = outputs[:1]
+        values = _round(outputs.reshape(len(outputs), len(self.targets), -1))
+        # 降雨量不为负
+        rain = self.targets.index("rainfall")
+        np.maximum(values[:, rain], 0.0, out=values[:, rain])
+
+        predictions = {}
+        for i, name in enumerate(self.targets):
+            series = values[:, i, :days].tolist()
+            predictions[name] = series[0] if single else series
+        predictions["prediction_days"] = days
+        return predictions
+
+
+class LSTMGrowthModel(LSTMSequenceModel):
+    """LSTM作物生长预测模型：输出各生长阶段的株高、叶面积、生物量和预计产量"""
+
+    model_label = "LSTM生长模型"
+    result_type = "LSTM_Growth"
+    task_type = "growth_prediction"
+    default_sequence_length = 45  # 生长周期序列长度
+    default_feature_dim = 8  # 特征维度（生长指标等）
+    metrics = ("plant_height", "leaf_area", "biomass")
+    default_stages = ("tillering", "heading", "flowering", "maturity")
+    default_horizon = len(default_stages)
+
+    @property
+    def stage_names(self) -> List[str]:
+        return list(self.settings.get("stage_names") or self.default_stages)
+
+    @property
+    def output_size(self) -> int:
+        # 每个阶段的各项指标 + 预计产量（吨/公顷）
+        return len(self.metrics) * self.horizon + 1
+
+    def _apply_settings(self, settings):
+        super()._apply_settings(settings)
+        if "stage_names" in settings and "horizon" not in settings:
+            self.horizon = len(settings["stage_names"])
+
+    def _format_outputs(self, outputs, single, **kwargs):
+        if single:
+            outputs = outputs[:1]
+        values = _round(outputs[:, :-1].reshape(len(outputs), len(self.metrics), -1))
+        growth_metrics = {}
+        for m, name in enumerate(self.metrics):
+            series = values[:, m].tolist()
+            growth_metrics[name] = series[0] if single else series
+        predicted_yield = _round(outputs[:, -1]).tolist()
+
+        return {
+            "growth_stage": self.stage_names,
+            "growth_metrics": growth_metrics,
+            "predicted_yield": predicted_yield[0] if single else predicted_yield,
+        }
@@ -2,71 +2,348 @@
 模型管理器 - 统一管理所有模型
 """
 
-from typing import Any, Dict
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Tuple
 
 from app.config import Config
+from app.models.admission import AdmissionController, OverloadedError
+from app.models.batch_scheduler import BatchScheduler
 from app.models.lstm_model import LSTMGrowthModel, LSTMWeatherModel
+from app.models.model_registry import ModelRegistry
+from app.models.render_pool import render_pool
+from app.models.result_cache import PredictionCache, hash_file
 from app.models.yolo_model import YOLOModel
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import metrics, model_load_duration
+from app.utils.profiling import annotate
+
+logger = get_logger("model")
 
 
 class ModelManager:
     """模型管理器，负责加载和管理所有模型"""
 
     def __init__(self):
-        self.models: Dict[str, Any] = {}
+        self.registry = ModelRegistry(
+            memory_budget_mb=Config.MODEL_MEMORY_BUDGET_MB,
+            pinned=Config.PINNED_MODELS,
+        )
+        self.models: Dict[str, Any] = self.registry.models
+        self.schedulers: Dict[str, BatchScheduler] = {}
+        self._scheduler_lock = threading.Lock()
+        # LSTM按地块预测：模型名 -> 各地块的观测历史和隐状态（只在本进程内）
+        self.plot_histories: Dict[str, Any] = {}
+        self.admission: Dict[str, AdmissionController] = {}
+        self.warmup_state: Dict[str, Any] = {"status": "pending", "models": {}}
+        # 热更新：最近一次更新记录（用于回滚的上一版本保留在注册表中，计入内存预算）
+        self.reload_state: Dict[str, Dict[str, Any]] = {}
+        self._reload_locks: Dict[str, threading.Lock] = {}
+        self._warmup_done = threading.Event()
+        self.result_cache = PredictionCache(
+            max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+            disk_dir=Config.RESULT_CACHE_DISK_DIR,
+        )
         self._initialize_models()
 
     def _initialize_models(self):
-        """初始化所有模型"""
+        """根据注册表配置创建所有模型（不加载，首次使用时加载）"""
         try:
-            # 初始化YOLO模型
-            self.models["yolo_grow"] = YOLOModel(
-                Config.MODEL_PATHS["yolo_grow"], "grow"
-            )
-            self.models["yolo_disease"] = YOLOModel(
-                Config.MODEL_PATHS["yolo_disease"], "disease"
-            )
-
-            # 初始化LSTM模型（预留）
-            self.models["lstm_weather"] = LSTMWeatherModel(
-                Config.MODEL_PATHS["lstm_weather"]
-            )
-            self.models["lstm_growth"] = LSTMGrowthModel(
-                Config.MODEL_PATHS["lstm_growth"]
-            )
+            # 包括可选版本（如INT8量化版）
+            for model_name in list(Config.MODEL_REGISTRY) + list(Config.MODEL_VARIANTS):
+                spec = self._get_spec(model_name)
+                self.registry.register(model_name, self._build_model(model_name, spec))
 
-            print("模型管理器初始化完成")
+            logger.info("模型管理器初始化完成")
 
         except Exception as e:
-            print(f"模型管理器初始化失败: {e}")
+            logger.error("模型管理器初始化失败: %s", e)
+
+    @staticmethod
+    def _get_spec(model_name: str):
+        """获取模型的注册表条目，可选版本继承基础模型的条目"""
+        if model_name in Config.MODEL_REGISTRY:
+            return Config.MODEL_REGISTRY[model_name]
+        if model_name in Config.MODEL_VARIANTS:
+            base_name = model_name.split("@", 1)[0]
+            return {
+                **Config.MODEL_REGISTRY[base_name],
+                **Config.MODEL_VARIANTS[model_name],
+            }
+        return None
+
+    @staticmethod
+    def _build_model(model_name: str, spec: Dict[str, Any]):
+        """根据注册表条目创建模型实例"""
+        kind = spec["kind"]
+        if kind == "yolo":
+            backend = spec.get("backend") or Config.MODEL_BACKENDS.get(
+                model_name, "torch"
+            )
+            version = model_name.split("@", 1)[1] if "@" in model_name else None
+            return YOLOModel(spec["path"], spec["model_type"], backend, version)
+        if kind == "lstm_weather":
+            return LSTMWeatherModel(spec["path"])
+        if kind == "lstm_growth":
+            return LSTMGrowthModel(spec["path"])
+        raise ValueError(f"未知的模型类型: {kind}")
 
     def get_model(self, model_name: str):
         """获取指定模型"""
-        return self.models.get(model_name)
+        return self.registry.get(model_name)
 
     def load_model(self, model_name: str) -> bool:
-        """加载指定模型"""
-        model = self.get_model(model_name)
-        if model:
-            return model.load_model()
+        """加载指定模型（受内存预算约束）"""
+        if self.get_model(model_name):
+            return self.registry.ensure_loaded(model_name)
         else:
-            print(f"模型不存在: {model_name}")
+            logger.warning("模型不存在: %s", model_name)
             return False
 
+    def unload_model(self, model_name: str) -> bool:
+        """卸载指定模型"""
+        return self.registry.unload(model_name)
+
     def load_all_models(self) -> Dict[str, bool]:
         """加载所有模型"""
         results = {}
-        for model_name, model in self.models.items():
+        for model_name in list(self.models):
             try:
-                results[model_name] = model.load_model()
+                results[model_name] = self.registry.ensure_loaded(model_name)
             except Exception as e:
-                print(f"加载模型 {model_name} 失败: {e}")
+                logger.error("加载模型 %s 失败: %s", model_name, e)
                 results[model_name] = False
 
         return results
 
+    def warmup_model(self, model_name: str) -> bool:
+        """使用合成图像预热指定模型，覆盖配置的输入尺寸和批大小"""
+        model = self.get_model(model_name)
+        if not model or not hasattr(model, "warmup"):
+            return False
+
+        record: Dict[str, Any] = {"ok": False, "runs": []}
+        self.warmup_state["models"][model_name] = record
+        start = time.perf_counter()
+
+        try:
+            if not self.registry.ensure_loaded(model_name):
+                raise RuntimeError(f"模型加载失败: {model.model_path}")
+
+            record["runs"] = self._warmup_instance(model_name, model)
+            record["ok"] = True
+            logger.info("模型 %s 预热完成", model_name)
+        except Exception as e:
+            record["error"] = str(e)
+            logger.error("模型 %s 预热失败: %s", model_name, e)
+
+        record["total_ms"] = round((time.perf_counter() - start) * 1000.0, 2)
+        return record["ok"]
+
+    @staticmethod
+    def _warmup_instance(model_name: str, model) -> List[Dict[str, Any]]:
+        """
+        按配置的输入尺寸和批大小预热一个已加载的模型实例
+
+        每种组合执行WARMUP_ITERATIONS次，记录首次（冷启动）和后续平均耗时
+        """
+        runs = []
+        image_sizes = Config.WARMUP_IMAGE_SIZES.get(model_name) or [model.imgsz]
+        batch_sizes = sorted(set(Config.WARMUP_BATCH_SIZES or [1]))
+        iterations = max(1, Config.WARMUP_ITERATIONS)
+
+        for image_size in image_sizes:
+            for batch_size in batch_sizes:
+                timings = [
+                    model.warmup(image_size, batch_size) * 1000.0
+                    for _ in range(iterations)
+                ]
+                steady = timings[1:] or timings
+                runs.append(
+                    {
+                        "image_size": image_size,
+                        "batch_size": batch_size,
+                        "first_ms": round(timings[0], 2),
+                        "steady_ms": round(sum(steady) / len(steady), 2),
+                    }
+                )
+        return runs
+
+    def warmup_models(self, model_names: List[str] = None) -> Dict[str, Any]:
+        """
+        预热已加载的YOLO模型，完成后服务才报告就绪
+
+        Args:
+            model_names: 需要预热的模型，默认为已加载的YOLO模型
+
+        Returns:
+            预热状态与耗时
+        """
+        if model_names is None:
+            model_names = [
+                name
+                for name in ["yolo_grow", "yolo_disease"]
+                if self.is_model_loaded(name)
+            ]
+
+        self.warmup_state.update(status="running", started_at=time.time())
+        start = time.perf_counter()
+
+        for model_name in model_names:
+            self.warmup_model(model_name)
+
+        self.warmup_state.update(
+            status="done",
+            finished_at=time.time(),
+            total_ms=round((time.perf_counter() - start) * 1000.0, 2),
+        )
+        self._warmup_done.set()
+        self._record_warmup()
+        return self.warmup_state
+
+    def start_warmup(self, background: bool = True):
+        """启动预热（后台线程或同步执行）"""
+        if not Config.WARMUP_ENABLED:
+            self.warmup_state["status"] = "skipped"
+            self._warmup_done.set()
+            return
+
+        if not background:
+            self.warmup_models()
+            return
+
+        self.warmup_state["status"] = "running"
+        threading.Thread(target=self.warmup_models, name="warmup", daemon=True).start()
+
+    def wait_for_warmup(self, timeout: float = None) -> bool:
+        """等待预热完成"""
+        return self._warmup_done.wait(timeout)
+
+    def is_warmed_up(self) -> bool:
+        """预热是否已完成（或已禁用）"""
+        return self._warmup_done.is_set()
+
+    def _record_warmup(self):
+        """追加一条预热耗时记录，便于跟踪各版本的冷启动开销"""
+        report_path = Config.WARMUP_REPORT_PATH
+        if not report_path:
+            return
+
+        record = {
+            "release": os.environ.get("PADDY_RELEASE", ""),
+            "pid": os.getpid(),
+            **self.warmup_state,
+        }
+        try:
+            os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+            with open(report_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error("写入预热记录失败: %s", e)
+
+    def reload_model(self, model_name: str) -> Dict[str, Any]:
+        """
+        热更新指定模型（零停机）
+
+        在当前线程中从权重文件加载并预热新实例，期间请求继续由旧实例处理；
+        新实例就绪后原子替换，再等待仍在使用旧实例的请求结束。
+        加载或预热失败时保持旧实例不变。旧实例保留在内存中用于回滚。
+
+        Returns:
+            更新记录，失败时包含error
+        """
+        spec = self._get_spec(model_name)
+        if spec is None:
+            return {"error": f"模型不存在: {model_name}"}
+
+        lock = self._get_reload_lock(model_name)
+        if not lock.acquire(blocking=False):
+            return {"error": f"模型正在更新: {model_name}"}
+
+        try:
+            start = time.perf_counter()
+            new_model = self._build_model(model_name, spec)
+            if not new_model.load_model():
+                return {"error": f"新版本模型加载失败: {model_name}"}
+            model_load_duration.observe(time.perf_counter() - start, model_name)
+
+            record: Dict[str, Any] = {"action": "reload", "started_at": time.time()}
+            try:
+                if hasattr(new_model, "warmup") and Config.WARMUP_ENABLED:
+                    record["warmup"] = self._warmup_instance(model_name, new_model)
+            except Exception as e:
+                new_model.unload_model()
+                return {"error": f"新版本模型预热失败: {e}"}
+
+            return self._swap_model(model_name, new_model, record, start)
+        finally:
+            lock.release()
+
+    def rollback_model(self, model_name: str) -> Dict[str, Any]:
+        """
+        回滚到上一版本（上一次热更新前的实例）
+
+        回滚后被替换下来的版本成为新的“上一版本”，可再次回滚以恢复。
+        """
+        lock = self._get_reload_lock(model_name)
+        if not lock.acquire(blocking=False):
+            return {"error": f"模型正在更新: {model_name}"}
+
+        try:
+            previous = self.registry.retained(model_name)
+            if previous is None:
+                return {"error": f"没有可回滚的版本: {model_name}"}
+
+            record = {"action": "rollback", "started_at": time.time()}
+            return self._swap_model(model_name, previous, record, time.perf_counter())
+        finally:
+            lock.release()
+
+    def _swap_model(
+        self, model_name: str, new_model, record: Dict[str, Any], start: float
+    ) -> Dict[str, Any]:
+        """替换模型实例并等待旧实例上的请求排空"""
+        old_model = self.registry.swap(model_name, new_model)
+        # 旧版本的缓存结果不再命中（缓存键包含权重哈希），提前释放内存
+        self.result_cache.invalidate_model(model_name)
+
+        drained = self.registry.wait_drained(old_model, Config.HOT_RELOAD_DRAIN_TIMEOUT)
+        # 只有仍在内存中的旧实例才能回滚（权重文件已被新版本覆盖）
+        if old_model is not None and old_model.is_model_loaded():
+            self.registry.retain(model_name, old_model)
+        else:
+            self.registry.release(model_name)
+
+        record.update(
+            ok=True,
+            drained=drained,
+            weights_hash=getattr(new_model, "weights_hash", None),
+            previous_hash=getattr(old_model, "weights_hash", None),
+            total_ms=round((time.perf_counter() - start) * 1000.0, 2),
+        )
+        self.reload_state[model_name] = record
+        logger.info(
+            "模型 %s 已切换: %s -> %s (%s)",
+            model_name,
+            record["previous_hash"],
+            record["weights_hash"],
+            record["action"],
+        )
+        return record
+
+    def _get_reload_lock(self, model_name: str) -> threading.Lock:
+        with self._scheduler_lock:
+            return self._reload_locks.setdefault(model_name, threading.Lock())
+
     def predict_image(
-        self, model_type: str, image_path: str, save_result: bool = True
+        self,
+        model_type: str,
+        image_path: str,
+        save_result: bool = True,
+        version: str = None,
     ) -> Dict[str, Any]:
         """
         使用指定模型预测图像
@@ -75,17 +352,325 @@ class ModelManager:
             model_type: 模型类型 ('grow' 或 'disease')
             image_path: 图像路径
             save_result: 是否保存结果
+            version: 可选的模型版本（如 'int8'），为空时使用默认模型
 
         Returns:
             预测结果
         """
-        model_name = f"yolo_{model_type}"
+        model_name = self._resolve_model_name(model_type, version)
         model = self.get_model(model_name)
+        annotate(model=model_name)
 
         if not model:
             return {"error": f"模型不存在: {model_name}"}
 
-        return model.predict_image(image_path, save_result)
+        cache_key, cached = self._lookup_cache(
+            model_name, model, image_path, save_result
+        )
+        if cached is not None:
+            return cached
+
+        # 准入控制：超出并发上限的请求排队，队列满时抛出OverloadedError
+        # registry.use：按需加载模型，推理期间该模型不会被内存预算淘汰，
+        # 也不会因热更新被释放
+        with self._get_admission(model_name).admit(), self.registry.use(
+            model_name
+        ) as pinned:
+            if cache_key and pinned is not model:
+                # 查询缓存后发生了热更新：结果来自固定的实例，键也按该实例计算
+                cache_key = self._get_cache_key(model_name, pinned, image_path)
+            if not Config.BATCH_ENABLED:
+                result = pinned.predict_image(image_path, save_result)
+            else:
+                # 经由批处理队列与其他并发请求合并推理，批内使用同一个固定的实例
+                result = self._get_scheduler(model_name).predict(
+                    (image_path, save_result, pinned)
+                )
+
+        if cache_key:
+            self.result_cache.put(model_name, cache_key, result)
+
+        return result
+
+    def predict_array(
+        self,
+        model_type: str,
+        image,
+        image_name: str,
+        image_hash: str = None,
+        save_result: bool = True,
+        version: str = None,
+    ) -> Dict[str, Any]:
+        """
+        预测内存中已解码的图像（如刚上传、尚未落盘的图像）
+
+        Args:
+            model_type: 模型类型 ('grow' 或 'disease')
+            image: BGR格式的numpy数组
+            image_name: 图像文件名（用于命名结果图像）
+            image_hash: 原始字节的哈希，提供时参与结果缓存
+            save_result: 是否保存结果
+            version: 可选的模型版本
+
+        Returns:
+            预测结果
+        """
+        model_name = self._resolve_model_name(model_type, version)
+        model = self.get_model(model_name)
+        annotate(model=model_name)
+
+        if not model:
+            return {"error": f"模型不存在: {model_name}"}
+
+        cache_key, cached = None, None
+        if image_hash:
+            cache_key, cached = self._lookup_cache(
+                model_name, model, image_name, save_result, image_hash
+            )
+            if cached is not None:
+                return cached
+
+        with self._get_admission(model_name).admit(), self.registry.use(
+            model_name
+        ) as pinned:
+            if cache_key and pinned is not model:
+                cache_key = self._get_cache_key(
+                    model_name, pinned, image_name, image_hash
+                )
+            if not Config.BATCH_ENABLED:
+                result = pinned.predict_arrays([image], [image_name], save_result)[0]
+            else:
+                result = self._get_scheduler(model_name).predict(
+                    ((image, image_name), save_result, pinned)
+                )
+
+        if cache_key:
+            self.result_cache.put(model_name, cache_key, result)
+
+        return result
+
+    def predict_images(
+        self,
+        model_type: str,
+        image_paths: List[str],
+        save_result: bool = True,
+        version: str = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        批量预测多张图像，每凑满一批执行一次前向推理
+
+        缓存命中的图像立即产出，其余按BATCH_MAX_SIZE分批推理，每批完成后产出该批结果。
+        单张图像的错误（包括过载被拒）只体现在该图像的结果中。
+
+        Args:
+            model_type: 模型类型 ('grow' 或 'disease')
+            image_paths: 图像路径列表
+            save_result: 是否保存结果
+            version: 可选的模型版本
+
+        Yields:
+            (图像在输入中的序号, 预测结果)
+        """
+        model_name = self._resolve_model_name(model_type, version)
+        model = self.get_model(model_name)
+        annotate(model=model_name)
+
+        if not model:
+            for i in range(len(image_paths)):
+                yield i, {"error": f"模型不存在: {model_name}"}
+            return
+
+        pending = []
+        for i, image_path in enumerate(image_paths):
+            cache_key, cached = self._lookup_cache(
+                model_name, model, image_path, save_result
+            )
+            if cached is not None:
+                yield i, cached
+            else:
+                pending.append((i, image_path, cache_key))
+
+        batch_size = max(1, Config.BATCH_MAX_SIZE)
+        admission = self._get_admission(model_name)
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start : start + batch_size]
+            # 每批单独申请准入名额，产出结果期间不占用名额
+            pinned = None
+            try:
+                with admission.admit(), self.registry.use(model_name) as pinned:
+                    results = pinned.predict_images(
+                        [image_path for _, image_path, _ in chunk], save_result
+                    )
+            except OverloadedError as e:
+                results = [
+                    {"error": str(e), "retry_after": e.retry_after} for _ in chunk
+                ]
+
+            for (i, image_path, cache_key), result in zip(chunk, results):
+                if cache_key and pinned is not None and pinned is not model:
+                    # 热更新后的批次：按实际推理的实例重新计算缓存键
+                    cache_key = self._get_cache_key(model_name, pinned, image_path)
+                if cache_key and pinned is not None:
+                    self.result_cache.put(model_name, cache_key, result)
+                yield i, result
+
+    @staticmethod
+    def _resolve_model_name(model_type: str, version: str = None) -> str:
+        """由模型类型和版本得到注册表中的模型名"""
+        model_name = f"yolo_{model_type}"
+        if version:
+            model_name = f"{model_name}@{version}"
+        return model_name
+
+    def _lookup_cache(
+        self,
+        model_name: str,
+        model,
+        image_path: str,
+        save_result: bool,
+        image_hash: str = None,
+    ) -> Tuple[Any, Any]:
+        """
+        查询结果缓存
+
+        Returns:
+            (缓存键, 命中的结果)，未启用缓存时键为None，未命中时结果为None
+        """
+        cache_key = self._get_cache_key(model_name, model, image_path, image_hash)
+        if cache_key:
+            cached = self.result_cache.get(model_name, cache_key)
+            # 需要结果图像时，只有结果图像仍在才算命中
+            if cached is not None and (not save_result or model.has_result(image_path)):
+                return cache_key, cached
+        return cache_key, None
+
+    def _get_cache_key(
+        self, model_name: str, model, image_path: str, image_hash: str = None
+    ):
+        """计算缓存键（图像内容哈希+模型标识），不可用时返回None"""
+        if not Config.RESULT_CACHE_ENABLED:
+            return None
+
+        if image_hash is None:
+            try:
+                image_hash = hash_file(image_path)
+            except OSError:
+                return None
+
+        if model.is_model_loaded() and getattr(model, "weights_hash", None):
+            # 以已加载实例的权重为准：文件已被替换、新版本尚未切换时结果仍来自旧版本
+            identity = f"{model_name}:{model.weights_hash}"
+        else:
+            identity = self.result_cache.get_model_identity(
+                model_name, model.model_path
+            )
+        # 不同推理后端的输出可能有细微差异，后端也是键的一部分
+        identity = f"{identity}:{getattr(model, 'backend', 'torch')}"
+        return self.result_cache.make_key(image_hash, identity)
+
+    def _get_admission(self, model_name: str) -> AdmissionController:
+        """获取（必要时创建）指定模型的准入控制器"""
+        controller = self.admission.get(model_name)
+        if controller is None:
+            with self._scheduler_lock:
+                controller = self.admission.get(model_name)
+                if controller is None:
+                    controller = AdmissionController(
+                        model_name,
+                        max_concurrency=Config.MODEL_MAX_CONCURRENCY.get(model_name, 8),
+                        max_queue=Config.MODEL_MAX_QUEUE.get(model_name, 32),
+                        queue_timeout=Config.ADMISSION_QUEUE_TIMEOUT,
+                    )
+                    self.admission[model_name] = controller
+        return controller
+
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        获取就绪状态（供负载均衡判断是否继续向本节点分发请求）
+
+        Returns:
+            {"ready": bool, "warmup": 预热状态, "admission": {模型名: 准入统计}}
+        """
+        stats = {}
+        ready = self.is_warmed_up()
+        for model_name, controller in list(self.admission.items()):
+            stats[model_name] = controller.get_stats()
+            saturated = controller.is_saturated(Config.READINESS_P99_MS)
+            stats[model_name]["saturated"] = saturated
+            ready = ready and not saturated
+
+        return {
+            "ready": ready,
+            "warmup": self.warmup_state["status"],
+            "admission": stats,
+        }
+
+    def _get_scheduler(self, model_name: str) -> BatchScheduler:
+        """获取（必要时创建）指定模型的批处理调度器"""
+        scheduler = self.schedulers.get(model_name)
+        if scheduler is None:
+            with self._scheduler_lock:
+                scheduler = self.schedulers.get(model_name)
+                if scheduler is None:
+                    scheduler = BatchScheduler(
+                        model_name,
+                        lambda items: self._run_image_batch(model_name, items),
+                        max_batch_size=Config.BATCH_MAX_SIZE,
+                        max_wait_ms=Config.BATCH_MAX_WAIT_MS,
+                    )
+                    self.schedulers[model_name] = scheduler
+        return scheduler
+
+    def _run_image_batch(
+        self, model_name: str, items: List[Tuple[Any, bool, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        执行一批图像预测
+
+        Args:
+            model_name: 模型名
+            items: (source, save_result, model) 列表，source为图像路径，
+                或内存中的 (图像数组, 文件名)；model为提交请求时registry.use固定的实例
+
+        Returns:
+            与输入顺序一致的预测结果列表
+        """
+        outputs: List[Dict[str, Any]] = [None] * len(items)
+
+        # 按模型实例（热更新期间新旧实例可能同在一批）、是否保存结果、输入来源分组，
+        # 每组一次前向推理
+        instances = {id(item[2]): item[2] for item in items}
+        groups = [
+            (model, save_result)
+            for model in instances.values()
+            for save_result in (True, False)
+        ]
+        for model, save_result in groups:
+            indices = [
+                i
+                for i, item in enumerate(items)
+                if item[2] is model and item[1] == save_result
+            ]
+            path_indices = [i for i in indices if isinstance(items[i][0], str)]
+            array_indices = [i for i in indices if not isinstance(items[i][0], str)]
+
+            if path_indices:
+                results = model.predict_images(
+                    [items[i][0] for i in path_indices], save_result
+                )
+                for i, result in zip(path_indices, results):
+                    outputs[i] = result
+
+            if array_indices:
+                results = model.predict_arrays(
+                    [items[i][0][0] for i in array_indices],
+                    [items[i][0][1] for i in array_indices],
+                    save_result,
+                )
+                for i, result in zip(array_indices, results):
+                    outputs[i] = result
+
+        return outputs
 
     def predict_weather(self, sequence_data: Any, **kwargs) -> Dict[str, Any]:
         """
@@ -102,7 +687,8 @@ class ModelManager:
         if not model:
             return {"error": "LSTM天气模型不可用"}
 
-        return model.predict_sequence(sequence_data, **kwargs)
+        with self.registry.use("lstm_weather"):
+            return model.predict_sequence(sequence_data, **kwargs)
 
     def predict_growth(self, sequence_data: Any, **kwargs) -> Dict[str, Any]:
         """
@@ -119,7 +705,56 @@ class ModelManager:
         if not model:
             return {"error": "LSTM生长模型不可用"}
 
-        return model.predict_sequence(sequence_data, **kwargs)
+        with self.registry.use("lstm_growth"):
+            return model.predict_sequence(sequence_data, **kwargs)
+
+    def predict_plots(
+        self,
+        model_name: str,
+        observations: Dict[str, Any],
+        resets=(),
+        single=False,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        追加各地块的新观测，并用LSTM模型预测（历史保存在服务端）
+
+        Args:
+            model_name: lstm_weather / lstm_growth
+            observations: 地块ID -> 新观测
+            resets: 追加前先清空历史的地块ID
+            single: 是否只有一个地块
+            **kwargs: 其他参数
+
+        Returns:
+            预测结果
+        """
+        model = self.get_model(model_name)
+        if not model:
+            return {"error": f"模型不存在: {model_name}"}
+
+        with self.registry.use(model_name):
+            if not model.is_loaded and not model.load_model():
+                return {"error": "模型加载失败"}
+            store = self._get_plot_history(model_name, model)
+            return model.predict_plots(store, observations, resets, single, **kwargs)
+
+    def _get_plot_history(self, model_name: str, model):
+        """获取模型的地块历史，模型的序列长度或特征数变化（热更新）后重新创建"""
+        with self._scheduler_lock:
+            store = self.plot_histories.get(model_name)
+            if (
+                store is None
+                or store.capacity != model.sequence_length
+                or store.feature_dim != model.feature_dim
+            ):
+                if store is not None:
+                    logger.warning("%s输入维度已变化，清空地块历史", model_name)
+                store = model.create_history_store(
+                    Config.LSTM_HISTORY_MAX_PLOTS, Config.LSTM_STATE_REFRESH_STEPS
+                )
+                self.plot_histories[model_name] = store
+            return store
 
     def get_model_info(self, model_name: str = None) -> Dict[str, Any]:
         """
@@ -142,6 +777,20 @@ class ModelManager:
             info = {}
             for name, model in self.models.items():
                 info[name] = model.get_model_info()
+                if name in self.schedulers:
+                    info[name]["batching"] = self.schedulers[name].get_stats()
+                if name in self.plot_histories:
+                    info[name]["plot_history"] = self.plot_histories[name].get_stats()
+                if name.startswith("yolo_"):
+                    info[name]["cache"] = self.result_cache.get_stats(name)
+                if name in self.warmup_state["models"]:
+                    info[name]["warmup"] = self.warmup_state["models"][name]
+                if name in self.reload_state:
+                    info[name]["reload"] = {
+                        **self.reload_state[name],
+                        "rollback_available": self.registry.retained(name) is not None,
+                    }
+                info[name]["memory"] = self.registry.get_stats(name)
             return info
 
     def is_model_loaded(self, model_name: str) -> bool:
@@ -149,6 +798,119 @@ class ModelManager:
         model = self.get_model(model_name)
         return model.is_model_loaded() if model else False
 
+    def collect_metrics(self) -> List[Tuple[str, str, str, list]]:
+        """抓取/metrics时读取队列深度、缓存命中率、模型加载状态等已有统计"""
+        loaded, resident, last_load = [], [], []
+        for name in list(self.models):
+            stats = self.registry.get_stats(name)
+            labels = {"model": name}
+            loaded.append((labels, int(self.is_model_loaded(name))))
+            resident.append((labels, int(stats["resident_mb"] * 1024 * 1024)))
+            if stats.get("last_load_ms") is not None:
+                last_load.append((labels, stats["last_load_ms"] / 1000.0))
+
+        batch_queue = [
+            ({"model": name}, scheduler.get_stats()["queue_depth"])
+            for name, scheduler in list(self.schedulers.items())
+        ]
+
+        admission_active, admission_queue, admission_rejected = [], [], []
+        for name, controller in list(self.admission.items()):
+            stats = controller.get_stats()
+            labels = {"model": name}
+            admission_active.append((labels, stats["active"]))
+            admission_queue.append((labels, stats["queue_depth"]))
+            admission_rejected.append((labels, stats["rejected"] + stats["timeouts"]))
+
+        cache_hits, cache_misses, cache_ratio = [], [], []
+        for name in list(self.models):
+            if not name.startswith("yolo_"):
+                continue
+            stats = self.result_cache.get_stats(name)
+            labels = {"model": name}
+            cache_hits.append((labels, stats["hits"]))
+            cache_misses.append((labels, stats["misses"]))
+            cache_ratio.append((labels, stats["hit_ratio"]))
+
+        history_plots, history_steps = [], []
+        for name, store in list(self.plot_histories.items()):
+            stats = store.get_stats()
+            history_plots.append(({"model": name}, stats["plots"]))
+            for mode in ("advanced", "replayed"):
+                history_steps.append(
+                    ({"model": name, "mode": mode}, stats[f"steps_{mode}"])
+                )
+
+        render = render_pool.get_stats()
+
+        return [
+            ("paddy_model_loaded", "gauge", "模型是否已加载", loaded),
+            ("paddy_model_resident_bytes", "gauge", "模型内存占用（字节）", resident),
+            ("paddy_model_last_load_seconds", "gauge", "最近一次加载耗时", last_load),
+            (
+                "paddy_batch_queue_depth",
+                "gauge",
+                "批处理队列中等待的请求数",
+                batch_queue,
+            ),
+            (
+                "paddy_admission_active",
+                "gauge",
+                "正在执行推理的请求数",
+                admission_active,
+            ),
+            (
+                "paddy_admission_queue_depth",
+                "gauge",
+                "准入控制排队中的请求数",
+                admission_queue,
+            ),
+            (
+                "paddy_admission_rejected_total",
+                "counter",
+                "因队列已满或排队超时被拒绝的请求数",
+                admission_rejected,
+            ),
+            (
+                "paddy_result_cache_hits_total",
+                "counter",
+                "结果缓存命中次数",
+                cache_hits,
+            ),
+            (
+                "paddy_result_cache_misses_total",
+                "counter",
+                "结果缓存未命中次数",
+                cache_misses,
+            ),
+            ("paddy_result_cache_hit_ratio", "gauge", "结果缓存命中率", cache_ratio),
+            (
+                "paddy_lstm_history_plots",
+                "gauge",
+                "保存了观测历史的地块数",
+                history_plots,
+            ),
+            (
+                "paddy_lstm_steps_total",
+                "counter",
+                "LSTM按地块预测处理的时间步数（advanced为从缓存状态继续，replayed为重放窗口）",
+                history_steps,
+            ),
+            (
+                "paddy_render_pending",
+                "gauge",
+                "后台渲染中的结果图像数",
+                [({}, render["pending"])],
+            ),
+            (
+                "paddy_render_inline_total",
+                "counter",
+                "渲染池已满、在请求线程中渲染的次数",
+                [({}, render["inline_renders"])],
+            ),
+        ]
+
 
 # 全局模型管理器实例
 model_manager = ModelManager()
+metrics.register_collector(model_manager.collect_metrics)
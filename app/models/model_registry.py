@@ -0,0 +1,304 @@
+"""
+模型注册表 - 按需加载模型，在内存预算内按LRU淘汰空闲模型
+"""
+
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import model_load_duration
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖
+    psutil = None
+
+logger = get_logger("model")
+
+
+def current_rss() -> int:
+    """当前进程的常驻内存（字节），无法获取时返回0"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    模型注册表
+
+    - 模型在首次使用时加载，内存占用优先取模型自身统计的权重大小，
+      否则取加载前后的RSS差值（首次加载时会混入框架自身的初始化开销）
+    - 加载新模型会超出预算时，按最近最少使用顺序卸载空闲模型
+    - 固定（pinned）模型和正在处理请求的模型不会被卸载
+    - 热更新后保留用于回滚的上一版本实例同样计入预算，预算不足时最先卸载
+    """
+
+    def __init__(self, memory_budget_mb: float = 0, pinned: Iterable[str] = ()):
+        """
+        Args:
+            memory_budget_mb: 模型内存预算（MB），0表示不限制
+            pinned: 永不卸载的模型名
+        """
+        self.models: Dict[str, Any] = {}
+        self.pinned = set(pinned)
+        self.budget_bytes = int(memory_budget_mb * 1024 * 1024)
+
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._instance_refs: Dict[int, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._inflight: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # 模型名 -> (保留用于回滚的上一版本实例, 内存占用)
+        self._retained: Dict[str, Tuple[Any, int]] = {}
+
+    def register(self, model_name: str, model):
+        """注册模型（不加载）"""
+        with self._lock:
+            self.models[model_name] = model
+            self._load_locks.setdefault(model_name, threading.Lock())
+            self._inflight.setdefault(model_name, 0)
+            self._stats.setdefault(
+                model_name,
+                {
+                    "load_count": 0,
+                    "eviction_count": 0,
+                    "resident_bytes": 0,
+                    "last_load_ms": None,
+                    "last_used": None,
+                },
+            )
+
+    def get(self, model_name: str):
+        """获取模型实例（不触发加载）"""
+        return self.models.get(model_name)
+
+    @contextmanager
+    def use(self, model_name: str):
+        """
+        使用模型：必要时加载，期间该模型不会被卸载
+
+        Yields:
+            进入时的模型实例（加载失败时模型的is_loaded为False，由调用方处理）；
+            热更新替换实例后，已进入的请求仍使用旧实例直到结束
+        """
+        with self._cond:
+            self._inflight[model_name] = self._inflight.get(model_name, 0) + 1
+            self._touch(model_name)
+            model = self.models.get(model_name)
+            self._instance_refs[id(model)] = self._instance_refs.get(id(model), 0) + 1
+        try:
+            self.ensure_loaded(model_name)
+            yield model
+        finally:
+            with self._cond:
+                self._inflight[model_name] -= 1
+                self._instance_refs[id(model)] -= 1
+                if self._instance_refs[id(model)] <= 0:
+                    del self._instance_refs[id(model)]
+                    self._cond.notify_all()
+
+    def swap(self, model_name: str, new_model):
+        """
+        原子地替换模型实例（新实例应已加载完成）
+
+        Returns:
+            被替换的旧实例
+        """
+        with self._lock:
+            old_model = self.models.get(model_name)
+            self.models[model_name] = new_model
+            stats = self._stats[model_name]
+            if hasattr(new_model, "memory_footprint"):
+                stats["resident_bytes"] = new_model.memory_footprint()
+            stats["load_count"] += 1
+            self._touch(model_name)
+        return old_model
+
+    def retain(self, model_name: str, model):
+        """保留被替换下来的实例用于回滚，其内存计入预算（替换已保留的实例）"""
+        with self._lock:
+            size = 0
+            if hasattr(model, "memory_footprint"):
+                size = model.memory_footprint()
+            if not size:
+                # 无法统计时按当前版本的占用估计
+                size = self._stats.get(model_name, {}).get("resident_bytes", 0)
+            self._retained[model_name] = (model, size)
+        self._evict_for(0)
+
+    def release(self, model_name: str):
+        """不再保留上一版本，返回该实例（没有时返回None）"""
+        with self._lock:
+            entry = self._retained.pop(model_name, None)
+        return entry[0] if entry else None
+
+    def retained(self, model_name: str) -> Optional[Any]:
+        """保留用于回滚的上一版本实例，已被卸载时返回None"""
+        with self._lock:
+            entry = self._retained.get(model_name)
+            if entry is None or not entry[0].is_model_loaded():
+                return None
+            return entry[0]
+
+    def wait_drained(self, model, timeout: float = None) -> bool:
+        """等待仍在使用指定实例的请求全部结束"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: id(model) not in self._instance_refs, timeout
+            )
+
+    def ensure_loaded(self, model_name: str) -> bool:
+        """确保模型已加载，必要时先淘汰其他空闲模型腾出预算"""
+        model = self.models.get(model_name)
+        if model is None:
+            return False
+        if model.is_model_loaded():
+            return True
+
+        with self._load_locks[model_name]:
+            if model.is_model_loaded():
+                return True
+
+            stats = self._stats[model_name]
+            self._evict_for(self._estimate_bytes(model_name), exclude=model_name)
+
+            rss_before = current_rss()
+            start = time.perf_counter()
+            ok = model.load_model()
+            elapsed = time.perf_counter() - start
+
+            if ok:
+                model_load_duration.observe(elapsed, model_name)
+                measured = current_rss() - rss_before
+                if hasattr(model, "memory_footprint"):
+                    measured = model.memory_footprint() or measured
+                with self._lock:
+                    stats["load_count"] += 1
+                    stats["last_load_ms"] = round(elapsed * 1000.0, 2)
+                    stats["resident_bytes"] = (
+                        measured if measured > 0 else self._estimate_bytes(model_name)
+                    )
+                    self._touch(model_name)
+                # 实测占用可能超过估计，加载后再检查一次预算
+                self._evict_for(0, exclude=model_name)
+
+            return ok
+
+    def unload(self, model_name: str) -> bool:
+        """卸载指定模型"""
+        with self._lock:
+            model = self.models.get(model_name)
+            if model is None or not model.is_model_loaded():
+                return False
+            stats = self._stats[model_name]
+            stats["last_measured_bytes"] = stats["resident_bytes"]
+            model.unload_model()
+            stats["resident_bytes"] = 0
+        gc.collect()
+        return True
+
+    def resident_bytes(self) -> int:
+        """已加载模型（含保留用于回滚的上一版本）的内存占用总和"""
+        with self._lock:
+            current = sum(
+                self._stats[name]["resident_bytes"]
+                for name, model in self.models.items()
+                if model.is_model_loaded()
+            )
+            # 已回滚为当前版本的实例只按当前版本计算一次
+            retained = sum(
+                size
+                for name, (model, size) in self._retained.items()
+                if model.is_model_loaded() and model is not self.models.get(name)
+            )
+        return current + retained
+
+    def _touch(self, model_name: str):
+        if model_name in self._stats:
+            self._stats[model_name]["last_used"] = time.time()
+
+    def _estimate_bytes(self, model_name: str) -> int:
+        """估计加载所需内存：优先使用上次实测值，否则使用权重文件大小"""
+        measured = self._stats[model_name].get("last_measured_bytes")
+        if measured:
+            return measured
+        try:
+            return os.path.getsize(self.models[model_name].model_path)
+        except (OSError, AttributeError):
+            return 0
+
+    def _evict_for(self, needed_bytes: int, exclude: str = None):
+        """卸载最近最少使用的空闲模型，直到能在预算内容纳needed_bytes"""
+        if not self.budget_bytes:
+            return
+
+        evicted = False
+        with self._lock:
+            # 先卸载保留用于回滚的上一版本（当前版本已回滚为该实例、仍有请求在用的除外）
+            for name, (model, _) in list(self._retained.items()):
+                if self.resident_bytes() + needed_bytes <= self.budget_bytes:
+                    break
+                if model is self.models.get(name) or id(model) in self._instance_refs:
+                    continue
+                if model.is_model_loaded():
+                    model.unload_model()
+                    evicted = True
+                    logger.warning("内存预算不足，卸载回滚版本: %s", name)
+                del self._retained[name]
+
+            candidates = sorted(
+                (
+                    name
+                    for name, model in self.models.items()
+                    if name != exclude
+                    and name not in self.pinned
+                    and model.is_model_loaded()
+                    and self._inflight.get(name, 0) == 0
+                ),
+                key=lambda name: self._stats[name]["last_used"] or 0,
+            )
+
+            while (
+                candidates and self.resident_bytes() + needed_bytes > self.budget_bytes
+            ):
+                name = candidates.pop(0)
+                stats = self._stats[name]
+                stats["last_measured_bytes"] = stats["resident_bytes"]
+                self.models[name].unload_model()
+                stats["resident_bytes"] = 0
+                stats["eviction_count"] += 1
+                evicted = True
+                logger.warning("内存预算不足，卸载模型: %s", name)
+
+        if evicted:
+            gc.collect()
+
+    def get_stats(self, model_name: str) -> Dict[str, Any]:
+        """获取指定模型的加载/淘汰统计"""
+        stats = self._stats.get(model_name, {})
+        return {
+            "pinned": model_name in self.pinned,
+            "load_count": stats.get("load_count", 0),
+            "eviction_count": stats.get("eviction_count", 0),
+            "resident_mb": round(stats.get("resident_bytes", 0) / (1024 * 1024), 2),
+            "last_load_ms": stats.get("last_load_ms"),
+            "inflight": self._inflight.get(model_name, 0),
+        }
+
+    def get_budget_info(self) -> Dict[str, Any]:
+        """获取内存预算使用情况"""
+        return {
+            "budget_mb": round(self.budget_bytes / (1024 * 1024), 2),
+            "resident_mb": round(self.resident_bytes() / (1024 * 1024), 2),
+        }
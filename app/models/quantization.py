@@ -0,0 +1,215 @@
+"""
+INT8量化 - 基于ONNX Runtime静态量化生成YOLO模型的INT8版本，并评估精度与延迟
+"""
+
+import glob
+import os
+import time
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from app.config import Config
+from app.models.backends import TASKS, read_model_imgsz, resolve_backend_weights
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("model")
+
+
+def list_images(image_dir: str) -> List[str]:
+    """递归列出目录下允许格式的图像"""
+    paths = []
+    for ext in Config.ALLOWED_EXTENSIONS:
+        paths.extend(
+            glob.glob(os.path.join(image_dir, "**", f"*.{ext}"), recursive=True)
+        )
+    return sorted(paths)
+
+
+def preprocess_for_calibration(image, imgsz: int, model_type: str):
+    """
+    将BGR图像转换为模型输入张量（1x3xHxW，float32，0~1）
+
+    与ultralytics推理预处理保持一致：
+    分类模型缩放短边后中心裁剪，检测模型等比缩放后灰边填充
+    """
+    h, w = image.shape[:2]
+    if model_type == "grow":
+        scale = imgsz / min(h, w)
+        resized = cv2.resize(image, (round(w * scale), round(h * scale)))
+        rh, rw = resized.shape[:2]
+        top, left = (rh - imgsz) // 2, (rw - imgsz) // 2
+        image = resized[top : top + imgsz, left : left + imgsz]
+    else:
+        scale = imgsz / max(h, w)
+        resized = cv2.resize(image, (round(w * scale), round(h * scale)))
+        rh, rw = resized.shape[:2]
+        top, left = (imgsz - rh) // 2, (imgsz - rw) // 2
+        image = cv2.copyMakeBorder(
+            resized,
+            top,
+            imgsz - rh - top,
+            left,
+            imgsz - rw - left,
+            cv2.BORDER_CONSTANT,
+            value=(114, 114, 114),
+        )
+
+    tensor = image[:, :, ::-1].transpose(2, 0, 1)  # BGR->RGB, HWC->CHW
+    return np.ascontiguousarray(tensor, dtype=np.float32)[None] / 255.0
+
+
+class CalibrationReader:
+    """ONNX Runtime校准数据读取器：逐张提供田间图像"""
+
+    def __init__(
+        self, image_paths: List[str], input_name: str, imgsz: int, model_type: str
+    ):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.model_type = model_type
+        self._paths = iter(image_paths)
+
+    def get_next(self):
+        for path in self._paths:
+            image = cv2.imread(path)
+            if image is not None:
+                return {
+                    self.input_name: preprocess_for_calibration(
+                        image, self.imgsz, self.model_type
+                    )
+                }
+        return None
+
+
+def quantize_model(
+    model_path: str,
+    model_type: str,
+    calib_dir: str,
+    output_path: str,
+    max_calib_images: int = 200,
+) -> str:
+    """
+    使用田间图像校准并生成INT8 ONNX模型
+
+    Args:
+        model_path: FP32 .pt权重路径
+        model_type: 模型类型（grow / disease）
+        calib_dir: 校准图像目录
+        output_path: INT8模型输出路径（.onnx）
+        max_calib_images: 最多使用的校准图像数
+
+    Returns:
+        str: INT8模型路径
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    calib_images = list_images(calib_dir)[:max_calib_images]
+    if not calib_images:
+        raise ValueError(f"校准图像目录为空: {calib_dir}")
+
+    imgsz = read_model_imgsz(model_path) or 640
+    imgsz = imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz
+    fp32_path = resolve_backend_weights(model_path, "onnx")
+    fp32_model = onnx.load(fp32_path)
+    input_name = fp32_model.graph.input[0].name
+
+    logger.info(
+        "使用 %s 张图像校准: %s -> %s", len(calib_images), fp32_path, output_path
+    )
+    quantize_static(
+        fp32_path,
+        output_path,
+        CalibrationReader(calib_images, input_name, imgsz, model_type),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+
+    # 复制ultralytics元数据（类别名、输入尺寸、任务类型），使其可被YOLO()直接加载
+    int8_model = onnx.load(output_path)
+    del int8_model.metadata_props[:]
+    for prop in fp32_model.metadata_props:
+        int8_model.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(int8_model, output_path)
+
+    return output_path
+
+
+def _label_from_path(image_path: str, names: Dict[int, str]):
+    """以图像所在子目录名作为真实类别（目录名不是类别名时返回None）"""
+    folder = os.path.basename(os.path.dirname(image_path))
+    return folder if folder in names.values() else None
+
+
+def _prediction(result, model_type: str):
+    if model_type == "grow":
+        return result.names[int(result.probs.top1)]
+    return tuple(sorted({result.names[int(c)] for c in result.boxes.cls.tolist()}))
+
+
+def compare_models(
+    reference_path: str,
+    candidate_path: str,
+    model_type: str,
+    image_paths: List[str],
+    imgsz=None,
+) -> Dict[str, Any]:
+    """
+    在留出集上比较两个模型的精度与延迟
+
+    若图像按类别名分子目录存放，则同时统计相对真实标签的准确率（仅分类模型）；
+    否则只统计候选模型与参照模型的一致率。
+
+    Returns:
+        精度与延迟对比报告
+    """
+    task = TASKS[model_type]
+    predict_kwargs = {"imgsz": imgsz} if imgsz else {}
+    report: Dict[str, Any] = {"images": len(image_paths)}
+    predictions = {}
+
+    for label, path in (("fp32", reference_path), ("int8", candidate_path)):
+        model = YOLO(path, task=task)
+        model(image_paths[0], save=False, verbose=False, **predict_kwargs)  # 预热
+
+        preds, latencies, correct, labeled = [], [], 0, 0
+        for image_path in image_paths:
+            start = time.perf_counter()
+            result = model(image_path, save=False, verbose=False, **predict_kwargs)[0]
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+            pred = _prediction(result, model_type)
+            preds.append(pred)
+            truth = _label_from_path(image_path, result.names)
+            if model_type == "grow" and truth is not None:
+                labeled += 1
+                correct += pred == truth
+
+        latencies.sort()
+        predictions[label] = preds
+        report[label] = {
+            "model_path": path,
+            "mean_latency_ms": round(sum(latencies) / len(latencies), 2),
+            "p95_latency_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+            "accuracy": round(correct / labeled, 4) if labeled else None,
+        }
+
+    agree = sum(a == b for a, b in zip(predictions["fp32"], predictions["int8"]))
+    report["agreement"] = round(agree / len(image_paths), 4)
+    report["speedup"] = round(
+        report["fp32"]["mean_latency_ms"]
+        / max(report["int8"]["mean_latency_ms"], 1e-6),
+        2,
+    )
+    return report
@@ -0,0 +1,131 @@
+"""
+结果图像渲染池 - 在后台线程中绘制并编码标注结果图像，不阻塞预测请求
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from app.config import Config
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("model")
+
+
+class RenderPool:
+    """
+    有界的后台渲染线程池
+
+    按目标文件路径跟踪进行中的渲染任务，展示接口可以据此短暂等待。
+    排队任务达到上限时在调用线程中直接渲染，形成背压而不是丢弃结果。
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.submitted = 0
+        self.inline_renders = 0
+        self.failed = 0
+
+    @staticmethod
+    def _key(target_path: str) -> str:
+        return os.path.normpath(target_path)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建线程池（fork后的子进程中会重新创建）"""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="render"
+            )
+            self._inflight = {}
+            self._pid = pid
+        return self._executor
+
+    def submit(self, target_path: str, render_fn: Callable[[], Any]):
+        """
+        提交渲染任务
+
+        Args:
+            target_path: 结果图像的最终路径
+            render_fn: 执行绘制和写入的函数
+        """
+        key = self._key(target_path)
+        future = None
+
+        with self._lock:
+            executor = self._get_executor()
+            if len(self._inflight) < self.max_pending:
+                future = executor.submit(self._run, render_fn)
+                self._inflight[key] = future
+                self.submitted += 1
+            else:
+                self.inline_renders += 1
+
+        if future is None:
+            self._run(render_fn)
+            return
+
+        future.add_done_callback(lambda f: self._discard(key, f))
+
+    def _run(self, render_fn: Callable[[], Any]):
+        try:
+            return render_fn()
+        except Exception as e:
+            self.failed += 1
+            logger.error("渲染结果图像失败: %s", e)
+
+    def _discard(self, key: str, future: Future):
+        with self._lock:
+            # 同名文件可能已被更新的任务覆盖，只移除自己
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def is_pending(self, target_path: str) -> bool:
+        """指定结果图像是否仍在渲染中"""
+        return self._key(target_path) in self._inflight
+
+    def wait(self, target_path: str, timeout: float = None) -> bool:
+        """
+        等待指定结果图像渲染完成
+
+        Returns:
+            bool: 没有进行中的任务或已完成返回True，超时仍在渲染返回False
+        """
+        future = self._inflight.get(self._key(target_path))
+        if future is None:
+            return True
+
+        try:
+            future.result(timeout)
+        except FutureTimeoutError:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取渲染池统计信息"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": len(self._inflight),
+            "submitted": self.submitted,
+            "inline_renders": self.inline_renders,
+            "failed": self.failed,
+        }
+
+
+# 全局渲染池实例
+render_pool = RenderPool(
+    max_workers=Config.RENDER_WORKERS, max_pending=Config.RENDER_MAX_PENDING
+)
@@ -0,0 +1,214 @@
+"""
+预测结果缓存 - 以图像内容哈希和模型标识为键的两级缓存
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.file_utils import ensure_directory_exists
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("cache")
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """计算字节内容的SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PredictionCache:
+    """
+    预测结果缓存
+
+    - 内存层：有界LRU
+    - 磁盘层：可选，按键哈希分目录存放JSON
+    - 条目超过TTL后失效
+    - 模型权重文件变化时自动失效（模型标识是键的一部分）
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        disk_dir: Optional[str] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._identities: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.RLock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if self.disk_dir:
+            ensure_directory_exists(self.disk_dir)
+
+    # ============ 模型标识 ============
+
+    def get_model_identity(self, model_name: str, model_path: str) -> str:
+        """
+        获取模型标识（权重文件哈希）
+
+        只有在文件的mtime或大小变化时才重新计算哈希；
+        标识变化时清除该模型在内存层中的旧条目。
+        """
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            return f"{model_name}:missing"
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._identities.get(model_name)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        identity = f"{model_name}:{hash_file(model_path)[:16]}"
+        if cached and cached[1] != identity:
+            self.invalidate_model(model_name)
+            self._stat(model_name, "invalidations")
+        self._identities[model_name] = (signature, identity)
+        return identity
+
+    @staticmethod
+    def make_key(image_hash: str, model_identity: str) -> str:
+        """由图像哈希和模型标识生成缓存键"""
+        return hash_bytes(f"{model_identity}|{image_hash}".encode("utf-8"))
+
+    # ============ 读写 ============
+
+    def get(self, model_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，未命中或已过期返回None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, _, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._stat(model_name, "hits")
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self._stat(model_name, "expired")
+
+        value = self._disk_get(key, now)
+        if value is not None:
+            self._memory_put(model_name, key, value, now)
+            self._stat(model_name, "disk_hits")
+            self._stat(model_name, "hits")
+            return copy.deepcopy(value)
+
+        self._stat(model_name, "misses")
+        return None
+
+    def put(self, model_name: str, key: str, value: Dict[str, Any]):
+        """写入缓存（错误结果不缓存）"""
+        if not value or "error" in value:
+            return
+
+        now = time.time()
+        value = copy.deepcopy(value)
+        self._memory_put(model_name, key, value, now)
+        self._disk_put(key, value, now)
+
+    def invalidate_model(self, model_name: str):
+        """清除指定模型在内存层中的全部条目"""
+        with self._lock:
+            stale = [k for k, v in self._entries.items() if v[1] == model_name]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """清空内存层"""
+        with self._lock:
+            self._entries.clear()
+
+    def _memory_put(self, model_name, key, value, now):
+        with self._lock:
+            self._entries[key] = (now, model_name, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted_model, _) = self._entries.popitem(last=False)
+                self._stat(evicted_model, "evictions")
+
+    # ============ 磁盘层 ============
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if now - record.get("created_at", 0) > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return record.get("value")
+
+    def _disk_put(self, key: str, value: Dict[str, Any], now: float):
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            ensure_directory_exists(os.path.dirname(path))
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": now, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("写入磁盘缓存失败: %s", e)
+
+    # ============ 统计 ============
+
+    def _stat(self, model_name: str, counter: str):
+        with self._lock:
+            stats = self._stats.setdefault(model_name, {})
+            stats[counter] = stats.get(counter, 0) + 1
+
+    def get_stats(self, model_name: str) -> Dict[str, Any]:
+        """获取指定模型的缓存统计"""
+        stats = self._stats.get(model_name, {})
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "disk_hits": stats.get("disk_hits", 0),
+            "evictions": stats.get("evictions", 0),
+            "expired": stats.get("expired", 0),
+            "invalidations": stats.get("invalidations", 0),
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
@@ -3,35 +3,68 @@ YOLO模型实现
 """
 
 import os
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
+import numpy as np
 from ultralytics import YOLO
 
 from app.config import Config
+from app.models.backends import TASKS, read_model_imgsz, resolve_backend_weights
 from app.models.base_model import ImageClassificationModel
-from app.utils.file_utils import get_file_extension_as_jpg, move_file
+from app.models.render_pool import render_pool
+from app.models.result_cache import hash_file
+from app.utils.file_utils import get_result_filename
+from app.utils.image_ingest import source_filename
+from app.utils.image_utils import encode_image, read_image
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import inference_stage_duration, result_save_duration
+from app.utils.profiling import timed
+from app.utils.result_store import result_stores
+
+logger = get_logger("model")
 
 
 class YOLOModel(ImageClassificationModel):
     """YOLO模型实现类"""
 
-    def __init__(self, model_path: str, model_type: str):
+    def __init__(
+        self,
+        model_path: str,
+        model_type: str,
+        backend: str = "torch",
+        version: str = None,
+    ):
         super().__init__(model_path)
         self.model_type = model_type  # 'grow' or 'disease'
+        self.backend = backend  # 'torch' / 'onnx' / 'openvino'
+        self.version = version  # 模型版本（如 'int8'），默认模型为None
+        self.weights_path = model_path
+        self.imgsz = None  # 模型输入尺寸，加载时从.pt权重读取
+        self.weights_hash = None  # 加载时权重文件的哈希，用于区分热更新前后的版本
 
     def load_model(self) -> bool:
         """加载YOLO模型"""
         try:
             if not os.path.exists(self.model_path):
-                print(f"模型文件不存在: {self.model_path}")
+                logger.warning("模型文件不存在: %s", self.model_path)
                 return False
 
-            self.model = YOLO(self.model_path)
+            self.weights_hash = hash_file(self.model_path)[:16]
+            # 非torch后端首次使用时自动导出，产物缓存在权重文件旁
+            self.weights_path = resolve_backend_weights(self.model_path, self.backend)
+            self.model = YOLO(self.weights_path, task=TASKS[self.model_type])
+            if self.backend == "torch":
+                self.imgsz = self.model.model.args.get("imgsz")
+            else:
+                self.imgsz = read_model_imgsz(self.model_path)
             self.is_loaded = True
-            print(f"YOLO模型加载成功: {self.model_path}")
+            logger.info(
+                "YOLO模型加载成功: %s (backend=%s)", self.weights_path, self.backend
+            )
             return True
         except Exception as e:
-            print(f"YOLO模型加载失败: {e}")
+            logger.error("YOLO模型加载失败: %s", e)
             self.is_loaded = False
             return False
 
@@ -52,57 +85,215 @@ class YOLOModel(ImageClassificationModel):
         Returns:
             预测结果字典
         """
+        return self.predict_images([image_path], save_result)[0]
+
+    def predict_images(
+        self, image_paths: List[str], save_result: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        批量预测多张图像（一次前向推理）
+
+        Args:
+            image_paths: 图像文件路径列表
+            save_result: 是否保存预测结果
+
+        Returns:
+            与输入顺序一致的预测结果字典列表
+        """
         if not self.is_loaded:
             if not self.load_model():
-                return {"error": "模型加载失败"}
+                return [{"error": "模型加载失败"} for _ in image_paths]
 
-        if not os.path.exists(image_path):
-            return {"error": f"图像文件不存在: {image_path}"}
+        outputs: List[Dict[str, Any]] = [None] * len(image_paths)
+        valid_indices = []
+        for i, image_path in enumerate(image_paths):
+            if os.path.exists(image_path):
+                valid_indices.append(i)
+            else:
+                outputs[i] = {"error": f"图像文件不存在: {image_path}"}
+
+        if not valid_indices:
+            return outputs
+
+        if Config.INMEMORY_INFERENCE:
+            return self._predict_images_in_memory(
+                image_paths, valid_indices, outputs, save_result
+            )
 
+        # 执行批量预测（结果图像由结果存储直接写入，不使用ultralytics的save）
+        sources = [image_paths[i] for i in valid_indices]
         try:
-            # 执行预测
-            results = self.model(image_path, save=save_result)
-            result = results[0]
+            results = self._predict_sources(sources)
+        except Exception as e:
+            if len(sources) == 1:
+                logger.error("预测失败: %s", e)
+                outputs[valid_indices[0]] = {"error": f"预测失败: {str(e)}"}
+                return outputs
+            # 一张图像无法读取就会使整批失败（批中可能有其他请求的图像），逐张重试
+            logger.warning("批量预测失败，逐张重试: %s", e)
+            results = None
 
-            # 处理保存结果文件
-            if save_result:
-                self._save_prediction_result(image_path, result)
+        for n, i in enumerate(valid_indices):
+            try:
+                if results is None:
+                    [result] = self._predict_sources([image_paths[i]])
+                else:
+                    result = results[n]
 
-            # 根据模型类型返回不同的结果格式
-            if self.model_type == "grow":
-                return self._process_classification_result(result)
-            else:  # disease
-                return self._process_detection_result(result)
+                # 处理保存结果文件
+                if save_result:
+                    self._save_prediction_result(image_paths[i], result)
 
-        except Exception as e:
-            print(f"预测失败: {e}")
-            return {"error": f"预测失败: {str(e)}"}
+                outputs[i] = self._process_result(result)
+
+            except Exception as e:
+                logger.error("预测失败: %s", e)
+                outputs[i] = {"error": f"预测失败: {str(e)}"}
+
+        return outputs
+
+    def _predict_sources(self, sources: List[str]) -> List[Any]:
+        """对一组图像文件执行一次前向推理"""
+        with timed("inference"):
+            return self.model(
+                sources,
+                save=False,
+                batch=len(sources),
+                verbose=False,
+                **self._predict_kwargs(),
+            )
+
+    def _predict_images_in_memory(
+        self, image_paths, valid_indices, outputs, save_result
+    ) -> List[Dict[str, Any]]:
+        """内存推理：每张图像只读取解码一次，以数组形式送入模型"""
+        images, names, indices = [], [], []
+        for i in valid_indices:
+            image = read_image(image_paths[i], min_size=self.decode_min_size())
+            if image is None:
+                outputs[i] = {"error": f"图像解码失败: {image_paths[i]}"}
+                continue
+            images.append(image)
+            names.append(image_paths[i])  # 结果图像按result_filename命名
+            indices.append(i)
+
+        if images:
+            for i, result in zip(
+                indices, self.predict_arrays(images, names, save_result)
+            ):
+                outputs[i] = result
+
+        return outputs
+
+    def predict_arrays(
+        self, images: List[Any], image_names: List[str], save_result: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        直接对内存中的图像数组进行批量预测
+
+        Args:
+            images: BGR格式的numpy数组列表
+            image_names: 对应的原始文件名（用于命名结果图像）
+            save_result: 是否保存标注后的结果图像
+
+        Returns:
+            与输入顺序一致的预测结果字典列表
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                return [{"error": "模型加载失败"} for _ in images]
 
-    def _save_prediction_result(self, original_image_path: str, result):
-        """保存预测结果图像"""
         try:
-            # 获取原始文件名（不含扩展名）并添加.jpg
-            original_filename = os.path.basename(original_image_path)
-            result_filename = get_file_extension_as_jpg(original_filename)
+            # save=False：不触发ultralytics的保存逻辑，不创建runs/目录；
+            # verbose=False：不在请求线程中向stdout逐张打印结果
+            with timed("inference"):
+                results = self.model(
+                    images,
+                    save=False,
+                    batch=len(images),
+                    verbose=False,
+                    **self._predict_kwargs(),
+                )
 
-            # 构建源文件路径（YOLO保存的结果）
-            src_file = os.path.join(result.save_dir, result_filename)
+            outputs = []
+            for image_name, result in zip(image_names, results):
+                if save_result:
+                    self._save_prediction_result(image_name, result)
+                outputs.append(self._process_result(result))
+            return outputs
 
-            # 目标目录
-            target_dir = Config.PREDICT_OUTPUT_PATHS[self.model_type]
+        except Exception as e:
+            logger.error("预测失败: %s", e)
+            return [{"error": f"预测失败: {str(e)}"} for _ in images]
 
-            # 移动文件
-            if os.path.exists(src_file):
-                move_file(src_file, target_dir)
-            else:
-                print(f"预测结果文件不存在: {src_file}")
-                # 列出目录中的文件以便调试
-                if os.path.exists(result.save_dir):
-                    files = os.listdir(result.save_dir)
-                    print(f"结果目录中的文件: {files}")
+    def decode_min_size(self):
+        """
+        解码所需的最小短边：不小于模型输入尺寸即可（允许JPEG缩小解码）
+
+        未知输入尺寸时返回None（完整解码）
+        """
+        if not self.imgsz:
+            return None
+        if isinstance(self.imgsz, (list, tuple)):
+            return max(self.imgsz)
+        return self.imgsz
+
+    def _predict_kwargs(self) -> Dict[str, Any]:
+        """推理参数：显式指定输入尺寸，保证各后端预处理一致"""
+        return {"imgsz": self.imgsz} if self.imgsz else {}
+
+    def result_filename(self, image_name: str) -> str:
+        """结果图像文件名：按上传文件名命名（从工作副本预测时同样如此），带模型版本后缀"""
+        return get_result_filename(source_filename(image_name), self.version)
+
+    def get_result_path(self, image_name: str) -> str:
+        """获取指定图像的预测结果图像路径"""
+        return result_stores[self.model_type].path_for(self.result_filename(image_name))
+
+    def has_result(self, image_name: str) -> bool:
+        """结果图像是否已存在（或正在后台渲染）"""
+        return result_stores[self.model_type].exists(
+            self.result_filename(image_name)
+        ) or render_pool.is_pending(self.get_result_path(image_name))
+
+    def _save_prediction_result(self, original_image_path: str, result):
+        """保存预测结果图像 - 经由结果存储直接原子写入预测结果目录"""
+        store = result_stores[self.model_type]
+        result_filename = self.result_filename(original_image_path)
 
+        def render(mode):
+            with result_save_duration.time(f"yolo_{self.model_type}", mode):
+                with timed("render"):
+                    annotated = result.plot()
+                store.write_bytes(result_filename, encode_image(annotated))
+
+        if Config.RENDER_ASYNC:
+            # 绘制和编码交给后台渲染池，预测结果立即返回
+            render_pool.submit(store.path_for(result_filename), lambda: render("async"))
+            return
+
+        try:
+            render("sync")
         except Exception as e:
-            print(f"保存预测结果失败: {e}")
+            logger.error("保存预测结果失败: %s", e)
+
+    def _process_result(self, result) -> Dict[str, Any]:
+        """根据模型类型返回不同的结果格式"""
+        self._record_speed(result)
+        with timed("postprocess"):
+            if self.model_type == "grow":
+                return self._process_classification_result(result)
+            else:  # disease
+                return self._process_detection_result(result)
+
+    def _record_speed(self, result):
+        """把ultralytics计算的各阶段耗时（毫秒）计入指标"""
+        model = f"yolo_{self.model_type}"
+        for stage, ms in (getattr(result, "speed", None) or {}).items():
+            if ms is not None:
+                inference_stage_duration.observe(
+                    ms / 1000.0, model, self.backend, stage
+                )
 
     def _process_classification_result(self, result) -> Dict[str, Any]:
         """处理分类结果（生长期预测）- 与原始格式完全一致"""
@@ -118,7 +309,7 @@ class YOLOModel(ImageClassificationModel):
                 "result": names[max_prob_index],
             }
         except Exception as e:
-            print(f"处理分类结果失败: {e}")
+            logger.error("处理分类结果失败: %s", e)
             return {"error": f"处理分类结果失败: {str(e)}"}
 
     def _process_detection_result(self, result) -> Dict[str, Any]:
@@ -137,14 +328,74 @@ class YOLOModel(ImageClassificationModel):
             # 返回检测到的名称和速度
             return {"names": detected_names, "speed": result.speed}
         except Exception as e:
-            print(f"处理检测结果失败: {e}")
+            logger.error("处理检测结果失败: %s", e)
             return {"error": f"处理检测结果失败: {str(e)}"}
 
+    def warmup(self, image_size=None, batch_size: int = 1) -> float:
+        """
+        使用合成图像执行一次推理，完成首次调用的初始化开销
+
+        Args:
+            image_size: 合成图像尺寸，int或(h, w)，默认使用模型输入尺寸
+            batch_size: 批大小
+
+        Returns:
+            float: 推理耗时（秒）
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                raise RuntimeError(f"模型加载失败: {self.model_path}")
+
+        image_size = image_size or self.imgsz or 640
+        if isinstance(image_size, (list, tuple)):
+            height, width = image_size
+        else:
+            height = width = image_size
+
+        images = [
+            np.zeros((height, width, 3), dtype=np.uint8) for _ in range(batch_size)
+        ]
+        start = time.perf_counter()
+        self.model(
+            images,
+            save=False,
+            batch=batch_size,
+            verbose=False,
+            **self._predict_kwargs(),
+        )
+        return time.perf_counter() - start
+
+    def memory_footprint(self) -> int:
+        """
+        模型权重占用的内存（字节）
+
+        torch后端统计参数和缓冲区大小；导出后端以权重文件大小近似
+        """
+        if not self.is_loaded:
+            return 0
+
+        if self.backend == "torch":
+            module = self.model.model
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+
+        if os.path.isdir(self.weights_path):
+            return sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, files in os.walk(self.weights_path)
+                for name in files
+            )
+        return os.path.getsize(self.weights_path)
+
     def get_model_info(self) -> Dict[str, Any]:
         """获取模型信息"""
         return {
             "model_type": "YOLO",
             "model_path": self.model_path,
+            "backend": self.backend,
+            "weights_path": self.weights_path,
+            "weights_hash": self.weights_hash,
+            "imgsz": self.imgsz,
             "task_type": self.model_type,
             "is_loaded": self.is_loaded,
         }
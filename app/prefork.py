@@ -0,0 +1,269 @@
+"""
+预fork多进程服务 - 主进程加载并预热模型后fork多个工作进程，
+工作进程以写时复制方式共享模型权重内存
+"""
+
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+from app.config import Config
+from app.utils.logging_utils import get_logger, shutdown_logging
+
+logger = get_logger("server")
+
+
+class InflightTracker:
+    """WSGI中间件：统计正在处理的请求数，用于优雅退出时排空请求"""
+
+    def __init__(self, app):
+        self.app = app
+        self._count = 0
+        self._cond = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._cond:
+            self._count += 1
+        try:
+            app_iter = self.app(environ, start_response)
+        except Exception:
+            self._release()
+            raise
+        # 响应体（包括流式响应）发送完毕、被关闭时才算请求结束
+        return ClosingIterator(app_iter, [self._release])
+
+    def _release(self):
+        with self._cond:
+            self._count -= 1
+            if self._count <= 0:
+                self._cond.notify_all()
+
+    @property
+    def inflight(self) -> int:
+        """正在处理的请求数"""
+        return self._count
+
+    def wait_idle(self, timeout: float) -> bool:
+        """等待所有请求完成，超时返回False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._count <= 0, timeout)
+
+
+def configure_worker_threads(workers: int):
+    """限制每个工作进程的PyTorch线程数，避免多进程争抢CPU"""
+    threads = Config.TORCH_THREADS_PER_WORKER
+    if not threads:
+        threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except Exception as e:
+        logger.warning("设置PyTorch线程数失败: %s", e)
+
+
+def prepare_master():
+    """
+    在主进程中预热已加载的模型并冻结GC
+
+    gc.freeze()把当前所有对象移入永久代，子进程的GC不再扫描（写入）它们，
+    模型权重所在的内存页因此能一直保持写时复制共享。
+    """
+    from app.models.model_manager import model_manager
+
+    # create_app可能已在后台开始预热，fork前必须等其结束
+    if model_manager.warmup_state["status"] == "running":
+        model_manager.wait_for_warmup()
+    elif not model_manager.is_warmed_up():
+        model_manager.start_warmup(background=False)
+
+    gc.collect()
+    gc.freeze()
+
+
+class PreforkServer:
+    """
+    预fork服务器
+
+    - 主进程绑定监听端口，fork出N个工作进程共享同一监听套接字
+    - 工作进程异常退出时自动补齐
+    - SIGHUP：逐个滚动重启工作进程（旧进程排空后退出）
+    - SIGTERM/SIGINT：通知所有工作进程排空请求后退出，超时强制结束
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str,
+        port: int,
+        workers: int = None,
+        graceful_timeout: float = 30,
+        backlog: int = 2048,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+
+        self.sock = None
+        self._active = set()
+        self._retiring = set()
+        self._running = False
+        self._reload_requested = False
+
+    # ============ 主进程 ============
+
+    def run(self):
+        """启动主进程循环"""
+        prepare_master()
+        self.sock = self._bind()
+        self._running = True
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        logger.info(
+            "预fork服务启动: http://%s:%s workers=%s master_pid=%s",
+            self.host,
+            self.port,
+            self.workers,
+            os.getpid(),
+        )
+
+        try:
+            while self._running:
+                self._reap_workers()
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._rolling_restart()
+                while len(self._active) < self.workers and self._running:
+                    self._spawn_worker()
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        # 所有工作进程都会被同一个新连接唤醒，只有一个能accept成功；非阻塞时其余进程
+        # 的accept立即失败并回到serve_forever循环，不会阻塞在accept中错过SIGTERM
+        sock.setblocking(False)
+        sock.set_inheritable(True)
+        return sock
+
+    def _handle_stop(self, signum, frame):
+        self._running = False
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _spawn_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                exit_code = self._worker_main()
+            except Exception as e:
+                logger.error("工作进程异常退出: %s", e)
+            finally:
+                # os._exit不执行atexit，先写出队列中剩余的日志
+                shutdown_logging()
+                os._exit(exit_code)
+
+        self._active.add(pid)
+        logger.info("工作进程已启动: pid=%s", pid)
+
+    def _reap_workers(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            if pid in self._active:
+                self._active.discard(pid)
+                if self._running:
+                    logger.warning("工作进程意外退出: pid=%s", pid)
+            self._retiring.discard(pid)
+
+    def _rolling_restart(self):
+        """逐个替换工作进程：先启动新进程，再让旧进程排空退出"""
+        logger.info("收到SIGHUP，滚动重启工作进程")
+        for pid in list(self._active):
+            self._spawn_worker()
+            self._active.discard(pid)
+            self._retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+
+    def _shutdown(self):
+        logger.info("正在停止服务，等待工作进程排空请求...")
+        pids = self._active | self._retiring
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while pids and time.monotonic() < deadline:
+            self._reap_workers()
+            pids = self._active | self._retiring
+            time.sleep(0.1)
+
+        for pid in pids:
+            logger.warning("工作进程未能及时退出，强制结束: pid=%s", pid)
+            self._signal(pid, signal.SIGKILL)
+
+        if self.sock is not None:
+            self.sock.close()
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # ============ 工作进程 ============
+
+    def _worker_main(self) -> int:
+        """工作进程入口：处理请求，收到SIGTERM后停止接收新连接并排空"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        configure_worker_threads(self.workers)
+
+        tracker = InflightTracker(self.app)
+        server = make_server(
+            self.host, self.port, tracker, threaded=True, fd=self.sock.fileno()
+        )
+        stopping = threading.Event()
+
+        def handle_term(signum, frame):
+            if not stopping.is_set():
+                stopping.set()
+                # shutdown()会等待serve_forever退出，不能在主线程中直接调用
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, handle_term)
+
+        server.serve_forever()
+
+        drained = tracker.wait_idle(self.graceful_timeout)
+        if not drained:
+            logger.warning(
+                "工作进程 %s 排空超时，剩余请求数: %s", os.getpid(), tracker.inflight
+            )
+        server.server_close()
+        return 0 if drained else 1
@@ -2,109 +2,277 @@
 图像处理服务 - 处理图像上传和展示
 """
 
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from flask import Response
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
 
 from app.config import Config
-from app.utils.file_utils import secure_save_file
+from app.models.render_pool import render_pool
+from app.utils.derived_images import derived_images, negotiate_format, supported_formats
+from app.utils.file_utils import allowed_file, get_result_filename
+from app.utils.image_ingest import (
+    IngestError,
+    find_working_copy,
+    prepare_upload,
+    source_image_path,
+    store_upload,
+)
+from app.utils.logging_utils import get_logger
+from app.utils.profiling import bind_timings, current_timings
+from app.utils.result_store import result_stores
+from app.utils.static_files import send_image
 from app.utils.response_utils import (
     method_error_response,
     upload_error_response,
     upload_success_response,
 )
 
+logger = get_logger("image")
+
+_persist_lock = threading.Lock()
+_persist_executor = None
+_persist_pid = None
+
+
+def _get_persist_executor() -> ThreadPoolExecutor:
+    """按需创建上传落盘线程池（fork后的子进程中会重新创建）"""
+    global _persist_executor, _persist_pid
+    with _persist_lock:
+        if _persist_executor is None or _persist_pid != os.getpid():
+            _persist_executor = ThreadPoolExecutor(
+                max_workers=Config.UPLOAD_PERSIST_WORKERS,
+                thread_name_prefix="upload",
+            )
+            _persist_pid = os.getpid()
+        return _persist_executor
+
 
 class ImageService:
     """图像处理服务类"""
 
     @staticmethod
-    def upload_grow_image(request):
-        """上传生长期图像 - 保持与原始API完全一致"""
-        if request.method == "POST":
-            file = request.files["file"]
-            filename = secure_save_file(file, Config.IMAGE_UPLOAD_PATHS["grow"])
+    def read_upload(request):
+        """
+        读取上传文件到内存
+
+        Returns:
+            (安全文件名, 文件字节)，没有文件或格式不允许时返回 (None, None)
+        """
+        file = request.files.get("file")
+        if not file or not allowed_file(file.filename):
+            return None, None
+        return secure_filename(file.filename), file.read()
+
+    @staticmethod
+    def save_upload_async(data, working_image, filename, image_type) -> Future:
+        """
+        在后台线程中保存上传的原图和工作副本，与推理并行
 
-            if filename:
-                return upload_success_response(filename)
-            else:
-                return upload_error_response()
+        Returns:
+            Future，结果为保存的文件名，失败为None
+        """
+        return _get_persist_executor().submit(
+            ImageService._persist_upload,
+            data,
+            working_image,
+            filename,
+            image_type,
+            current_timings(),
+        )
 
-        return method_error_response()
+    @staticmethod
+    def _persist_upload(data, working_image, filename, image_type, timings=None):
+        # 请求等待保存完成才返回，被剖析时保存耗时同样计入该请求
+        with bind_timings([timings]):
+            saved = store_upload(data, working_image, filename, image_type)
+            if saved:
+                ImageService._pregenerate_thumbnails(
+                    source_image_path(image_type, saved)
+                )
+        return saved
+
+    @staticmethod
+    def pregenerate_thumbnails_async(image_path):
+        """在后台线程中预生成常用尺寸的缩略图"""
+        if Config.THUMBNAIL_PREGENERATE_WIDTHS:
+            _get_persist_executor().submit(
+                ImageService._pregenerate_thumbnails, image_path
+            )
+
+    @staticmethod
+    def _pregenerate_thumbnails(image_path):
+        formats = [
+            f for f in Config.THUMBNAIL_PREGENERATE_FORMATS if f in supported_formats()
+        ]
+        try:
+            for width in Config.THUMBNAIL_PREGENERATE_WIDTHS:
+                for fmt in formats:
+                    derived_images.get(image_path, width=width, fmt=fmt)
+        except Exception as e:
+            logger.warning("预生成缩略图失败: %s", e)
+
+    @staticmethod
+    def upload_grow_image(request):
+        """上传生长期图像 - 保持与原始API完全一致"""
+        return ImageService._ingest_upload(request, "grow")
 
     @staticmethod
     def upload_disease_image(request):
         """上传病害图像 - 保持与原始API完全一致"""
-        if request.method == "POST":
-            file = request.files["file"]
-            filename = secure_save_file(file, Config.IMAGE_UPLOAD_PATHS["disease"])
+        return ImageService._ingest_upload(request, "disease")
+
+    @staticmethod
+    def _ingest_upload(request, image_type):
+        """
+        校验上传图像（文件头）、摆正方向，保存原图和供预测使用的工作副本
+        """
+        if request.method != "POST":
+            return method_error_response()
+
+        filename, data = ImageService.read_upload(request)
+        if not filename:
+            return upload_error_response()
 
-            if filename:
-                return upload_success_response(filename)
-            else:
-                return upload_error_response()
+        try:
+            working_image = prepare_upload(data)
+        except IngestError as e:
+            return upload_error_response(str(e))
+
+        saved = store_upload(data, working_image, filename, image_type)
+        if not saved:
+            return upload_error_response("文件保存失败")
 
-        return method_error_response()
+        ImageService.pregenerate_thumbnails_async(source_image_path(image_type, saved))
+        return upload_success_response(saved)
 
     @staticmethod
-    def show_grow_image(image_id):
+    def show_grow_image(image_id, request):
         """显示生长期图像 - 保持与原始API完全一致"""
-        try:
-            # 保持与原始代码完全一致的路径格式
-            image_path = f"paddy-server/static/image/grow/{image_id}"
-            with open(image_path, "rb") as f:
-                image = f.read()
-                return Response(image, mimetype="image/jpg")
-        except Exception as e:
-            print(f"显示生长期图像失败: {e}")
-            return Response("Image not found", status=404)
+        image_path = ImageService._upload_image_path("grow", image_id)
+        return ImageService._send_image(image_path, request, "显示生长期图像失败")
 
     @staticmethod
-    def show_disease_image(image_id):
+    def show_disease_image(image_id, request):
         """显示病害图像 - 保持与原始API完全一致"""
-        try:
-            # 保持与原始代码完全一致的路径格式
-            image_path = f"paddy-server/static/image/disease/{image_id}"
-            with open(image_path, "rb") as f:
-                image = f.read()
-                return Response(image, mimetype="image/jpg")
-        except Exception as e:
-            print(f"显示病害图像失败: {e}")
-            return Response("Image not found", status=404)
+        image_path = ImageService._upload_image_path("disease", image_id)
+        return ImageService._send_image(image_path, request, "显示病害图像失败")
 
     @staticmethod
-    def show_predict_grow_image(image_id):
+    def _upload_image_path(image_type, image_id):
+        """上传图像路径，未保留原图时使用工作副本"""
+        image_path = safe_join(Config.IMAGE_UPLOAD_PATHS[image_type], image_id)
+        if image_path and not os.path.exists(image_path):
+            return find_working_copy(image_type, image_id) or image_path
+        return image_path
+
+    @staticmethod
+    def show_predict_grow_image(image_id, request):
         """显示预测后的生长期图像 - 保持与原始API完全一致"""
-        try:
-            # 保持与原始代码完全一致的路径格式
-            image_path = f"paddy-server/static/predict_image/grow/{image_id}"
-            with open(image_path, "rb") as f:
-                image = f.read()
-                return Response(image, mimetype="image/jpg")
-        except Exception as e:
-            print(f"显示预测生长期图像失败: {e}")
-            return Response("Image not found", status=404)
+        # 结果图像经由结果存储定位（兼容旧版直接存放在根目录的文件）
+        store = result_stores["grow"]
+        image_id = ImageService._result_image_id(image_id, request)
+        pending = ImageService._wait_for_render(store.path_for(image_id))
+        if pending is not None:
+            return pending
+        return ImageService._send_image(
+            store.resolve(image_id),
+            request,
+            "显示预测生长期图像失败",
+            max_age=Config.PREDICT_IMAGE_MAX_AGE,
+        )
 
     @staticmethod
-    def show_predict_disease_image(image_id):
+    def show_predict_disease_image(image_id, request):
         """显示预测后的病害图像 - 保持与原始API完全一致"""
+        # 结果图像经由结果存储定位（兼容旧版直接存放在根目录的文件）
+        store = result_stores["disease"]
+        image_id = ImageService._result_image_id(image_id, request)
+        pending = ImageService._wait_for_render(store.path_for(image_id))
+        if pending is not None:
+            return pending
+        return ImageService._send_image(
+            store.resolve(image_id),
+            request,
+            "显示预测病害图像失败",
+            max_age=Config.PREDICT_IMAGE_MAX_AGE,
+        )
+
+    @staticmethod
+    def _result_image_id(image_id, request):
+        """?modelversion=int8 时查找该模型版本的结果图像（a.jpg -> a@int8.jpg）"""
+        version = request.args.get("modelversion")
+        if not version:
+            return image_id
+        return get_result_filename(image_id, version)
+
+    @staticmethod
+    def _send_image(image_path, request, error_message, max_age=None):
+        """
+        发送图像文件（零拷贝、条件请求、Range），不存在时返回404
+
+        支持 ?w=/?h= 等比缩小，以及按Accept头转码为WebP/AVIF，派生图像缓存在磁盘上
+        """
+        try:
+            width, height = ImageService._parse_size(request)
+        except ValueError as e:
+            return Response(str(e), status=400)
+
         try:
-            # 保持与原始代码完全一致的路径格式
-            image_path = f"paddy-server/static/predict_image/disease/{image_id}"
-            with open(image_path, "rb") as f:
-                image = f.read()
-                return Response(image, mimetype="image/jpg")
+            fmt = negotiate_format(request.accept_mimetypes, default=None)
+            if image_path and (width or height or fmt):
+                image_path = derived_images.get(
+                    image_path, width=width, height=height, fmt=fmt or "jpeg"
+                )
+
+            response = send_image(image_path, max_age=max_age)
+            if response is not None:
+                # 同一URL的返回格式取决于Accept头
+                response.vary.add("Accept")
+                return response
+            logger.warning("%s: 文件不存在 %s", error_message, image_path)
         except Exception as e:
-            print(f"显示预测病害图像失败: {e}")
-            return Response("Image not found", status=404)
+            logger.error("%s: %s", error_message, e)
+        return Response("Image not found", status=404)
+
+    @staticmethod
+    def _parse_size(request):
+        """解析 ?w=/?h= 参数，返回 (宽, 高)，未指定的为None"""
+        size = []
+        for key in ("w", "h"):
+            value = request.args.get(key)
+            if value is None:
+                size.append(None)
+                continue
+            if (
+                not value.isdigit()
+                or not 0 < int(value) <= Config.DERIVED_IMAGE_MAX_DIMENSION
+            ):
+                raise ValueError(
+                    f"参数{key}应为1~{Config.DERIVED_IMAGE_MAX_DIMENSION}之间的整数"
+                )
+            size.append(int(value))
+        return tuple(size)
+
+    @staticmethod
+    def _wait_for_render(image_path):
+        """
+        短暂等待进行中的结果图像渲染
+
+        Returns:
+            仍在渲染时返回202响应，否则返回None
+        """
+        if render_pool.wait(image_path, Config.RENDER_WAIT_TIMEOUT):
+            return None
+        return Response(
+            "Image rendering in progress", status=202, headers={"Retry-After": "1"}
+        )
 
     @staticmethod
-    def show_user_image(image_id):
+    def show_user_image(image_id, request):
         """显示用户头像 - 保持与原始API完全一致"""
-        try:
-            # 保持与原始代码完全一致的路径格式
-            image_path = f"paddy-server/static/userimg/{image_id}"
-            with open(image_path, "rb") as f:
-                image = f.read()
-                return Response(image, mimetype="image/jpg")
-        except Exception as e:
-            print(f"显示用户图像失败: {e}")
-            return Response("Image not found", status=404)
+        image_path = safe_join(Config.IMAGE_UPLOAD_PATHS["user"], image_id)
+        return ImageService._send_image(image_path, request, "显示用户图像失败")
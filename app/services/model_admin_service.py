@@ -0,0 +1,59 @@
+"""
+模型管理服务 - 模型热更新与回滚
+"""
+
+import hmac
+
+from flask import current_app
+
+from app.config import Config
+from app.models.model_manager import model_manager
+
+# 经代理转发的请求带有的请求头
+FORWARDED_HEADERS = ("X-Forwarded-For", "X-Real-IP", "Forwarded")
+
+
+class ModelAdminService:
+    """模型管理服务类"""
+
+    @staticmethod
+    def reload_model(request):
+        """从权重文件热更新模型，新版本加载并预热完成后才切换"""
+        return ModelAdminService._run(request, model_manager.reload_model)
+
+    @staticmethod
+    def rollback_model(request):
+        """回滚到上一版本模型"""
+        return ModelAdminService._run(request, model_manager.rollback_model)
+
+    @staticmethod
+    def _run(request, action):
+        if not ModelAdminService.is_authorized(request):
+            return {"error": "无权访问管理接口"}, 403
+
+        data = request.get_json(silent=True) or {}
+        model_name = data.get("model") or request.args.get("model")
+        if not model_name:
+            return {"error": "缺少参数: model"}, 400
+
+        record = action(model_name)
+        if "error" in record:
+            return record, 409
+        return record
+
+    @staticmethod
+    def is_authorized(request) -> bool:
+        """
+        配置了ADMIN_TOKEN时校验请求头
+
+        未配置时只在调试模式下允许本机直接访问：前置代理（nginx等）转发的请求
+        remote_addr同样是本机地址，带X-Forwarded-For等转发头的请求一律拒绝
+        """
+        if Config.ADMIN_TOKEN:
+            token = request.headers.get("X-Admin-Token", "")
+            return hmac.compare_digest(token, Config.ADMIN_TOKEN)
+        if not current_app.debug:
+            return False
+        if any(request.headers.get(name) for name in FORWARDED_HEADERS):
+            return False
+        return request.remote_addr in ("127.0.0.1", "::1")
@@ -4,13 +4,32 @@
 
 import os
 
+from flask import Response, stream_with_context
+
+from app.config import Config
+from app.models.admission import OverloadedError
 from app.models.model_manager import model_manager
+from app.models.result_cache import hash_bytes
+from app.services.image_service import ImageService
+from app.utils.image_ingest import IngestError, find_working_copy, prepare_upload
+from app.utils.logging_utils import get_logger, truncate
+from app.utils.metrics import prediction_requests
 from app.utils.response_utils import (
+    batch_prediction_line,
     file_not_found_response,
+    method_error_response,
     prediction_error_response,
     prediction_success_response,
+    service_unavailable_response,
+    upload_error_response,
 )
 
+logger = get_logger("prediction")
+request_logger = get_logger("request")
+
+# 模型类型 -> modelid（指标标签，modelid非"1"的请求都按病害检测处理）
+MODEL_IDS = {"grow": "1", "disease": "2"}
+
 
 class PredictionService:
     """预测服务类"""
@@ -21,12 +40,14 @@ class PredictionService:
         图像预测服务 - 保持与原始API完全一致的返回格式
         与Go服务 /PredictImage 接口对应
         """
-        # 打印请求信息（保持与原始代码一致）
-        print("--- Request Headers ---")
-        print(request.headers)
-        print("--- Request Data ---")
-        print(request.data)  # raw request body
-        print("--- End Request Info ---")
+        # 记录请求头和请求体（按采样比例记录，请求体截断到LOG_MAX_FIELD_CHARS）
+        request_logger.info(
+            "预测请求内容",
+            extra={
+                "headers": dict(request.headers),
+                "body": truncate(request.get_data(cache=True)),
+            },
+        )
 
         # 检查请求参数
         if request.args is None:
@@ -36,87 +57,291 @@ class PredictionService:
             get_data = request.get_json()
             pic_name = get_data.get("imageid")
             model_id = get_data.get("modelid")
+            # 可选的模型版本（如 "int8"），为空时使用默认模型
+            version = get_data.get("modelversion")
 
-            print(f"收到预测请求: imageid={pic_name}, modelid={model_id}")
+            logger.info(
+                "收到预测请求", extra={"imageid": pic_name, "modelid": model_id}
+            )
 
             if model_id == "1":
                 # 生长期预测
-                return PredictionService._predict_grow_image(pic_name)
+                return PredictionService._predict_grow_image(pic_name, version)
             else:
                 # 病害检测
-                return PredictionService._predict_disease_image(pic_name)
+                return PredictionService._predict_disease_image(pic_name, version)
 
         except Exception as e:
-            print(f"预测请求处理失败: {e}")
+            logger.error("预测请求处理失败: %s", e)
             return prediction_error_response(f"请求处理失败: {str(e)}")
 
     @staticmethod
-    def _predict_grow_image(pic_name):
+    def _predict_grow_image(pic_name, version=None):
         """生长期图像预测 - 保持与原始逻辑完全一致"""
         # 保持与原始代码完全一致的路径构建
-        pic_path = os.path.join("static/image/grow/", pic_name)
-        print(f"Constructed pic_path: {pic_path}")
+        pic_path = PredictionService._resolve_image_path(
+            "grow", pic_name, os.path.join("static/image/grow/", pic_name)
+        )
+        logger.debug("Constructed pic_path: %s", pic_path)
 
         if not os.path.exists(pic_path):
-            print(f"Error: File not found at {pic_path}")
+            logger.warning("File not found at %s", pic_path)
+            PredictionService._record_outcome("grow", "not_found")
             return file_not_found_response(pic_path)
 
         try:
             # 使用模型管理器进行预测
-            result = model_manager.predict_image("grow", pic_path, save_result=True)
+            result = model_manager.predict_image(
+                "grow", pic_path, save_result=True, version=version
+            )
 
             if "error" in result:
+                PredictionService._record_outcome("grow", "error")
                 return prediction_error_response(result["error"])
 
             # 返回与原始代码完全一致的格式
-            return_dict = {"data": result}
-            print(f"Returning to Go: {return_dict}")
+            logger.debug("Returning to Go", extra={"data": result})
+            PredictionService._record_outcome("grow", "ok")
             return prediction_success_response(result)
 
+        except OverloadedError as e:
+            logger.warning("生长期预测失败: %s", e)
+            PredictionService._record_outcome("grow", "overloaded")
+            return service_unavailable_response(str(e), e.retry_after)
         except Exception as e:
-            print(f"生长期预测失败: {e}")
+            logger.error("生长期预测失败: %s", e)
+            PredictionService._record_outcome("grow", "error")
             return prediction_error_response(f"预测失败: {str(e)}")
 
     @staticmethod
-    def _predict_disease_image(pic_name):
+    def _resolve_image_path(model_type, pic_name, pic_path):
+        """
+        优先使用上传pic_name时生成的工作分辨率副本（位于上传目录），
+        解码和预处理开销小得多；没有工作副本时使用pic_path
+        """
+        return find_working_copy(model_type, pic_name) or pic_path
+
+    @staticmethod
+    def _record_outcome(model_type, outcome):
+        """按modelid统计预测结果：ok / error / not_found / overloaded"""
+        prediction_requests.inc(MODEL_IDS[model_type], outcome)
+
+    @staticmethod
+    def _predict_disease_image(pic_name, version=None):
         """病害图像预测 - 保持与原始逻辑完全一致"""
         # 保持与原始代码完全一致的路径构建
-        pic_path = os.path.join("static/image/disease/", pic_name)
-        print(f"Constructed pic_path for disease: {pic_path}")
+        pic_path = PredictionService._resolve_image_path(
+            "disease", pic_name, os.path.join("static/image/disease/", pic_name)
+        )
+        logger.debug("Constructed pic_path for disease: %s", pic_path)
 
         if not os.path.exists(pic_path):
-            print(f"Error: File not found at {pic_path}")
+            logger.warning("File not found at %s", pic_path)
+            PredictionService._record_outcome("disease", "not_found")
             return file_not_found_response(pic_path)
 
         try:
             # 使用模型管理器进行预测
-            result = model_manager.predict_image("disease", pic_path, save_result=True)
+            result = model_manager.predict_image(
+                "disease", pic_path, save_result=True, version=version
+            )
 
             if "error" in result:
+                PredictionService._record_outcome("disease", "error")
                 return prediction_error_response(result["error"])
 
             # 返回与原始代码完全一致的格式
-            return_dict = {"data": result}
-            print(f"Returning to Go: {return_dict}")
+            logger.debug("Returning to Go", extra={"data": result})
+            PredictionService._record_outcome("disease", "ok")
             return prediction_success_response(result)
 
+        except OverloadedError as e:
+            logger.warning("病害预测失败: %s", e)
+            PredictionService._record_outcome("disease", "overloaded")
+            return service_unavailable_response(str(e), e.retry_after)
+        except Exception as e:
+            logger.error("病害预测失败: %s", e)
+            PredictionService._record_outcome("disease", "error")
+            return prediction_error_response(f"预测失败: {str(e)}")
+
+    @staticmethod
+    def predict_images(request):
+        """
+        批量图像预测服务 - 每张图像完成后立即输出一行JSON（NDJSON流）
+
+        请求：{"imageids": [...], "modelid": "1"/"2", "modelversion": 可选}
+        每行：{"imageid", "code", "data", "message"}，单张失败不影响其余图像
+        """
+        try:
+            get_data = request.get_json()
+            image_ids = get_data.get("imageids")
+            model_id = get_data.get("modelid")
+            version = get_data.get("modelversion")
+        except Exception as e:
+            logger.error("批量预测请求处理失败: %s", e)
+            return prediction_error_response(f"请求处理失败: {str(e)}")
+
+        if not isinstance(image_ids, list) or not image_ids:
+            return prediction_error_response("imageids不能为空", "5004")
+        if len(image_ids) > Config.BATCH_PREDICT_MAX_IMAGES:
+            return prediction_error_response(
+                f"单次最多预测{Config.BATCH_PREDICT_MAX_IMAGES}张图像", "5004"
+            )
+
+        # 与单张预测一致：modelid为"1"时生长期识别，否则病害检测
+        model_type = "grow" if model_id == "1" else "disease"
+        logger.info(
+            "收到批量预测请求", extra={"images": len(image_ids), "modelid": model_id}
+        )
+
+        return Response(
+            stream_with_context(
+                PredictionService._stream_predictions(model_type, image_ids, version)
+            ),
+            mimetype="application/x-ndjson",
+        )
+
+    @staticmethod
+    def _stream_predictions(model_type, image_ids, version=None):
+        """逐张产出NDJSON结果行：缺失的图像立即返回，其余送入批量推理"""
+        image_dir = f"static/image/{model_type}/"
+        paths, path_ids = [], []
+
+        for image_id in image_ids:
+            pic_path = PredictionService._resolve_image_path(
+                model_type, str(image_id), os.path.join(image_dir, str(image_id))
+            )
+            if not os.path.exists(pic_path):
+                PredictionService._record_outcome(model_type, "not_found")
+                yield batch_prediction_line(
+                    image_id, message=f"File not found at {pic_path}", code="500"
+                )
+                continue
+            paths.append(pic_path)
+            path_ids.append(image_id)
+
+        if not paths:
+            return
+
+        try:
+            for i, result in model_manager.predict_images(
+                model_type, paths, save_result=True, version=version
+            ):
+                if "error" not in result:
+                    PredictionService._record_outcome(model_type, "ok")
+                    yield batch_prediction_line(path_ids[i], result)
+                elif "retry_after" in result:
+                    PredictionService._record_outcome(model_type, "overloaded")
+                    yield batch_prediction_line(
+                        path_ids[i], message=result["error"], code="503"
+                    )
+                else:
+                    PredictionService._record_outcome(model_type, "error")
+                    yield batch_prediction_line(
+                        path_ids[i], message=result["error"], code="500"
+                    )
+        except Exception as e:
+            # 响应已开始发送，无法再返回错误状态码，以一行错误结束流
+            logger.error("批量预测失败: %s", e)
+            yield batch_prediction_line("", message=f"预测失败: {str(e)}", code="500")
+
+    @staticmethod
+    def upload_and_predict(request):
+        """
+        上传并预测 - 一次请求完成上传和预测
+
+        表单字段：file 图像文件，modelid "1"生长期识别/其他为病害检测，modelversion 可选
+        对内存中缩小到工作分辨率的图像推理，同时在后台保存原图和工作副本（与上传接口同一目录）
+        返回：data = {"filename": 保存的文件名, "prediction": 预测结果}
+        """
+        if request.method != "POST":
+            return method_error_response()
+
+        model_id = request.form.get("modelid")
+        version = request.form.get("modelversion")
+        model_type = "grow" if model_id == "1" else "disease"
+
+        filename, data = ImageService.read_upload(request)
+        if not filename:
+            return upload_error_response()
+
+        try:
+            # 校验文件头并缩小到工作分辨率，推理和保存都使用该副本
+            image = prepare_upload(data)
+        except IngestError as e:
+            return upload_error_response(str(e))
+
+        logger.info(
+            "收到上传预测请求", extra={"upload_filename": filename, "modelid": model_id}
+        )
+        saved = ImageService.save_upload_async(data, image, filename, model_type)
+
+        try:
+            result = model_manager.predict_array(
+                model_type,
+                image,
+                filename,
+                image_hash=hash_bytes(data),
+                save_result=True,
+                version=version,
+            )
+        except OverloadedError as e:
+            logger.warning("上传预测失败: %s", e)
+            PredictionService._record_outcome(model_type, "overloaded")
+            return service_unavailable_response(str(e), e.retry_after)
         except Exception as e:
-            print(f"病害预测失败: {e}")
+            logger.error("上传预测失败: %s", e)
+            PredictionService._record_outcome(model_type, "error")
             return prediction_error_response(f"预测失败: {str(e)}")
+        finally:
+            # 无论预测结果如何，原图都已上传，等待保存完成再返回
+            saved_name = saved.result()
+
+        if not saved_name:
+            return upload_error_response("文件保存失败")
+        if "error" in result:
+            PredictionService._record_outcome(model_type, "error")
+            return prediction_error_response(result["error"])
+
+        PredictionService._record_outcome(model_type, "ok")
+        return prediction_success_response(
+            {"filename": saved_name, "prediction": result}
+        )
 
     @staticmethod
     def predict_weather_lstm(request):
         """
-        LSTM天气预测服务 - 为未来扩展预留
+        LSTM天气预测服务
+
+        sequence_data 为单个序列（时间步×特征）或序列列表；为列表时各预测项
+        按序列排列，所有序列在一次（或分块的几次）前向推理中完成。
+        也可以只上传新观测，历史由服务端按地块保存：
+        plot_id + observations（单个地块），或 plots（地块ID -> 新观测）；
+        reset 为true时先清空这些地块的历史
         """
         try:
             get_data = request.get_json()
             sequence_data = get_data.get("sequence_data")
             prediction_days = get_data.get("prediction_days", 7)
-
-            result = model_manager.predict_weather(
-                sequence_data, prediction_days=prediction_days
-            )
+            plots = PredictionService._plot_observations(get_data)
+            if isinstance(plots, str):
+                return prediction_error_response(plots, "5004")
+
+            if plots is not None:
+                observations, resets, single = plots
+                result = model_manager.predict_plots(
+                    "lstm_weather",
+                    observations,
+                    resets,
+                    single,
+                    prediction_days=prediction_days,
+                )
+            elif sequence_data is None:
+                return prediction_error_response("缺少参数: sequence_data", "5004")
+            else:
+                result = model_manager.predict_weather(
+                    sequence_data, prediction_days=prediction_days
+                )
 
             if "error" in result:
                 return prediction_error_response(result["error"])
@@ -124,19 +349,30 @@ class PredictionService:
             return prediction_success_response(result, "LSTM天气预测完成")
 
         except Exception as e:
-            print(f"LSTM天气预测失败: {e}")
+            logger.error("LSTM天气预测失败: %s", e)
             return prediction_error_response(f"LSTM天气预测失败: {str(e)}")
 
     @staticmethod
     def predict_growth_lstm(request):
         """
-        LSTM生长预测服务 - 为未来扩展预留
+        LSTM生长预测服务 - sequence_data、plot_id、plots 格式同天气预测
         """
         try:
             get_data = request.get_json()
             sequence_data = get_data.get("sequence_data")
-
-            result = model_manager.predict_growth(sequence_data)
+            plots = PredictionService._plot_observations(get_data)
+            if isinstance(plots, str):
+                return prediction_error_response(plots, "5004")
+
+            if plots is not None:
+                observations, resets, single = plots
+                result = model_manager.predict_plots(
+                    "lstm_growth", observations, resets, single
+                )
+            elif sequence_data is None:
+                return prediction_error_response("缺少参数: sequence_data", "5004")
+            else:
+                result = model_manager.predict_growth(sequence_data)
 
             if "error" in result:
                 return prediction_error_response(result["error"])
@@ -144,5 +380,29 @@ class PredictionService:
             return prediction_success_response(result, "LSTM生长预测完成")
 
         except Exception as e:
-            print(f"LSTM生长预测失败: {e}")
+            logger.error("LSTM生长预测失败: %s", e)
             return prediction_error_response(f"LSTM生长预测失败: {str(e)}")
+
+    @staticmethod
+    def _plot_observations(data):
+        """
+        解析按地块预测的参数
+
+        Returns:
+            (地块ID -> 新观测, 需清空的地块ID, 是否单个地块)；
+            请求中没有plot_id/plots时返回None，参数错误时返回错误信息
+        """
+        if data.get("plots") is not None:
+            plots = data["plots"]
+            if not isinstance(plots, dict) or not plots:
+                return "plots 应为 地块ID -> 观测 的映射"
+            observations, single = plots, False
+        elif data.get("plot_id") is not None:
+            observations = {str(data["plot_id"]): data.get("observations")}
+            single = True
+        else:
+            return None
+
+        observations = {str(k): v for k, v in observations.items()}
+        resets = list(observations) if data.get("reset") is True else []
+        return observations, resets, single
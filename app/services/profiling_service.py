@@ -0,0 +1,40 @@
+"""
+性能剖析服务 - 查看和调整按比例自动剖析的设置
+"""
+
+from app.config import Config
+from app.services.model_admin_service import ModelAdminService
+from app.utils.profiling import profiler, settings
+
+
+class ProfilingService:
+    """性能剖析服务类"""
+
+    @staticmethod
+    def configure(request):
+        """
+        GET返回当前设置；POST {"sample_rate": 0.05} 调整自动剖析的请求比例
+
+        多进程部署时只作用于处理该请求的进程
+        """
+        if not ModelAdminService.is_authorized(request):
+            return {"error": "无权访问管理接口"}, 403
+
+        if request.method == "POST":
+            data = request.get_json(silent=True) or {}
+            try:
+                sample_rate = float(data.get("sample_rate"))
+            except (TypeError, ValueError):
+                return {"error": "缺少参数: sample_rate（0到1之间的小数）"}, 400
+            if not 0.0 <= sample_rate <= 1.0:
+                return {"error": "sample_rate 必须在0到1之间"}, 400
+            settings["sample_rate"] = sample_rate
+
+        return {
+            "enabled": Config.PROFILING_ENABLED,
+            "sample_rate": settings["sample_rate"],
+            "active_sessions": profiler.active_sessions(),
+            "max_sessions": profiler.max_sessions,
+            "interval_ms": profiler.interval * 1000.0,
+            "output_dir": Config.PROFILING_OUTPUT_DIR,
+        }
@@ -0,0 +1,211 @@
+"""
+派生图像缓存 - 缩略图和WebP/AVIF转码结果按源文件版本缓存在磁盘上，总大小有上限
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from app.config import Config
+from app.utils.file_utils import ensure_directory_exists, write_file_atomic
+from app.utils.image_utils import read_image
+
+# 派生格式 -> (扩展名, MIME类型, 编码参数)
+DERIVED_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", [cv2.IMWRITE_JPEG_QUALITY, 85]),
+    "webp": (".webp", "image/webp", [cv2.IMWRITE_WEBP_QUALITY, 80]),
+    "avif": (".avif", "image/avif", []),
+}
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def supported_formats():
+    """当前OpenCV构建能编码的派生格式"""
+    return [
+        name
+        for name, (ext, _, _) in DERIVED_FORMATS.items()
+        if cv2.haveImageWriter(ext)
+    ]
+
+
+def negotiate_format(accept_mimetypes, default="jpeg"):
+    """
+    根据Accept头选择输出格式：客户端明确声明支持时优先AVIF，其次WebP
+
+    只认显式列出的类型，*/* 不算（老客户端会声明 */* 但不一定能解码WebP）
+    """
+    accepted = {value for value, quality in accept_mimetypes if quality > 0}
+    available = supported_formats()
+    for name in ("avif", "webp"):
+        if DERIVED_FORMATS[name][1] in accepted and name in available:
+            return name
+    return default
+
+
+def resize_to_fit(image, width=None, height=None):
+    """等比缩放到不超过给定宽高（只缩小不放大）"""
+    h, w = image.shape[:2]
+    scale = 1.0
+    if width:
+        scale = min(scale, width / w)
+    if height:
+        scale = min(scale, height / h)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+class DerivedImageCache:
+    """
+    派生图像磁盘缓存
+
+    - 键为源文件路径、mtime、大小和派生参数，源文件被替换后自动生成新版本
+    - 文件按键哈希分目录存放，先写临时文件再重命名
+    - 总大小超过上限时按最近使用时间淘汰（命中时更新mtime，重启后顺序仍然有效）
+    - 多进程部署时各进程分别统计，总大小上限是近似值
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+
+        self._entries = None  # 路径 -> 大小，按最近使用排序，首次使用时扫描磁盘
+        self._total = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source_path, width=None, height=None, fmt="jpeg"):
+        """
+        获取派生图像路径，不存在时生成
+
+        Args:
+            source_path: 源图像路径
+            width: 最大宽度，None表示不限制
+            height: 最大高度，None表示不限制
+            fmt: 输出格式（jpeg / webp / avif）
+
+        Returns:
+            str: 派生图像路径，源图像不存在或无法解码时返回None
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+
+        path = self._path_for(source_path, stat, width, height, fmt)
+        if os.path.exists(path):
+            self._touch(path)
+            self.hits += 1
+            return path
+
+        image = read_image(source_path)
+        if image is None:
+            return None
+
+        ext, _, params = DERIVED_FORMATS[fmt]
+        ok, encoded = cv2.imencode(ext, resize_to_fit(image, width, height), params)
+        if not ok:
+            return None
+
+        self._write(path, encoded.tobytes())
+        self.misses += 1
+        return path
+
+    def _path_for(self, source_path, stat, width, height, fmt):
+        key = "|".join(
+            str(part)
+            for part in (
+                os.path.abspath(source_path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                width,
+                height,
+                fmt,
+            )
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(
+            self.cache_dir, digest[:2], digest + DERIVED_FORMATS[fmt][0]
+        )
+
+    def _write(self, path, data):
+        ensure_directory_exists(os.path.dirname(path))
+        write_file_atomic(path, data)
+
+        with self._lock:
+            self._load_index()
+            self._total += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._evict()
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._load_index()
+            if path in self._entries:
+                self._entries.move_to_end(path)
+
+    def _load_index(self):
+        """首次使用时扫描缓存目录，按mtime建立使用顺序"""
+        if self._entries is not None:
+            return
+
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+
+        files.sort()
+        self._entries = OrderedDict((path, size) for _, path, size in files)
+        self._total = sum(self._entries.values())
+
+    def _evict(self):
+        # 保留刚写入的条目，避免返回已被删除的文件
+        while len(self._entries) > 1 and self._total > self.max_bytes:
+            path, size = self._entries.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            self._load_index()
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._total / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# 全局派生图像缓存实例
+derived_images = DerivedImageCache(
+    Config.DERIVED_IMAGE_DIR, Config.DERIVED_IMAGE_MAX_MB * 1024 * 1024
+)
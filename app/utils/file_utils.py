@@ -4,10 +4,25 @@
 
 import os
 import shutil
+import tempfile
 
 from werkzeug.utils import secure_filename
 
 from app.config import Config
+from app.utils.logging_utils import get_logger
+from app.utils.profiling import timed
+
+logger = get_logger("file")
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# 进程的umask（导入时读取一次，os.umask在多线程中读取会短暂影响其他线程创建文件）
+_UMASK = _current_umask()
 
 
 def allowed_file(filename):
@@ -20,8 +35,30 @@ def allowed_file(filename):
 
 def ensure_directory_exists(directory_path):
     """确保目录存在，如果不存在则创建"""
-    if not os.path.exists(directory_path):
-        os.makedirs(directory_path)
+    os.makedirs(directory_path, exist_ok=True)
+
+
+def write_file_atomic(path, data, prefix=".tmp-"):
+    """
+    原子写入文件：在同一目录写临时文件后os.replace，读取方不会看到写了一半的文件
+
+    mkstemp创建的临时文件权限为0600，重命名前按umask改为与open()新建文件相同的权限，
+    以其他用户运行的前端代理（X-Accel-Redirect/X-Sendfile）才能读取
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=prefix, suffix=".part"
+    )
+    try:
+        os.fchmod(fd, 0o666 & ~_UMASK)
+        with timed("io"), os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def move_file(src_file, dst_path):
@@ -36,7 +73,7 @@ def move_file(src_file, dst_path):
         bool: 移动是否成功
     """
     if not os.path.isfile(src_file):
-        print(f"源文件不存在: {src_file}")
+        logger.warning("源文件不存在: %s", src_file)
         return False
 
     # 分离文件名和路径
@@ -48,11 +85,12 @@ def move_file(src_file, dst_path):
     try:
         # 移动文件
         dest_file = os.path.join(dst_path, fname)
-        shutil.move(src_file, dest_file)
-        print(f"文件移动成功: {src_file} -> {dest_file}")
+        with timed("io"):
+            shutil.move(src_file, dest_file)
+        logger.debug("文件移动成功: %s -> %s", src_file, dest_file)
         return True
     except Exception as e:
-        print(f"文件移动失败: {e}")
+        logger.error("文件移动失败: %s", e)
         return False
 
 
@@ -83,10 +121,33 @@ def secure_save_file(file, save_path, filename=None):
     try:
         # 保存文件
         full_path = os.path.join(save_path, filename)
-        file.save(full_path)
+        with timed("io"):
+            file.save(full_path)
+        return filename
+    except Exception as e:
+        logger.error("文件保存失败: %s", e)
+        return None
+
+
+def save_bytes(data, save_path, filename):
+    """
+    将字节内容原子地写入文件（先写临时文件再重命名，读取方不会看到半个文件）
+
+    Args:
+        data: 文件内容
+        save_path: 保存目录
+        filename: 文件名
+
+    Returns:
+        str: 保存的文件名，失败返回None
+    """
+    ensure_directory_exists(save_path)
+
+    try:
+        write_file_atomic(os.path.join(save_path, filename), data, prefix=".upload-")
         return filename
     except Exception as e:
-        print(f"文件保存失败: {e}")
+        logger.error("文件保存失败: %s", e)
         return None
 
 
@@ -96,3 +157,15 @@ def get_file_extension_as_jpg(filename):
     用于预测结果文件名生成
     """
     return os.path.splitext(filename)[0] + ".jpg"
+
+
+def get_result_filename(filename, version=None):
+    """
+    预测结果图像文件名：a.png -> a.jpg
+
+    模型版本（如int8）的结果带版本后缀 a@int8.jpg，与默认模型的结果互不覆盖
+    （secure_filename会去掉@，上传的文件名不会与之冲突）
+    """
+    if not version:
+        return get_file_extension_as_jpg(filename)
+    return f"{os.path.splitext(filename)[0]}@{version}.jpg"
@@ -0,0 +1,129 @@
+"""
+上传图像预处理 - 校验文件头、按EXIF方向摆正，生成供预测使用的模型分辨率工作副本
+"""
+
+import os
+
+import cv2
+
+from app.config import Config
+from app.utils.file_utils import save_bytes
+from app.utils.image_utils import decode_image_bytes, encode_image
+
+# 图像格式 -> 文件头
+MAGIC_NUMBERS = {
+    "jpeg": b"\xff\xd8\xff",
+    "png": b"\x89PNG\r\n\x1a\n",
+}
+
+
+class IngestError(ValueError):
+    """上传内容不是有效的图像"""
+
+
+def detect_image_format(data):
+    """根据文件头识别图像格式，无法识别时返回None"""
+    for fmt, magic in MAGIC_NUMBERS.items():
+        if data[: len(magic)] == magic:
+            return fmt
+    return None
+
+
+def normalize_image(image, working_size=None):
+    """
+    缩小到工作分辨率：短边缩放到working_size（只缩小不放大）
+
+    短边不小于分类模型的输入尺寸、长边不小于检测模型的letterbox尺寸，
+    模型预处理的结果与直接使用原图基本一致。
+    """
+    working_size = working_size or Config.INGEST_WORKING_SIZE
+    h, w = image.shape[:2]
+    scale = working_size / min(h, w)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def prepare_upload(data):
+    """
+    校验并解码上传内容，返回工作分辨率的图像
+
+    解码时已按EXIF方向旋转，工作副本不再依赖EXIF
+
+    Raises:
+        IngestError: 文件头不是JPEG/PNG，或无法解码
+    """
+    if detect_image_format(data) is None:
+        raise IngestError("格式错误，仅支持jpg、png、jpeg格式文件")
+
+    # 工作副本只需短边不小于INGEST_WORKING_SIZE，允许JPEG缩小解码
+    image = decode_image_bytes(data, min_size=Config.INGEST_WORKING_SIZE)
+    if image is None:
+        raise IngestError("图像解码失败")
+
+    return normalize_image(image)
+
+
+def working_copy_path(image_type, filename):
+    """
+    工作副本路径：原图目录下的工作副本子目录，统一为JPEG
+
+    以完整文件名（含扩展名）命名，如 a.png -> a.png.jpg，a.png 和 a.jpg 各有自己的副本
+    """
+    return os.path.join(
+        Config.IMAGE_UPLOAD_PATHS[image_type],
+        Config.INGEST_WORKING_DIR,
+        os.path.basename(filename) + ".jpg",
+    )
+
+
+def source_filename(path):
+    """图像对应的上传文件名：工作副本（.work/a.png.jpg）还原为 a.png，其他路径取文件名"""
+    filename = os.path.basename(path)
+    parent = os.path.basename(os.path.dirname(path))
+    if parent == Config.INGEST_WORKING_DIR and filename.endswith(".jpg"):
+        return filename[: -len(".jpg")]
+    return filename
+
+
+def find_working_copy(image_type, filename):
+    """
+    上传文件filename（上传接口返回的文件名）的工作副本，不存在时返回None
+
+    预测接口的imageid即上传时的文件名，其工作副本总是位于上传目录下，
+    与预测接口读取原图的目录无关；filename带目录部分时不使用工作副本
+    """
+    if not filename or os.path.basename(filename) != filename:
+        return None
+    working_path = working_copy_path(image_type, filename)
+    return working_path if os.path.isfile(working_path) else None
+
+
+def source_image_path(image_type, filename):
+    """展示原图时使用的文件：保留原图时为原图，否则为工作副本"""
+    original_path = os.path.join(Config.IMAGE_UPLOAD_PATHS[image_type], filename)
+    if os.path.exists(original_path):
+        return original_path
+    return working_copy_path(image_type, filename)
+
+
+def store_upload(data, working_image, filename, image_type):
+    """
+    保存工作副本，按配置保存原图
+
+    Returns:
+        str: 保存的文件名，失败返回None
+    """
+    working_path = working_copy_path(image_type, filename)
+    saved = save_bytes(
+        encode_image(working_image, quality=Config.INGEST_WORKING_QUALITY),
+        os.path.dirname(working_path),
+        os.path.basename(working_path),
+    )
+    if saved is None:
+        return None
+
+    if Config.INGEST_KEEP_ORIGINAL:
+        return save_bytes(data, Config.IMAGE_UPLOAD_PATHS[image_type], filename)
+    return filename
@@ -0,0 +1,151 @@
+"""
+图像编解码工具 - 内存中的图像解码与结果编码
+
+JPEG支持在DCT域按1/2、1/4、1/8缩小解码，只需要模型输入尺寸时
+比完整解码后再缩放快得多。解码器可通过Config.IMAGE_DECODER切换。
+"""
+
+import io
+import math
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.config import Config
+from app.utils.logging_utils import get_logger
+from app.utils.profiling import timed
+
+logger = get_logger("image")
+
+# 缩小倍数 -> OpenCV缩小解码标志（同样按EXIF方向旋转）
+_REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def reduction_factor(width, height, min_size):
+    """选择最大的缩小倍数（8/4/2），使缩小后的短边仍不小于min_size，否则返回1"""
+    if not min_size:
+        return 1
+    for factor in (8, 4, 2):
+        if math.ceil(min(width, height) / factor) >= min_size:
+            return factor
+    return 1
+
+
+def _jpeg_reduction(data, min_size):
+    """读取图像头（不解码像素），JPEG返回可用的缩小倍数，其他格式返回1"""
+    if not min_size:
+        return 1
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format != "JPEG":
+                return 1
+            return reduction_factor(image.width, image.height, min_size)
+    except Exception:
+        return 1
+
+
+def _decode_opencv(data, min_size=None):
+    """完整解码"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def _decode_opencv_reduced(data, min_size=None):
+    """libjpeg(-turbo)缩小解码，非JPEG或尺寸不足时完整解码"""
+    factor = _jpeg_reduction(data, min_size)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(buffer, _REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+
+
+def _decode_pillow_draft(data, min_size=None):
+    """Pillow draft()缩小解码，按EXIF方向旋转后转换为BGR"""
+    with Image.open(io.BytesIO(data)) as image:
+        if min_size and image.format == "JPEG":
+            factor = reduction_factor(image.width, image.height, min_size)
+            if factor > 1:
+                image.draft(
+                    "RGB",
+                    (math.ceil(image.width / factor), math.ceil(image.height / factor)),
+                )
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+
+
+# 解码器名称 -> 解码函数(data, min_size) -> BGR数组
+IMAGE_DECODERS = {
+    "opencv": _decode_opencv,
+    "opencv_reduced": _decode_opencv_reduced,
+    "pillow_draft": _decode_pillow_draft,
+}
+
+
+def register_decoder(name, decode_fn):
+    """注册自定义解码器，decode_fn(data, min_size)返回BGR数组，失败返回None"""
+    IMAGE_DECODERS[name] = decode_fn
+
+
+def decode_image_bytes(data, min_size=None, decoder=None):
+    """
+    将图像字节解码为numpy数组（BGR格式，与cv2.imread一致）
+
+    Args:
+        data: 图像文件的原始字节
+        min_size: 需要的最小短边像素数，提供时允许缩小解码；None表示完整解码
+        decoder: 解码器名称，默认为Config.IMAGE_DECODER
+
+    Returns:
+        np.ndarray: 解码后的图像，失败返回None
+    """
+    if not data:
+        return None
+    decode_fn = IMAGE_DECODERS[decoder or Config.IMAGE_DECODER]
+    try:
+        with timed("decode"):
+            return decode_fn(data, min_size)
+    except Exception as e:
+        logger.error("图像解码失败: %s", e)
+        return None
+
+
+def read_image(image_path, min_size=None, decoder=None):
+    """
+    读取并解码图像文件（只读取一次文件）
+
+    Args:
+        image_path: 图像文件路径
+        min_size: 需要的最小短边像素数，提供时允许缩小解码
+        decoder: 解码器名称，默认为Config.IMAGE_DECODER
+
+    Returns:
+        np.ndarray: 解码后的图像，失败返回None
+    """
+    try:
+        with timed("io"), open(image_path, "rb") as f:
+            data = f.read()
+        return decode_image_bytes(data, min_size, decoder)
+    except Exception as e:
+        logger.error("图像读取失败: %s", e)
+        return None
+
+
+def encode_image(image, quality=95):
+    """
+    将图像数组编码为JPEG字节
+
+    Args:
+        image: BGR格式的numpy数组
+        quality: JPEG质量
+
+    Returns:
+        bytes: JPEG编码后的字节
+    """
+    with timed("encode"):
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("图像编码失败")
+    return encoded.tobytes()
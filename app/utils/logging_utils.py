@@ -0,0 +1,261 @@
+"""
+结构化日志 - JSON格式、带请求ID，经队列由后台线程写出，请求线程不阻塞在日志I/O上
+
+用法:
+    logger = get_logger("prediction")
+    logger.info("收到预测请求", extra={"imageid": pic_name, "modelid": model_id})
+
+日志按类别（logger名 paddy.<类别>）采样：WARNING及以上始终保留，其余按
+LOG_SAMPLE_RATES中该类别的比例保留；同一请求的采样结果一致（按请求ID决定）。
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict
+
+from app.config import Config
+
+LOGGER_PREFIX = "paddy"
+
+# LogRecord自带的属性，其余属性视为extra传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+
+def get_logger(category: str) -> logging.Logger:
+    """获取指定类别的日志记录器（paddy.<category>）"""
+    return logging.getLogger(f"{LOGGER_PREFIX}.{category}")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_request_id():
+    """当前请求的ID，不在请求上下文中（后台线程）时返回None"""
+    try:
+        from flask import g, has_request_context
+    except ImportError:
+        return None
+    if not has_request_context():
+        return None
+    return g.get("request_id")
+
+
+def truncate(value: Any, limit: int = None) -> str:
+    """把任意值转为字符串并限制长度（bytes按UTF-8解码，无法解码的字节转义）"""
+    limit = limit or Config.LOG_MAX_FIELD_CHARS
+    if isinstance(value, (bytes, bytearray)):
+        # 只解码需要的部分，避免为大请求体复制整个内容
+        text = bytes(value[: limit * 4]).decode("utf-8", errors="backslashreplace")
+        total, unit = len(value), "字节"
+    else:
+        text = value if isinstance(value, str) else str(value)
+        total, unit = len(text), "字符"
+
+    if len(text) > limit or total > len(text):
+        return f"{text[:limit]}...(共{total}{unit})"
+    return text
+
+
+class RequestContextFilter(logging.Filter):
+    """在调用线程中补充请求ID（后台线程写出时已不在请求上下文中）"""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按类别采样
+
+    - WARNING及以上不采样
+    - 有请求ID时按ID哈希决定，同一请求的日志要么全部保留要么全部丢弃
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        category = record.name.split(".", 1)[-1]  # paddy.<类别>，其他logger为其名称
+        rate = self.rates.get(category, self.rates.get("default", 1.0))
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            self.sampled_out += 1
+            return False
+
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            point = zlib.crc32(request_id.encode("utf-8")) / 0xFFFFFFFF
+        else:
+            point = random.random()
+        if point < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行JSON，消息和各字段按LOG_MAX_FIELD_CHARS截断"""
+
+    def __init__(self, max_chars: int = None):
+        super().__init__()
+        self.max_chars = max_chars or Config.LOG_MAX_FIELD_CHARS
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "category": record.name.split(".", 1)[-1],
+            "message": truncate(record.getMessage(), self.max_chars),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+
+        for key, value in record.__dict__.items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if isinstance(value, (int, float, bool)) or value is None:
+                entry[key] = value
+            elif isinstance(value, (dict, list)):
+                # 结构化字段尽量保留原样，序列化后超长时才截断为字符串
+                encoded = json.dumps(value, ensure_ascii=False, default=str)
+                entry[key] = (
+                    value
+                    if len(encoded) <= self.max_chars
+                    else truncate(encoded, self.max_chars)
+                )
+            else:
+                entry[key] = truncate(value, self.max_chars)
+
+        if record.exc_text:
+            entry["exception"] = truncate(record.exc_text, self.max_chars * 4)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    队列写满时丢弃日志而不是阻塞请求线程
+
+    prepare只合并消息参数、提前格式化异常（异常对象不能跨线程保留），
+    JSON序列化和写出都在后台线程中完成。
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(app_config=Config):
+    """
+    配置paddy.*日志：调用线程中过滤/采样后放入有界队列，由后台线程格式化并写到stdout
+
+    重复调用时只更新级别和采样比例。fork出的子进程中自动重建队列和后台线程；
+    os._exit退出的进程（预fork工作进程）需在退出前调用shutdown_logging。
+    """
+    global _handler, _listener
+
+    with _lock:
+        root = logging.getLogger(LOGGER_PREFIX)
+        root.setLevel(app_config.LOG_LEVEL)
+        root.propagate = False
+
+        if _handler is not None:
+            for log_filter in _handler.filters:
+                if isinstance(log_filter, SamplingFilter):
+                    log_filter.rates = dict(app_config.LOG_SAMPLE_RATES)
+            return
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter(app_config.LOG_MAX_FIELD_CHARS))
+
+        _handler = NonBlockingQueueHandler(queue.Queue(app_config.LOG_QUEUE_SIZE))
+        _handler.addFilter(RequestContextFilter())
+        _handler.addFilter(SamplingFilter(app_config.LOG_SAMPLE_RATES))
+        root.addHandler(_handler)
+        # werkzeug服务器（预fork模式）的访问日志同样经队列写出
+        werkzeug_logger = logging.getLogger("werkzeug")
+        werkzeug_logger.addHandler(_handler)
+        werkzeug_logger.propagate = False
+
+        _listener = QueueListener(_handler.queue, stream_handler)
+        _listener.start()
+
+        os.register_at_fork(after_in_child=_restart_in_child)
+        atexit.register(shutdown_logging)
+
+
+def _restart_in_child():
+    # 后台线程不会被fork继承，队列的锁也可能处于被持有状态，子进程中全部重建
+    global _listener
+    if _listener is None:
+        return
+    handlers = _listener.handlers
+    _handler.queue = queue.Queue(Config.LOG_QUEUE_SIZE)
+    _listener = QueueListener(_handler.queue, *handlers)
+    _listener.start()
+
+
+def shutdown_logging():
+    """停止后台线程，退出前把队列中剩余的日志全部写出"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_stats() -> Dict[str, Any]:
+    """获取日志队列统计信息"""
+    if _handler is None:
+        return {"enabled": False}
+    sampled_out = sum(
+        f.sampled_out for f in _handler.filters if isinstance(f, SamplingFilter)
+    )
+    return {
+        "enabled": True,
+        "queue_depth": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "sampled_out": sampled_out,
+    }
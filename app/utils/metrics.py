@@ -0,0 +1,284 @@
+"""
+运行指标 - 计数器/直方图，以Prometheus文本格式从 /metrics 输出
+
+热路径上每次记录只是一次加锁的字典查找和加法；队列深度、缓存命中率等
+已有统计的指标在抓取时由收集函数读取，不在请求路径上额外记录。
+多进程部署时各工作进程分别统计，抓取到的是处理该次请求的进程的数据。
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.utils.logging_utils import get_logger
+from app.utils.logging_utils import get_stats as get_logging_stats
+
+logger = get_logger("server")
+
+# 默认耗时分桶（秒）：覆盖缓存命中（亚毫秒）到冷启动推理（数秒）
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """单调递增计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        """按标签值（与labelnames顺序一致）增加计数"""
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """累积分桶直方图（耗时类指标的观测值单位为秒）"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各分桶计数（非累积，末位为+Inf）, 总和]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """记录一次观测值"""
+        key = tuple(str(label) for label in labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """记录with块的执行耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total))
+                for key, (counts, total) in self._values.items()
+            )
+
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, [("le", _format_value(float(bound)))]
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    - counter()/histogram()：按名称注册（重复注册返回同一实例）
+    - register_collector()：注册抓取时调用的收集函数，
+      返回 (指标名, 类型, 说明, [(标签字典, 值), ...]) 列表
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], list]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, labelnames, **kwargs
+                )
+            return metric
+
+    def register_collector(self, collector: Callable[[], list]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """生成Prometheus文本格式（version 0.0.4）"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            collectors = list(self._collectors)
+
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.warning("收集指标失败: %s", e)
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    label_str = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表实例
+metrics = MetricsRegistry()
+
+# ============ 请求 ============
+http_request_duration = metrics.histogram(
+    "paddy_http_request_duration_seconds",
+    "HTTP请求处理耗时（流式响应只计到响应头返回）",
+    ("route", "method", "status"),
+)
+prediction_requests = metrics.counter(
+    "paddy_prediction_requests_total",
+    "按modelid统计的预测请求数（批量接口按图像计），outcome为结果类别",
+    ("modelid", "outcome"),
+)
+
+# ============ 推理 ============
+inference_stage_duration = metrics.histogram(
+    "paddy_inference_stage_seconds",
+    "每张图像各推理阶段耗时（ultralytics result.speed）",
+    ("model", "backend", "stage"),
+)
+batch_size = metrics.histogram(
+    "paddy_batch_size",
+    "批处理调度器每批合并的请求数",
+    ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+batch_duration = metrics.histogram(
+    "paddy_batch_duration_seconds",
+    "批处理调度器执行一批的耗时",
+    ("model",),
+)
+result_save_duration = metrics.histogram(
+    "paddy_result_save_seconds",
+    "_save_prediction_result绘制、编码并写入结果图像的耗时",
+    ("model", "mode"),
+)
+model_load_duration = metrics.histogram(
+    "paddy_model_load_seconds",
+    "模型加载耗时（含热更新）",
+    ("model",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def _collect_logging():
+    stats = get_logging_stats()
+    if not stats["enabled"]:
+        return []
+    return [
+        (
+            "paddy_log_queue_depth",
+            "gauge",
+            "日志队列中待写出的记录数",
+            [({}, stats["queue_depth"])],
+        ),
+        (
+            "paddy_log_dropped_total",
+            "counter",
+            "日志队列已满被丢弃的记录数",
+            [({}, stats["dropped"])],
+        ),
+        (
+            "paddy_log_sampled_out_total",
+            "counter",
+            "按采样比例未记录的日志数",
+            [({}, stats["sampled_out"])],
+        ),
+    ]
+
+
+metrics.register_collector(_collect_logging)
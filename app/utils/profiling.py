@@ -0,0 +1,292 @@
+"""
+按需性能剖析 - 对单个请求（或按比例抽取的请求）采样调用栈，并分阶段计时
+
+用法:
+    with timed("decode"):
+        image = decode_fn(data, min_size)
+
+未开启剖析的请求中timed()只读取一次上下文变量，几乎没有开销。开启剖析的请求：
+- 响应头 Server-Timing 给出各阶段（decode/inference/postprocess/render/encode/io）耗时
+- 采样线程按PROFILING_INTERVAL_MS读取处理该请求的线程（含批处理线程）的调用栈，
+  请求结束后以折叠栈格式（flamegraph.pl / speedscope可直接读取）写入
+  PROFILING_OUTPUT_DIR/<路由>/<模型>/
+"""
+
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from app.config import Config
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("profiling")
+
+_current = contextvars.ContextVar("paddy_request_timings", default=None)
+
+
+class RequestTimings:
+    """单个请求的分阶段耗时（批处理线程也会写入，需加锁）"""
+
+    def __init__(self, session=None):
+        self.session = session  # 采样会话，只要求Server-Timing时为None
+        self.labels: Dict[str, str] = {}
+        self.start = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def annotate(self, **labels):
+        self.labels.update({k: str(v) for k, v in labels.items() if v is not None})
+
+    def stages(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stages)
+
+    def server_timing(self) -> str:
+        """Server-Timing响应头（毫秒），total为请求开始到生成响应头的耗时"""
+        entries = [
+            f"{stage};dur={seconds * 1000.0:.2f}"
+            for stage, seconds in sorted(self.stages().items())
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000.0:.2f}")
+        return ", ".join(entries)
+
+
+class _TimingsGroup:
+    """一批推理由多个请求共享，批内各阶段耗时计入该批的每个请求"""
+
+    def __init__(self, members: List[RequestTimings]):
+        self.members = members
+
+    def add(self, stage: str, seconds: float):
+        for timings in self.members:
+            timings.add(stage, seconds)
+
+    def annotate(self, **labels):
+        for timings in self.members:
+            timings.annotate(**labels)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """当前线程正在计时的请求，未开启剖析时为None"""
+    return _current.get()
+
+
+@contextmanager
+def timed(stage: str):
+    """把with块的耗时计入当前请求的指定阶段"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage, time.perf_counter() - start)
+
+
+def annotate(**labels):
+    """为当前请求的剖析结果添加标签（如model），决定输出目录"""
+    timings = _current.get()
+    if timings is not None:
+        timings.annotate(**labels)
+
+
+@contextmanager
+def bind_timings(members: Iterable[RequestTimings]):
+    """
+    在后台线程（批处理调度器）中代表一组请求计时
+
+    这些请求开启了调用栈采样时，当前线程在with块内同样被采样
+    """
+    members = [timings for timings in members if timings is not None]
+    if not members:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    sessions = [t.session for t in members if t.session is not None]
+    for session in sessions:
+        session.add_thread()
+    token = _current.set(members[0] if len(members) == 1 else _TimingsGroup(members))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        for session in sessions:
+            session.remove_thread(thread_id)
+
+
+def begin_request(session=None) -> RequestTimings:
+    """在请求线程中开始计时（before_request中调用）"""
+    timings = RequestTimings(session)
+    _current.set(timings)
+    return timings
+
+
+def end_request():
+    """清除当前线程的计时状态（线程池中的线程会被后续请求复用）"""
+    _current.set(None)
+
+
+# ============ 调用栈采样 ============
+
+
+class ProfileSession:
+    """一个请求的采样结果：折叠栈 -> 样本数"""
+
+    def __init__(self, max_seconds: float):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.deadline = time.monotonic() + max_seconds
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def add_thread(self):
+        """采样当前线程（以线程名作为折叠栈的根）"""
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = _sanitize(thread.name)
+
+    def remove_thread(self, thread_id: int):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+    def threads(self) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._threads)
+
+
+class SamplingProfiler:
+    """
+    调用栈采样器
+
+    只在有进行中的会话时运行一个后台线程，按固定间隔读取sys._current_frames()，
+    被剖析的请求本身不做任何额外工作。同时进行的会话数受max_sessions限制。
+    """
+
+    def __init__(
+        self, interval_ms: float = 5.0, max_sessions: int = 4, max_seconds: float = 60.0
+    ):
+        self.interval = max(0.001, float(interval_ms) / 1000.0)
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_seconds = max_seconds
+        self._sessions: List[ProfileSession] = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def start_session(self) -> Optional[ProfileSession]:
+        """开始采样当前线程，已达到并发会话上限时返回None"""
+        with self._cond:
+            if self._pid != os.getpid():
+                # fork后父进程的采样线程和会话不会被继承
+                self._sessions = []
+                self._thread = None
+                self._pid = os.getpid()
+            if len(self._sessions) >= self.max_sessions:
+                return None
+
+            session = ProfileSession(self.max_seconds)
+            session.add_thread()
+            self._sessions.append(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+            return session
+
+    def stop_session(self, session: ProfileSession):
+        with self._cond:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def active_sessions(self) -> int:
+        with self._cond:
+            return len(self._sessions)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._sessions:
+                    self._cond.wait()
+                now = time.monotonic()
+                # 超时的会话（如客户端中断后未收到关闭回调）停止采样
+                self._sessions = [s for s in self._sessions if s.deadline > now]
+                sessions = list(self._sessions)
+
+            if sessions:
+                frames = sys._current_frames()
+                for session in sessions:
+                    for thread_id, thread_name in session.threads().items():
+                        frame = frames.get(thread_id)
+                        if frame is not None:
+                            session.stacks[_fold(frame, thread_name)] += 1
+                    session.samples += 1
+                del frames
+
+            time.sleep(self.interval)
+
+
+def _fold(frame, root: str) -> str:
+    """调用栈 -> 折叠栈字符串（根在前，以分号分隔）"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    names.append(root)
+    names.reverse()
+    return ";".join(name.replace(";", ":").replace(" ", "_") for name in names)
+
+
+def _sanitize(value: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", value).strip("_") or "root"
+
+
+def write_profile(
+    session: ProfileSession, route: str, model: str, request_id: str
+) -> Optional[str]:
+    """
+    写出折叠栈文件：<输出目录>/<路由>/<模型>/<时间>-<请求ID>.folded
+
+    Returns:
+        文件路径，没有样本时返回None
+    """
+    if not session.stacks:
+        return None
+    directory = os.path.join(
+        Config.PROFILING_OUTPUT_DIR, _sanitize(route), _sanitize(model)
+    )
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    filename = f"{stamp}-{_sanitize(request_id or 'none')}.folded"
+    path = os.path.join(directory, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(session.stacks.items()):
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+# 全局采样器实例
+profiler = SamplingProfiler(
+    interval_ms=Config.PROFILING_INTERVAL_MS,
+    max_sessions=Config.PROFILING_MAX_CONCURRENT,
+    max_seconds=Config.PROFILING_MAX_SECONDS,
+)
+
+# 运行时设置（/admin/profiling修改，只作用于处理该请求的进程）
+settings = {"sample_rate": Config.PROFILING_SAMPLE_RATE}
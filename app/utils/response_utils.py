@@ -32,6 +32,12 @@ def prediction_error_response(message, code="500"):
     return json.dumps(return_dict, ensure_ascii=False)
 
 
+def batch_prediction_line(image_id, data="", message="预测完成", code="200"):
+    """批量预测的单条结果（NDJSON一行）- 字段与单张预测响应一致，另附imageid"""
+    return_dict = {"imageid": image_id, "code": code, "data": data, "message": message}
+    return json.dumps(return_dict, ensure_ascii=False) + "\n"
+
+
 def file_not_found_response(file_path):
     """文件未找到响应 - 与原始格式一致"""
     return_dict = {
@@ -40,3 +46,13 @@ def file_not_found_response(file_path):
         "data": "",
     }
     return json.dumps(return_dict, ensure_ascii=False)
+
+
+def service_unavailable_response(message, retry_after=1):
+    """服务繁忙响应 - 返回503并通过Retry-After提示重试间隔"""
+    return_dict = {"code": "503", "data": "", "message": message}
+    return (
+        json.dumps(return_dict, ensure_ascii=False),
+        503,
+        {"Retry-After": str(retry_after)},
+    )
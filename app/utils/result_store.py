@@ -0,0 +1,74 @@
+"""
+预测结果存储 - 将结果图像按哈希分目录原子写入预测结果目录
+"""
+
+import hashlib
+import os
+
+from app.config import Config
+from app.utils.file_utils import ensure_directory_exists, write_file_atomic
+
+
+class ResultStore:
+    """
+    预测结果图像存储
+
+    - 文件按文件名哈希分散到多级子目录，避免单个目录积累海量文件
+    - 先写临时文件再os.replace，读者永远看不到写了一半的文件
+    - 同名文件并发写入时各自使用独立临时文件，最后完成的一次生效
+    """
+
+    def __init__(self, base_dir: str, shard_depth: int = 2):
+        """
+        Args:
+            base_dir: 结果根目录（Config.PREDICT_OUTPUT_PATHS中的路径）
+            shard_depth: 分目录层数，每层2个十六进制字符，0表示不分目录
+        """
+        self.base_dir = base_dir
+        self.shard_depth = max(0, int(shard_depth))
+
+    def path_for(self, filename: str) -> str:
+        """获取结果文件的存储路径"""
+        filename = os.path.basename(filename)
+        digest = hashlib.md5(filename.encode("utf-8")).hexdigest()
+        shards = [digest[i * 2 : i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.base_dir, *shards, filename)
+
+    def resolve(self, filename: str) -> str:
+        """
+        查找已存在的结果文件
+
+        优先使用分目录路径，其次兼容旧版直接存放在根目录下的文件
+        """
+        path = self.path_for(filename)
+        if os.path.exists(path):
+            return path
+
+        legacy_path = os.path.join(self.base_dir, os.path.basename(filename))
+        if os.path.exists(legacy_path):
+            return legacy_path
+
+        return path
+
+    def exists(self, filename: str) -> bool:
+        """结果文件是否存在"""
+        return os.path.exists(self.resolve(filename))
+
+    def write_bytes(self, filename: str, data: bytes) -> str:
+        """
+        原子写入结果文件
+
+        Returns:
+            str: 最终文件路径
+        """
+        path = self.path_for(filename)
+        ensure_directory_exists(os.path.dirname(path))
+        write_file_atomic(path, data)
+        return path
+
+
+# 各类预测结果的存储实例
+result_stores = {
+    model_type: ResultStore(path, Config.RESULT_STORE_SHARD_DEPTH)
+    for model_type, path in Config.PREDICT_OUTPUT_PATHS.items()
+}
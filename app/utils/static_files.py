@@ -0,0 +1,55 @@
+"""
+静态图像发送 - 不经Python内存复制地发送文件，支持条件请求、Range和缓存头
+"""
+
+import mimetypes
+import os
+import posixpath
+
+from flask import Response, send_file
+
+from app.config import Config
+
+
+def send_image(image_path, max_age=None):
+    """
+    发送图像文件
+
+    - 默认交给WSGI服务器的wsgi.file_wrapper发送（gunicorn等使用sendfile零拷贝）
+    - USE_X_SENDFILE=True时只返回X-Sendfile头，由前置服务器（Apache/lighttpd）发送
+    - 配置X_ACCEL_REDIRECT_PREFIX时返回X-Accel-Redirect头，由nginx内部location发送
+    - 带强ETag和Last-Modified，条件请求返回304，Range请求返回206
+
+    Args:
+        image_path: 图像文件路径
+        max_age: 缓存时间（秒），None表示IMAGE_MAX_AGE
+
+    Returns:
+        Response，文件不存在时返回None
+    """
+    if not image_path or not os.path.isfile(image_path):
+        return None
+
+    mimetype = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+    if max_age is None:
+        max_age = Config.IMAGE_MAX_AGE
+
+    if Config.X_ACCEL_REDIRECT_PREFIX:
+        # nginx负责条件请求和Range，这里只给出内部路径和缓存策略
+        relative_path = os.path.relpath(image_path, Config.STATIC_BASE_PATH)
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = posixpath.join(
+            Config.X_ACCEL_REDIRECT_PREFIX, relative_path.replace(os.sep, "/")
+        )
+    else:
+        response = send_file(
+            os.path.abspath(image_path),
+            mimetype=mimetype,
+            conditional=True,
+            etag=True,
+            max_age=max_age,
+        )
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
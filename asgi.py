@@ -0,0 +1,14 @@
+"""
+ASGI入口 - 慢速上传/下载在事件循环中处理，不占用推理线程
+    uvicorn asgi:app --host 127.0.0.1 --port 5050
+"""
+
+import os
+
+from app import create_app
+from app.asgi import create_asgi_app
+from app.config import config
+
+_config_name = os.environ.get("PADDY_CONFIG", "production")
+
+app = create_asgi_app(create_app(_config_name), config[_config_name])
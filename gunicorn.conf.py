@@ -0,0 +1,35 @@
+"""
+gunicorn配置 - 预加载应用，主进程预热模型后fork工作进程共享模型内存
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+from app.config import config
+
+_config = config[os.environ.get("PADDY_CONFIG", "production")]
+
+bind = f"{_config.HOST}:{_config.PORT}"
+workers = int(os.environ.get("PADDY_WORKERS", _config.WORKERS or os.cpu_count() or 1))
+worker_class = "gthread"
+threads = int(os.environ.get("PADDY_THREADS", 8))
+
+# 在主进程中导入应用（加载模型），工作进程fork后共享
+preload_app = True
+# 重载/停止时等待进行中的预测完成
+graceful_timeout = _config.GRACEFUL_TIMEOUT
+timeout = 120
+
+
+def when_ready(server):
+    """主进程就绪、fork工作进程之前：预热模型并冻结GC"""
+    from app.prefork import prepare_master
+
+    prepare_master()
+
+
+def post_fork(server, worker):
+    """工作进程fork之后：限制PyTorch线程数"""
+    from app.prefork import configure_worker_threads
+
+    configure_worker_threads(workers)
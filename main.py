@@ -1,4 +1,4 @@
-from flask import Flask, request, Response
+from flask import Flask, request, send_from_directory
 from werkzeug.utils import secure_filename
 import os
 from ultralytics import YOLO
@@ -186,41 +186,26 @@ def predict_img():
 @app.route("/show_grow_image/<imageId>")
 def get_frame(imageId):
     # 图片上传保存的路径
-    with open(r'paddy-server/static/image/grow/{}'.format(imageId), 'rb') as f:
-        image = f.read()
-        result = Response(image, mimetype="image/jpg")
-        return result
+    return send_from_directory('paddy-server/static/image/grow', imageId, max_age=3600)
 
 @app.route("/show_disease_image/<imageId>")
 def get_dframe(imageId):
     # 图片上传保存的路径
-    with open(r'paddy-server/static/image/disease/{}'.format(imageId), 'rb') as f:
-        image = f.read()
-        result = Response(image, mimetype="image/jpg")
-        return result
+    return send_from_directory('paddy-server/static/image/disease', imageId, max_age=3600)
 
 # 查看预测完图片
 @app.route("/show_predict_grow_image/<imageId>")
 def get_predict_frame(imageId):
     # 图片上传保存的路径
-    with open(r'paddy-server/static/predict_image/grow/{}'.format(imageId), 'rb') as f:
-        image = f.read()
-        result = Response(image, mimetype="image/jpg")
-        return result
+    return send_from_directory('paddy-server/static/predict_image/grow', imageId, max_age=60)
 # 查看预测完图片
 @app.route("/show_predict_disease_image/<imageId>")
 def get_predict_dframe(imageId):
     # 图片上传保存的路径
-    with open(r'paddy-server/static/predict_image/disease/{}'.format(imageId), 'rb') as f:
-        image = f.read()
-        result = Response(image, mimetype="image/jpg")
-        return result
+    return send_from_directory('paddy-server/static/predict_image/disease', imageId, max_age=60)
 @app.route("/user_image/<imageId>")
 def userimg(imageId):
     # 图片上传保存的路径
-    with open(r'paddy-server/static/userimg/{}'.format(imageId), 'rb') as f:
-        image = f.read()
-        result = Response(image, mimetype="image/jpg")
-        return result
+    return send_from_directory('paddy-server/static/userimg', imageId, max_age=3600)
 if __name__ == "__main__":
     app.run(host='127.0.0.1', port=5050, debug=True)
\ No newline at end of file
@@ -0,0 +1,701 @@
+"""
+基准测试与压测 - 离线运行（合成图像、随机初始化的小模型），结果与基线比较
+
+用法:
+    python scripts/benchmark.py                        # 微基准 + HTTP压测，与基线比较
+    python scripts/benchmark.py micro --only predict   # 只运行名称包含predict的微基准
+    python scripts/benchmark.py load --requests 1000 --concurrency 16
+    python scripts/benchmark.py --update-baseline      # 以本次结果作为新基线
+
+模型和图像都在临时沙箱目录中生成，不读写仓库中的模型、图像和结果目录。
+基线与机器相关，换机器（或CI节点）后先用 --update-baseline 记录一次。
+任一指标超出基线容差（--tolerance，默认25%）时返回非零。
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "scripts", "benchmark_baseline.json")
+
+# 小模型：yolov8n结构、随机权重、缩小输入尺寸，输出无意义但计算路径与线上一致
+TINY_MODELS = {
+    "grow": {
+        "cfg": "yolov8n-cls.yaml",
+        "task": "classify",
+        "imgsz": 64,
+        "names": ["乳熟期", "始穗期", "黄熟期", "齐穗期"],
+    },
+    "disease": {
+        "cfg": "yolov8n.yaml",
+        "task": "detect",
+        "imgsz": 160,
+        "names": ["blight", "brownspot", "leafsmut"],
+    },
+}
+
+# 沙箱中覆盖的配置：关闭与基准无关的后台线程和日志输出
+CONFIG_OVERRIDES = {
+    "HOT_RELOAD_ENABLED": False,
+    "WARMUP_REPORT_PATH": None,
+    "LOG_LEVEL": "WARNING",
+}
+
+
+# ============ 沙箱 ============
+
+
+def synthetic_image(rng, width, height):
+    """生成带渐变、色块和噪声的合成图像，JPEG压缩率接近田间照片"""
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    base = rng.uniform(0.2, 0.8, size=3).astype(np.float32)
+    image = np.empty((height, width, 3), dtype=np.float32)
+    for c in range(3):
+        image[:, :, c] = base[c] + 0.3 * np.sin(6.0 * x * (c + 1) + 4.0 * y)
+    image = (np.clip(image, 0, 1) * 255).astype(np.uint8)
+
+    for _ in range(12):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        radius = int(rng.integers(min(width, height) // 40, min(width, height) // 8))
+        color = tuple(int(v) for v in rng.integers(0, 256, size=3))
+        cv2.circle(image, center, radius, color, -1)
+
+    noise = rng.normal(0, 8, size=image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def encode_jpeg(image, quality=90):
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("合成图像编码失败")
+    return encoded.tobytes()
+
+
+def build_tiny_model(model_type, path, seed):
+    """按ultralytics内置结构创建随机权重的小模型并保存为.pt"""
+    import torch
+    import ultralytics
+    from ultralytics.cfg import DEFAULT_CFG_DICT
+    from ultralytics.nn.tasks import (
+        ClassificationModel,
+        DetectionModel,
+        yaml_model_load,
+    )
+
+    spec = TINY_MODELS[model_type]
+    torch.manual_seed(seed)
+    cfg = yaml_model_load(spec["cfg"])
+    cfg["nc"] = len(spec["names"])
+    model_cls = ClassificationModel if spec["task"] == "classify" else DetectionModel
+    model = model_cls(cfg, nc=cfg["nc"], verbose=False)
+    model.names = dict(enumerate(spec["names"]))
+    train_args = {"imgsz": spec["imgsz"], "task": spec["task"]}
+    model.args = {**DEFAULT_CFG_DICT, **train_args}
+    torch.save(
+        {
+            "model": model.eval(),
+            "train_args": train_args,
+            "version": ultralytics.__version__,
+        },
+        path,
+    )
+
+
+def prepare_sandbox(root, seed=0, images=16, image_size=(1600, 1200)):
+    """
+    在root下生成与仓库布局一致的模型、图像目录并切换工作目录
+
+    服务端的路径都是相对路径，切换到沙箱后所有读写都发生在沙箱内。
+
+    Returns:
+        {"grow": [图像文件名...], "disease": [...]}
+    """
+    os.chdir(root)
+    os.makedirs("models", exist_ok=True)
+    build_tiny_model("grow", "models/paddy-grow.pt", seed)
+    build_tiny_model("disease", "models/paddy-disease.pt", seed + 1)
+
+    # 预测接口读取 static/image/<类型>/，上传和展示接口使用 paddy-server/static/，
+    # 与部署环境一致，static 指向同一目录
+    os.makedirs("paddy-server/static", exist_ok=True)
+    if not os.path.exists("static"):
+        os.symlink(os.path.join("paddy-server", "static"), "static")
+
+    rng = np.random.default_rng(seed)
+    names = {}
+    for model_type in ("grow", "disease"):
+        directory = f"static/image/{model_type}"
+        os.makedirs(directory, exist_ok=True)
+        names[model_type] = []
+        for i in range(images):
+            data = encode_jpeg(synthetic_image(rng, *image_size))
+            name = f"seed_{model_type}_{i:03d}.jpg"
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(data)
+            names[model_type].append(name)
+    return names
+
+
+def apply_config_overrides():
+    from app.config import Config
+
+    for key, value in CONFIG_OVERRIDES.items():
+        setattr(Config, key, value)
+
+
+# ============ 统计 ============
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall_seconds=None, errors=0):
+    """耗时列表（秒）-> 次数、吞吐和p50/p95/p99（毫秒）"""
+    values = sorted(latencies)
+    wall = wall_seconds if wall_seconds is not None else sum(values)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": round(1000.0 * sum(values) / max(1, len(values)), 3),
+        "p50_ms": round(1000.0 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000.0 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000.0 * percentile(values, 0.99), 3),
+    }
+
+
+# ============ 微基准 ============
+
+
+def micro_benchmarks(names):
+    """
+    Returns:
+        [(名称, 每次调用的函数)]，函数在沙箱中执行，不依赖HTTP
+    """
+    from werkzeug.datastructures import FileStorage
+
+    from app.config import Config
+    from app.models.yolo_model import YOLOModel
+    from app.utils.file_utils import move_file, save_bytes, secure_save_file
+    from app.utils.image_ingest import prepare_upload
+
+    benchmarks = []
+    for model_type in ("grow", "disease"):
+        model = YOLOModel(Config.MODEL_PATHS[f"yolo_{model_type}"], model_type)
+        model.load_model()
+        image_path = os.path.join(f"static/image/{model_type}", names[model_type][0])
+        result = model.model(
+            image_path, save=False, verbose=False, **model._predict_kwargs()
+        )[0]
+
+        benchmarks.append(
+            (
+                f"yolo_predict_image_{model_type}",
+                lambda m=model, p=image_path: m.predict_image(p, save_result=False),
+            )
+        )
+        benchmarks.append(
+            (
+                f"yolo_process_result_{model_type}",
+                lambda m=model, r=result: m._process_result(r),
+            )
+        )
+        benchmarks.append(
+            (
+                f"yolo_save_prediction_result_{model_type}",
+                lambda m=model, r=result: _save_result_sync(m, r),
+            )
+        )
+
+    with open(os.path.join("static/image/grow", names["grow"][0]), "rb") as f:
+        upload = f.read()
+
+    def save_upload():
+        storage = FileStorage(stream=io.BytesIO(upload), filename="bench upload.jpg")
+        return secure_save_file(storage, "bench/uploads")
+
+    benchmarks.append(("secure_save_file", save_upload))
+    benchmarks.append(
+        ("save_bytes", lambda: save_bytes(upload, "bench/uploads", "b.jpg"))
+    )
+
+    os.makedirs("bench/move_a", exist_ok=True)
+    with open("bench/move_a/moved.jpg", "wb") as f:
+        f.write(upload)
+    state = {"src": "bench/move_a", "dst": "bench/move_b"}
+
+    def move_back_and_forth():
+        ok = move_file(os.path.join(state["src"], "moved.jpg"), state["dst"])
+        state["src"], state["dst"] = state["dst"], state["src"]
+        return ok
+
+    benchmarks.append(("move_file", move_back_and_forth))
+    benchmarks.append(("ingest_prepare_upload", lambda: prepare_upload(upload)))
+    return benchmarks
+
+
+def _save_result_sync(model, result):
+    """在当前线程中完成结果图像的绘制、编码和写入（不交给后台渲染池）"""
+    from app.config import Config
+
+    render_async = Config.RENDER_ASYNC
+    Config.RENDER_ASYNC = False
+    try:
+        model._save_prediction_result("bench_result.jpg", result)
+    finally:
+        Config.RENDER_ASYNC = render_async
+
+
+def run_micro(names, only=None, min_time=1.0, min_iterations=20, warmup=3):
+    report = {}
+    for name, fn in micro_benchmarks(names):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for _ in range(warmup):
+            fn()
+
+        latencies = []
+        deadline = time.perf_counter() + min_time
+        while len(latencies) < min_iterations or time.perf_counter() < deadline:
+            start = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - start)
+
+        report[name] = summarize(latencies)
+        print(f"{name:40s} p50={report[name]['p50_ms']:.3f}ms", file=sys.stderr)
+    return report
+
+
+# ============ HTTP压测 ============
+
+
+class GatewayClient:
+    """模拟Go网关的HTTP客户端，按端点记录每个请求的耗时和错误"""
+
+    def __init__(self, host, port, recorder):
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.conn = None
+
+    def request(self, label, method, path, body=None, headers=None, stream=False):
+        start = time.perf_counter()
+        status, data = self._send(method, path, body, headers or {})
+        elapsed = time.perf_counter() - start
+        self.recorder.record(label, elapsed, not _succeeded(status, data, stream))
+        return status, data
+
+    def _send(self, method, path, body, headers):
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.will_close:
+                    self.conn.close()
+                    self.conn = None
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    return 599, b""
+        return 599, b""
+
+    def post_json(self, label, path, payload, stream=False):
+        return self.request(
+            label,
+            "POST",
+            path,
+            json.dumps(payload).encode("utf-8"),
+            {"Content-Type": "application/json"},
+            stream=stream,
+        )
+
+    def post_file(self, label, path, filename, data, fields=None):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for key, value in (fields or {}).items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n'
+                f"{value}\r\n".encode("utf-8")
+            )
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+            f'filename="{filename}"\r\nContent-Type: image/jpeg\r\n\r\n'.encode("utf-8")
+        )
+        parts.append(data)
+        parts.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+        return self.request(
+            label,
+            "POST",
+            path,
+            b"".join(parts),
+            {"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+
+
+def _succeeded(status, data, stream):
+    if status >= 400:
+        return False
+    if not data.startswith(b"{"):
+        return True
+    lines = data.splitlines() if stream else [data]
+    try:
+        return all(
+            json.loads(line).get("code", "200") == "200" for line in lines if line
+        )
+    except ValueError:
+        return False
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, label, elapsed, failed):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+            self.errors[label] = self.errors.get(label, 0) + int(failed)
+
+
+def _result_name(filename):
+    return os.path.splitext(filename)[0] + ".jpg"
+
+
+# 网关流量：每个流程是一次用户操作，按权重随机抽取
+def flow_upload_predict(client, rng, ctx, model_type):
+    model_id = "1" if model_type == "grow" else "2"
+    filename = f"{uuid.uuid4().hex[:12]}.jpg"
+    status, body = client.post_file(
+        f"POST /upload_{model_type}_image",
+        f"/upload_{model_type}_image",
+        filename,
+        rng.choice(ctx["uploads"]),
+    )
+    if status != 200:
+        return
+    saved = json.loads(body).get("data")
+    if not saved:
+        return
+    client.post_json(
+        "POST /predict_image", "/predict_image", {"imageid": saved, "modelid": model_id}
+    )
+    client.request(
+        f"GET /show_predict_{model_type}_image",
+        "GET",
+        f"/show_predict_{model_type}_image/{_result_name(saved)}",
+    )
+
+
+def flow_upload_and_predict(client, rng, ctx):
+    model_type = rng.choice(["grow", "disease"])
+    client.post_file(
+        "POST /upload_and_predict",
+        "/upload_and_predict",
+        f"{uuid.uuid4().hex[:12]}.jpg",
+        rng.choice(ctx["uploads"]),
+        fields={"modelid": "1" if model_type == "grow" else "2"},
+    )
+
+
+def flow_repredict(client, rng, ctx):
+    model_type = rng.choice(["grow", "disease"])
+    client.post_json(
+        "POST /predict_image",
+        "/predict_image",
+        {
+            "imageid": rng.choice(ctx["names"][model_type]),
+            "modelid": "1" if model_type == "grow" else "2",
+        },
+    )
+
+
+def flow_browse(client, rng, ctx):
+    name = rng.choice(ctx["names"]["grow"])
+    client.request(
+        "GET /show_grow_image?w=200",
+        "GET",
+        f"/show_grow_image/{name}?w=200",
+        headers={"Accept": "image/webp,image/*"},
+    )
+    client.request("GET /show_grow_image", "GET", f"/show_grow_image/{name}")
+    client.request(
+        "GET /show_predict_grow_image", "GET", f"/show_predict_grow_image/{name}"
+    )
+
+
+def flow_batch(client, rng, ctx):
+    model_type = rng.choice(["grow", "disease"])
+    client.post_json(
+        "POST /predict_images",
+        "/predict_images",
+        {
+            "imageids": rng.sample(ctx["names"][model_type], 8),
+            "modelid": "1" if model_type == "grow" else "2",
+        },
+        stream=True,
+    )
+
+
+TRAFFIC_MIX = [
+    (30, lambda c, r, x: flow_upload_predict(c, r, x, "grow")),
+    (15, lambda c, r, x: flow_upload_predict(c, r, x, "disease")),
+    (10, flow_upload_and_predict),
+    (20, flow_repredict),
+    (20, flow_browse),
+    (5, flow_batch),
+]
+
+
+def run_load(names, flows=300, concurrency=8, seed=0, upload_pool=32):
+    """
+    启动create_app的HTTP服务，按TRAFFIC_MIX回放网关流量
+
+    开始前对种子图像各预测一次（结果图像和缓存处于稳定状态）。
+    """
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.models.model_manager import model_manager
+    from app.models.render_pool import render_pool
+
+    app = create_app("production")
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = "127.0.0.1", server.server_port
+
+    rng = np.random.default_rng(seed + 100)
+    ctx = {
+        "names": names,
+        "uploads": [
+            encode_jpeg(synthetic_image(rng, 1600, 1200)) for _ in range(upload_pool)
+        ],
+    }
+
+    for model_type in ("grow", "disease"):
+        for name in names[model_type]:
+            model_manager.predict_image(model_type, f"static/image/{model_type}/{name}")
+    for model_type in ("grow", "disease"):
+        for name in names[model_type]:
+            render_pool.wait(
+                model_manager.get_model(f"yolo_{model_type}").get_result_path(name), 10
+            )
+
+    schedule_rng = random.Random(seed)
+    weights = [weight for weight, _ in TRAFFIC_MIX]
+    schedule = [schedule_rng.choices(TRAFFIC_MIX, weights)[0][1] for _ in range(flows)]
+    flow_seeds = [schedule_rng.randrange(1 << 30) for _ in range(flows)]
+
+    recorder = Recorder()
+    local = threading.local()
+
+    def run_flow(index):
+        if not hasattr(local, "client"):
+            local.client = GatewayClient(host, port, recorder)
+        schedule[index](local.client, random.Random(flow_seeds[index]), ctx)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_flow, range(flows)))
+    wall = time.perf_counter() - start
+
+    server.shutdown()
+
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    report = {
+        "overall": summarize(all_latencies, wall, sum(recorder.errors.values())),
+        "endpoints": {
+            label: summarize(values, wall, recorder.errors.get(label, 0))
+            for label, values in sorted(recorder.latencies.items())
+        },
+        "flows": flows,
+        "concurrency": concurrency,
+    }
+    return report
+
+
+# ============ 基线 ============
+
+# 指标 -> 变大是否更差
+COMPARED_METRICS = {"p50_ms": True, "p95_ms": True, "throughput": False}
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_ms=0.1):
+    """
+    耗时类指标同时超出相对容差和绝对差值min_delta_ms才算退化
+    （亚毫秒级的微基准受调度抖动影响，单看比例容易误报）
+
+    Returns:
+        [超出容差的指标说明]
+    """
+    regressions = []
+
+    def check(name, current, base, metrics):
+        for metric in metrics:
+            if metric not in base or metric not in current or not base[metric]:
+                continue
+            ratio = current[metric] / base[metric]
+            higher_is_worse = COMPARED_METRICS[metric]
+            if higher_is_worse and current[metric] - base[metric] < min_delta_ms:
+                continue
+            if (higher_is_worse and ratio > 1 + tolerance) or (
+                not higher_is_worse and ratio < 1 - tolerance
+            ):
+                regressions.append(
+                    f"{name} {metric}: {current[metric]} (基线 {base[metric]}, {ratio:.2f}x)"
+                )
+
+    for name, current in results.get("micro", {}).items():
+        base = baseline.get("micro", {}).get(name)
+        if base:
+            check(f"micro/{name}", current, base, ["p50_ms"])
+
+    load, base_load = results.get("load"), baseline.get("load")
+    if load and base_load:
+        check("load/overall", load["overall"], base_load["overall"], ["throughput"])
+        for label, current in load["endpoints"].items():
+            base = base_load["endpoints"].get(label)
+            # 样本太少的端点p95不稳定，只比较p50
+            if base:
+                metrics = ["p50_ms", "p95_ms"] if current["count"] >= 50 else ["p50_ms"]
+                check(f"load/{label}", current, base, metrics)
+        if load["overall"]["errors"] > base_load["overall"]["errors"]:
+            regressions.append(
+                f"load/overall errors: {load['overall']['errors']} "
+                f"(基线 {base_load['overall']['errors']})"
+            )
+
+    return regressions
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预测服务基准测试与压测")
+    parser.add_argument(
+        "suite", nargs="?", default="all", choices=["all", "micro", "load"]
+    )
+    parser.add_argument(
+        "--only", nargs="+", default=None, help="只运行名称包含这些字符串的微基准"
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=1.0, help="每个微基准的最短运行时间（秒）"
+    )
+    parser.add_argument("--flows", type=int, default=300, help="压测回放的网关操作数")
+    parser.add_argument("--concurrency", type=int, default=8, help="压测并发客户端数")
+    parser.add_argument("--images", type=int, default=16, help="每类种子图像数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="允许的相对退化比例"
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.1,
+        help="耗时指标退化的最小绝对差值（毫秒）",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="以本次结果作为新基线"
+    )
+    parser.add_argument("--output", default=None, help="结果JSON输出路径")
+    parser.add_argument(
+        "--keep-sandbox", action="store_true", help="保留沙箱目录便于排查"
+    )
+    args = parser.parse_args()
+
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+    sandbox = tempfile.mkdtemp(prefix="paddy-bench-")
+    cwd = os.getcwd()
+
+    try:
+        names = prepare_sandbox(sandbox, seed=args.seed, images=args.images)
+        apply_config_overrides()
+
+        results = {"machine": machine_info(), "seed": args.seed}
+        if args.suite in ("all", "micro"):
+            results["micro"] = run_micro(names, only=args.only, min_time=args.min_time)
+        if args.suite in ("all", "load"):
+            results["load"] = run_load(
+                names, flows=args.flows, concurrency=args.concurrency, seed=args.seed
+            )
+    finally:
+        os.chdir(cwd)
+        if args.keep_sandbox:
+            print(f"沙箱目录: {sandbox}", file=sys.stderr)
+        else:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        # 只替换本次运行的部分，单独运行micro/load时保留另一部分的基线
+        baseline.update({k: v for k, v in results.items() if k in ("micro", "load")})
+        baseline["machine"] = results["machine"]
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n")
+        print(f"基线已更新: {baseline_path}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"基线文件不存在，跳过比较: {baseline_path}", file=sys.stderr)
+        return 0
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("cpu_count") != os.cpu_count():
+        print("提示: 基线记录于不同配置的机器，比较结果仅供参考", file=sys.stderr)
+
+    regressions = compare_to_baseline(
+        results, baseline, args.tolerance, args.min_delta_ms
+    )
+    for line in regressions:
+        print(f"退化: {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
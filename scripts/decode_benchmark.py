@@ -0,0 +1,148 @@
+"""
+图像解码基准 - 比较各解码器的解码耗时，以及与完整解码相比的预测一致率
+
+用法:
+    python scripts/decode_benchmark.py --model yolo_grow --images static/image/grow
+    python scripts/decode_benchmark.py --model yolo_disease --decoders opencv pillow_draft
+
+以第一个解码器（默认opencv完整解码）为参照。缩小解码的倍数由模型输入尺寸决定，
+与服务端 YOLOModel 的取值一致。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ultralytics import YOLO  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.models.backends import TASKS, read_model_imgsz  # noqa: E402
+from app.models.quantization import list_images  # noqa: E402
+from app.utils.image_utils import IMAGE_DECODERS, decode_image_bytes  # noqa: E402
+
+DEFAULT_IMAGE_DIRS = {
+    "yolo_grow": "static/image/grow",
+    "yolo_disease": "static/image/disease",
+}
+
+
+def _summarize(result, model_type):
+    if model_type == "grow":
+        return {"top1": int(result.probs.top1), "probs": result.probs.data.tolist()}
+    return {"classes": sorted({int(c) for c in result.boxes.cls.tolist()})}
+
+
+def run_decode_benchmark(model_path, model_type, image_paths, decoders, repeats=5):
+    """
+    Returns:
+        解码器 -> {平均/中位解码耗时、输出尺寸、与参照解码器的一致率}
+    """
+    imgsz = read_model_imgsz(model_path)
+    min_size = max(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz
+    predict_kwargs = {"imgsz": imgsz} if imgsz else {}
+    model = YOLO(model_path, task=TASKS[model_type])
+
+    payloads = []
+    for path in image_paths:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+
+    outputs, report = {}, {}
+    for decoder in decoders:
+        timings, summaries, pixels = [], [], []
+        for data in payloads:
+            runs = []
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                image = decode_image_bytes(data, min_size=min_size, decoder=decoder)
+                runs.append((time.perf_counter() - start) * 1000.0)
+            if image is None:
+                summaries.append(None)
+                continue
+            timings.append(sorted(runs)[len(runs) // 2])
+            pixels.append(image.shape[0] * image.shape[1])
+            result = model(image, save=False, verbose=False, **predict_kwargs)[0]
+            summaries.append(_summarize(result, model_type))
+
+        outputs[decoder] = summaries
+        report[decoder] = {
+            "images": len(timings),
+            "mean_decode_ms": round(sum(timings) / max(1, len(timings)), 3),
+            "total_decode_ms": round(sum(timings), 2),
+            "mean_megapixels": round(sum(pixels) / max(1, len(pixels)) / 1e6, 3),
+        }
+
+    reference = decoders[0]
+    for decoder, summaries in outputs.items():
+        pairs = [
+            (ref, cur)
+            for ref, cur in zip(outputs[reference], summaries)
+            if ref is not None and cur is not None
+        ]
+        if model_type == "grow":
+            agree = sum(ref["top1"] == cur["top1"] for ref, cur in pairs)
+            report[decoder]["max_prob_diff"] = round(
+                max(
+                    [0.0]
+                    + [
+                        abs(a - b)
+                        for ref, cur in pairs
+                        for a, b in zip(ref["probs"], cur["probs"])
+                    ]
+                ),
+                6,
+            )
+        else:
+            agree = sum(ref["classes"] == cur["classes"] for ref, cur in pairs)
+        report[decoder]["reference"] = reference
+        report[decoder]["agreement"] = round(agree / max(1, len(pairs)), 4)
+        report[decoder]["speedup"] = round(
+            report[reference]["total_decode_ms"]
+            / max(report[decoder]["total_decode_ms"], 1e-6),
+            2,
+        )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图像解码耗时与预测一致性对比")
+    parser.add_argument("--model", default="yolo_grow", choices=DEFAULT_IMAGE_DIRS)
+    parser.add_argument("--images", default=None, help="基准图像目录")
+    parser.add_argument(
+        "--decoders",
+        nargs="+",
+        default=["opencv", "opencv_reduced", "pillow_draft"],
+        choices=sorted(IMAGE_DECODERS),
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--min-agreement", type=float, default=1.0, help="低于该一致率时返回非零"
+    )
+    args = parser.parse_args()
+
+    image_dir = args.images or DEFAULT_IMAGE_DIRS[args.model]
+    image_paths = list_images(image_dir)
+    if not image_paths:
+        print(f"基准图像目录为空: {image_dir}")
+        return 1
+
+    report = run_decode_benchmark(
+        Config.MODEL_PATHS[args.model],
+        args.model.split("_", 1)[1],
+        image_paths,
+        args.decoders,
+        repeats=args.repeats,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    failed = [d for d, r in report.items() if r["agreement"] < args.min_agreement]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
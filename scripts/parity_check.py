@@ -0,0 +1,65 @@
+"""
+推理后端一致性检查 - 在基准图像集上比较各后端的输出与延迟
+
+用法:
+    python scripts/parity_check.py --model yolo_grow --images static/image/grow
+    python scripts/parity_check.py --model yolo_disease --backends torch onnx
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config  # noqa: E402
+from app.models.backends import run_parity_check  # noqa: E402
+
+DEFAULT_IMAGE_DIRS = {
+    "yolo_grow": "static/image/grow",
+    "yolo_disease": "static/image/disease",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推理后端一致性与延迟检查")
+    parser.add_argument("--model", default="yolo_grow", choices=DEFAULT_IMAGE_DIRS)
+    parser.add_argument("--images", default=None, help="基准图像目录")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "openvino"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--min-agreement", type=float, default=1.0, help="低于该一致率时返回非零"
+    )
+    args = parser.parse_args()
+
+    image_dir = args.images or DEFAULT_IMAGE_DIRS[args.model]
+    image_paths = sorted(
+        p
+        for ext in Config.ALLOWED_EXTENSIONS
+        for p in glob.glob(os.path.join(image_dir, f"*.{ext}"))
+    )
+    if not image_paths:
+        print(f"基准图像目录为空: {image_dir}")
+        return 1
+
+    report = run_parity_check(
+        Config.MODEL_PATHS[args.model],
+        args.model.split("_", 1)[1],
+        image_paths,
+        backends=args.backends,
+        repeats=args.repeats,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    failed = [
+        b
+        for b, r in report.items()
+        if "error" in r or r.get("agreement", 0) < args.min_agreement
+    ]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
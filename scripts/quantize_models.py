@@ -0,0 +1,75 @@
+"""
+INT8量化工作流 - 用田间图像校准生成INT8模型，并在留出集上对比FP32的精度与延迟
+
+用法:
+    python scripts/quantize_models.py --model yolo_grow \
+        --calib-dir data/calib/grow --eval-dir data/holdout/grow \
+        --report reports/yolo_grow_int8.json
+
+留出集若按类别名分子目录存放（如 holdout/grow/黄熟期/xxx.jpg），报告中会包含准确率；
+否则只报告INT8与FP32的一致率。生成的模型路径与 Config.MODEL_VARIANTS 中
+"<模型名>@int8" 的配置一致，服务端可通过请求参数 modelversion="int8" 使用。
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config  # noqa: E402
+from app.models.backends import read_model_imgsz  # noqa: E402
+from app.models.quantization import (  # noqa: E402
+    compare_models,
+    list_images,
+    quantize_model,
+)
+from app.utils.logging_utils import setup_logging  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成INT8量化模型并评估")
+    parser.add_argument(
+        "--model", default="yolo_grow", choices=["yolo_grow", "yolo_disease"]
+    )
+    parser.add_argument("--calib-dir", required=True, help="校准图像目录")
+    parser.add_argument("--eval-dir", required=True, help="留出评估图像目录")
+    parser.add_argument("--max-calib", type=int, default=200, help="最多校准图像数")
+    parser.add_argument("--output", default=None, help="INT8模型输出路径")
+    parser.add_argument("--report", default=None, help="评估报告JSON输出路径")
+    args = parser.parse_args()
+    setup_logging()  # 量化进度等经结构化日志输出
+
+    model_path = Config.MODEL_PATHS[args.model]
+    model_type = args.model.split("_", 1)[1]
+    variant = Config.MODEL_VARIANTS.get(f"{args.model}@int8", {})
+    output_path = args.output or variant.get("path")
+
+    quantize_model(model_path, model_type, args.calib_dir, output_path, args.max_calib)
+
+    eval_images = list_images(args.eval_dir)
+    if not eval_images:
+        print(f"留出评估目录为空: {args.eval_dir}")
+        return 1
+
+    report = compare_models(
+        model_path,
+        output_path,
+        model_type,
+        eval_images,
+        imgsz=read_model_imgsz(model_path),
+    )
+    report["model"] = args.model
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+
+    if args.report:
+        os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+生产环境入口 - 预fork多进程服务
+主进程加载并预热模型，fork出的工作进程以写时复制方式共享模型内存
+
+用法:
+    python serve.py --workers 4 --port 5050
+    kill -HUP <master_pid>   # 滚动重启工作进程
+    kill -TERM <master_pid>  # 排空进行中请求后停止
+"""
+
+import argparse
+
+from app import create_app
+from app.config import config
+from app.prefork import PreforkServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="paddy预测服务（预fork多进程）")
+    parser.add_argument("--config", default="production", help="配置名称")
+    parser.add_argument("--host", default=None, help="监听地址")
+    parser.add_argument("--port", type=int, default=None, help="监听端口")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数")
+    args = parser.parse_args()
+
+    app_config = config[args.config]
+    app = create_app(args.config)
+
+    server = PreforkServer(
+        app,
+        host=args.host or app_config.HOST,
+        port=args.port or app_config.PORT,
+        workers=args.workers or app_config.WORKERS,
+        graceful_timeout=app_config.GRACEFUL_TIMEOUT,
+    )
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""ASGI适配测试：流式响应、请求体校验"""
+
+import asyncio
+import json
+
+from flask import Flask, Response, request, stream_with_context
+
+from app.asgi import AsgiAdapter
+
+
+def _create_app():
+    app = Flask(__name__)
+
+    @app.route("/stream")
+    def stream():
+        count = int(request.args.get("n", 20))
+
+        def generate():
+            for i in range(count):
+                # 每次迭代都读取请求上下文（与/predict_images相同）
+                yield json.dumps({"i": i, "path": request.path}) + "\n"
+
+        return Response(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return request.get_data()
+
+    @app.route("/broken")
+    def broken():
+        def generate():
+            yield "first\n"
+            raise RuntimeError("boom")
+
+        return Response(generate())
+
+    return app
+
+
+async def _call(adapter, path, method="GET", body=b"", headers=(), query=b""):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": list(headers),
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+        await asyncio.sleep(0)  # 让出事件循环，使其他请求的迭代穿插执行
+
+    await adapter(scope, receive, send)
+    return sent
+
+
+def _body(sent):
+    return b"".join(
+        m.get("body", b"") for m in sent if m["type"] == "http.response.body"
+    )
+
+
+def test_stream_with_context_across_threads():
+    adapter = AsgiAdapter(_create_app(), max_workers=8)
+
+    async def run():
+        return await asyncio.gather(
+            *(_call(adapter, "/stream", query=b"n=30") for _ in range(8))
+        )
+
+    for sent in asyncio.run(run()):
+        assert sent[0]["status"] == 200
+        assert sent[-1] == {
+            "type": "http.response.body",
+            "body": b"",
+            "more_body": False,
+        }
+        lines = _body(sent).decode().splitlines()
+        assert [json.loads(line)["i"] for line in lines] == list(range(30))
+
+
+def test_stream_error_after_start_ends_response():
+    adapter = AsgiAdapter(_create_app(), max_workers=2)
+    sent = asyncio.run(_call(adapter, "/broken"))
+    assert sent[0]["status"] == 200
+    assert _body(sent) == b"first\n"
+    assert sent[-1]["more_body"] is False
+
+
+def test_request_body():
+    adapter = AsgiAdapter(_create_app(), max_workers=2, max_body=16)
+    sent = asyncio.run(_call(adapter, "/echo", "POST", b"hello"))
+    assert sent[0]["status"] == 200
+    assert _body(sent) == b"hello"
+
+    sent = asyncio.run(
+        _call(adapter, "/echo", "POST", b"x" * 32, [(b"content-length", b"32")])
+    )
+    assert sent[0]["status"] == 413
+
+
+def test_malformed_content_length():
+    adapter = AsgiAdapter(_create_app(), max_workers=2, max_body=16)
+    for value in (b"abc", b"-1"):
+        sent = asyncio.run(
+            _call(adapter, "/echo", "POST", b"hi", [(b"content-length", value)])
+        )
+        assert sent[0]["status"] == 400
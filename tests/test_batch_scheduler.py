@@ -0,0 +1,101 @@
+"""批处理调度器测试"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.batch_scheduler import BatchScheduler
+
+
+class RecordingBatch:
+    """记录每批输入的批量推理函数"""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, items):
+        with self._lock:
+            self.batches.append(list(items))
+        time.sleep(self.delay)
+        return [{"item": item} for item in items]
+
+
+def test_concurrent_requests_share_a_batch():
+    batch_fn = RecordingBatch()
+    scheduler = BatchScheduler("test", batch_fn, max_batch_size=8, max_wait_ms=200)
+
+    futures = [scheduler.submit(i) for i in range(8)]
+    results = [future.result(timeout=5) for future in futures]
+
+    # 结果按请求分发回各自的Future
+    assert results == [{"item": i} for i in range(8)]
+    assert batch_fn.batches == [list(range(8))]
+    assert scheduler.get_stats()["max_batch_seen"] == 8
+
+
+def test_batch_size_limit():
+    batch_fn = RecordingBatch()
+    scheduler = BatchScheduler("test", batch_fn, max_batch_size=3, max_wait_ms=200)
+
+    futures = [scheduler.submit(i) for i in range(7)]
+    assert [future.result(timeout=5)["item"] for future in futures] == list(range(7))
+    assert all(len(batch) <= 3 for batch in batch_fn.batches)
+    assert sum(batch_fn.batches, []) == list(range(7))
+
+
+def test_single_request_flushes_after_max_wait():
+    batch_fn = RecordingBatch()
+    scheduler = BatchScheduler("test", batch_fn, max_batch_size=8, max_wait_ms=20)
+
+    start = time.monotonic()
+    assert scheduler.predict("only", timeout=5) == {"item": "only"}
+    assert time.monotonic() - start < 2
+    assert batch_fn.batches == [["only"]]
+
+
+def test_requests_from_threads_are_coalesced():
+    batch_fn = RecordingBatch(delay=0.05)
+    scheduler = BatchScheduler("test", batch_fn, max_batch_size=4, max_wait_ms=50)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(lambda i: scheduler.predict(i, timeout=5), range(12)))
+
+    assert [r["item"] for r in results] == list(range(12))
+    assert len(batch_fn.batches) < 12
+
+
+def test_batch_errors_are_returned_per_request():
+    def failing(items):
+        raise RuntimeError("boom")
+
+    scheduler = BatchScheduler("test", failing, max_batch_size=4, max_wait_ms=20)
+    futures = [scheduler.submit(i) for i in range(2)]
+    for future in futures:
+        assert "boom" in future.result(timeout=5)["error"]
+
+    # 出错后调度器继续工作
+    scheduler.batch_fn = RecordingBatch()
+    assert scheduler.predict("next", timeout=5) == {"item": "next"}
+
+
+def test_result_count_mismatch():
+    scheduler = BatchScheduler(
+        "test", lambda items: [{}], max_batch_size=4, max_wait_ms=50
+    )
+    futures = [scheduler.submit(i) for i in range(2)]
+    for future in futures:
+        assert future.result(timeout=5) == {"error": "批量推理结果数量不匹配"}
+
+
+def test_cancelled_requests_are_skipped():
+    batch_fn = RecordingBatch()
+    scheduler = BatchScheduler("test", batch_fn, max_batch_size=8, max_wait_ms=100)
+
+    kept = scheduler.submit("kept")
+    cancelled = scheduler.submit("cancelled")
+    assert cancelled.cancel()
+
+    assert kept.result(timeout=5) == {"item": "kept"}
+    assert batch_fn.batches == [["kept"]]
@@ -0,0 +1,237 @@
+"""地块历史存储测试：以完整窗口的LSTM前向为参照"""
+
+import numpy as np
+import pytest
+import torch
+
+from app.models.lstm_history import PlotHistoryStore
+from app.models.lstm_model import LSTMForecaster
+
+CAPACITY = 6
+FEATURES = 3
+
+
+@pytest.fixture(scope="module")
+def network():
+    torch.manual_seed(0)
+    return LSTMForecaster(FEATURES, hidden_size=8, num_layers=2, output_size=2).eval()
+
+
+def make_advance(network, calls=None):
+    """PlotHistoryStore使用的预测函数：从(h, c)继续处理x"""
+
+    def advance(x, h, c):
+        if calls is not None:
+            calls.append((x.shape[0], x.shape[1], h is not None))
+        if h is None:
+            h = np.zeros((2, len(x), 8), np.float32)
+            c = np.zeros_like(h)
+        with torch.no_grad():
+            output, h, c = network.forward_with_state(
+                torch.from_numpy(np.ascontiguousarray(x)),
+                torch.from_numpy(np.ascontiguousarray(h)),
+                torch.from_numpy(np.ascontiguousarray(c)),
+            )
+        return output.numpy(), h.numpy(), c.numpy()
+
+    return advance
+
+
+def full_forward(network, steps):
+    with torch.no_grad():
+        return network(torch.from_numpy(np.asarray(steps, np.float32)[None])).numpy()[0]
+
+
+def random_steps(rng, n):
+    return rng.normal(size=(n, FEATURES)).astype(np.float32)
+
+
+def test_ring_wrap_keeps_last_capacity_steps():
+    rng = np.random.default_rng(0)
+    store = PlotHistoryStore(CAPACITY, FEATURES)
+    history = random_steps(rng, 2)
+    store.update({"a": history})
+
+    # 单次追加超过容量，且写入位置已不在0
+    more = random_steps(rng, CAPACITY + 3)
+    store.update({"a": more})
+    history = np.concatenate([history, more])
+
+    [(indices, window)] = store.windows(["a"])
+    assert indices.tolist() == [0]
+    np.testing.assert_array_equal(window[0], history[-CAPACITY:])
+    assert store.history_steps(["a"]) == [CAPACITY]
+
+    # 再追加几步（回绕）
+    tail = random_steps(rng, 4)
+    store.update({"a": tail})
+    history = np.concatenate([history, tail])
+    [(_, window)] = store.windows(["a"])
+    np.testing.assert_array_equal(window[0], history[-CAPACITY:])
+
+
+def test_windows_group_by_length():
+    rng = np.random.default_rng(1)
+    store = PlotHistoryStore(CAPACITY, FEATURES)
+    store.update({"a": random_steps(rng, 2), "b": random_steps(rng, 5)})
+    store.update({"c": random_steps(rng, 2)})
+
+    groups = {
+        window.shape[1]: indices.tolist()
+        for indices, window in store.windows(["a", "b", "c"])
+    }
+    assert groups == {2: [0, 2], 5: [1]}
+
+
+def test_forecast_advances_from_cached_state(network):
+    rng = np.random.default_rng(2)
+    calls = []
+    store = PlotHistoryStore(CAPACITY, FEATURES, refresh_steps=0)
+    advance = make_advance(network, calls)
+    history = {"a": random_steps(rng, CAPACITY), "b": random_steps(rng, 3)}
+    store.update(history)
+
+    outputs = store.forecast(["a", "b"], advance)
+    for i, plot_id in enumerate(["a", "b"]):
+        np.testing.assert_allclose(
+            outputs[i], full_forward(network, history[plot_id]), atol=1e-5
+        )
+    assert all(not from_state for _, _, from_state in calls)
+
+    # 只处理新追加的步：结果等于对完整历史（从头开始）的前向
+    calls.clear()
+    new = random_steps(rng, 2)
+    store.update({"a": new, "b": np.empty((0, FEATURES), np.float32)})
+    history["a"] = np.concatenate([history["a"], new])
+    outputs = store.forecast(["a", "b"], advance)
+    np.testing.assert_allclose(
+        outputs[0], full_forward(network, history["a"]), atol=1e-5
+    )
+    np.testing.assert_allclose(
+        outputs[1], full_forward(network, history["b"]), atol=1e-5
+    )
+    assert calls == [(1, 2, True)]  # 没有新观测的地块直接返回缓存输出
+    assert store.steps_advanced == 2
+
+
+def test_refresh_steps_rebuilds_from_window(network):
+    rng = np.random.default_rng(3)
+    store = PlotHistoryStore(CAPACITY, FEATURES, refresh_steps=4)
+    advance = make_advance(network)
+    history = random_steps(rng, CAPACITY)
+    store.update({"a": history})
+    store.forecast(["a"], advance)
+    replayed = store.steps_replayed
+
+    # 累计4步以内从缓存状态继续
+    for _ in range(2):
+        step = random_steps(rng, 2)
+        history = np.concatenate([history, step])
+        store.update({"a": step})
+        output = store.forecast(["a"], advance)[0]
+        np.testing.assert_allclose(output, full_forward(network, history), atol=1e-5)
+    assert store.steps_replayed == replayed
+
+    # 超过refresh_steps：从缓冲区中的窗口重建，结果等于对最近窗口的前向
+    step = random_steps(rng, 1)
+    history = np.concatenate([history, step])
+    store.update({"a": step})
+    output = store.forecast(["a"], advance)[0]
+    np.testing.assert_allclose(
+        output, full_forward(network, history[-CAPACITY:]), atol=1e-5
+    )
+    assert store.steps_replayed == replayed + CAPACITY
+
+
+def test_pending_beyond_capacity_replays_window(network):
+    rng = np.random.default_rng(4)
+    store = PlotHistoryStore(CAPACITY, FEATURES, refresh_steps=0)
+    advance = make_advance(network)
+    store.update({"a": random_steps(rng, 3)})
+    store.forecast(["a"], advance)
+
+    steps = random_steps(rng, CAPACITY + 2)
+    store.update({"a": steps})
+    output = store.forecast(["a"], advance)[0]
+    np.testing.assert_allclose(
+        output, full_forward(network, steps[-CAPACITY:]), atol=1e-5
+    )
+
+
+def test_grow_keeps_cached_states(network):
+    rng = np.random.default_rng(5)
+    store = PlotHistoryStore(CAPACITY, FEATURES, refresh_steps=0, initial_slots=2)
+    advance = make_advance(network)
+    history = {plot_id: random_steps(rng, 4) for plot_id in ("a", "b")}
+    store.update(history)
+    store.forecast(["a", "b"], advance)
+    assert store.get_stats()["slots_allocated"] == 2
+
+    # 隐状态已分配后扩容
+    for plot_id in ("c", "d", "e"):
+        history[plot_id] = random_steps(rng, 2)
+        store.update({plot_id: history[plot_id]})
+    assert store.get_stats()["slots_allocated"] == 8
+
+    for plot_id in ("a", "b"):
+        step = random_steps(rng, 1)
+        history[plot_id] = np.concatenate([history[plot_id], step])
+        store.update({plot_id: step})
+    ids = list(history)
+    outputs = store.forecast(ids, advance)
+    for i, plot_id in enumerate(ids):
+        np.testing.assert_allclose(
+            outputs[i], full_forward(network, history[plot_id]), atol=1e-5
+        )
+    assert store.steps_advanced == 2  # a、b从扩容前缓存的状态继续
+
+
+def test_lru_eviction_and_slot_reuse(network):
+    rng = np.random.default_rng(6)
+    store = PlotHistoryStore(CAPACITY, FEATURES, max_plots=2, refresh_steps=0)
+    advance = make_advance(network)
+    store.update({"a": random_steps(rng, 3), "b": random_steps(rng, 3)})
+    store.forecast(["a", "b"], advance)
+    store.history_steps(["a"])  # a最近使用过
+
+    new = random_steps(rng, 2)
+    store.update({"c": new})
+    assert store.evictions == 1
+    with pytest.raises(KeyError):
+        store.history_steps(["b"])
+
+    # c复用了b的槽位：只有自己的观测，且不会沿用b的隐状态
+    assert store.history_steps(["a", "c"]) == [3, 2]
+    [(_, window)] = store.windows(["c"])
+    np.testing.assert_array_equal(window[0], new)
+    output = store.forecast(["c"], advance)[0]
+    np.testing.assert_allclose(output, full_forward(network, new), atol=1e-5)
+
+
+def test_reset_and_invalidate(network):
+    rng = np.random.default_rng(7)
+    store = PlotHistoryStore(CAPACITY, FEATURES, refresh_steps=0)
+    advance = make_advance(network)
+    store.update({"a": random_steps(rng, 4)})
+    store.forecast(["a"], advance)
+
+    fresh = random_steps(rng, 2)
+    store.update({"a": fresh}, resets=["a"])
+    assert store.history_steps(["a"]) == [2]
+    np.testing.assert_allclose(
+        store.forecast(["a"], advance)[0], full_forward(network, fresh), atol=1e-5
+    )
+
+    replayed = store.steps_replayed
+    store.invalidate_states("v2")
+    assert store.state_version == "v2"
+    store.forecast(["a"], advance)
+    assert store.steps_replayed == replayed + 2
+
+
+def test_unknown_plot_is_not_allocated():
+    store = PlotHistoryStore(CAPACITY, FEATURES)
+    store.update({"x": np.empty((0, FEATURES), np.float32)})
+    assert store.get_stats()["plots"] == 0
+    with pytest.raises(KeyError):
+        store.windows(["x"])
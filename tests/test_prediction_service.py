@@ -0,0 +1,102 @@
+"""预测服务测试：上传预测接口（INFO级别日志）、预测读取工作副本"""
+
+import io
+import json
+import logging
+
+import cv2
+import numpy as np
+import pytest
+from flask import Flask
+
+from app.api.routes import create_api_routes
+from app.models.model_manager import model_manager
+from app.utils.image_ingest import working_copy_path
+from app.utils.logging_utils import LOGGER_PREFIX
+
+
+class RecordingPredict:
+    """记录调用参数的预测函数"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return {"result": "分蘖期"}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # 上传目录等都是相对路径，在临时目录中运行
+    monkeypatch.chdir(tmp_path)
+    logger = logging.getLogger(LOGGER_PREFIX)
+    level = logger.level
+    logger.setLevel(logging.INFO)  # 与默认LOG_LEVEL相同
+
+    app = Flask(__name__)
+    app.register_blueprint(create_api_routes())
+    yield app.test_client()
+    logger.setLevel(level)
+
+
+def jpeg_bytes(width=320, height=240):
+    image = np.random.default_rng(0).integers(0, 255, (height, width, 3), np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_upload_and_predict_logs_at_info(client, monkeypatch):
+    predict = RecordingPredict()
+    monkeypatch.setattr(model_manager, "predict_array", predict)
+
+    response = client.post(
+        "/upload_and_predict",
+        data={"file": (io.BytesIO(jpeg_bytes()), "a.jpg"), "modelid": "1"},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    body = json.loads(response.get_data(as_text=True))
+    assert body["code"] == "200"
+    assert body["data"] == {"filename": "a.jpg", "prediction": {"result": "分蘖期"}}
+    [(args, kwargs)] = predict.calls
+    assert args[0] == "grow" and args[2] == "a.jpg"
+    assert kwargs["save_result"] is True
+
+
+def test_predict_reads_upload_working_copy(client, monkeypatch):
+    paths = []
+
+    def predict_image(model_type, pic_path, **kwargs):
+        paths.append(pic_path)
+        return {"result": "分蘖期"}
+
+    def predict_images(model_type, pic_paths, **kwargs):
+        paths.extend(pic_paths)
+        return [(i, {"result": "分蘖期"}) for i in range(len(pic_paths))]
+
+    monkeypatch.setattr(model_manager, "predict_image", predict_image)
+    monkeypatch.setattr(model_manager, "predict_images", predict_images)
+
+    response = client.post(
+        "/upload_grow_image",
+        data={"file": (io.BytesIO(jpeg_bytes(1600, 1200)), "a.jpg")},
+        content_type="multipart/form-data",
+    )
+    assert json.loads(response.get_data(as_text=True))["data"] == "a.jpg"
+    working_path = working_copy_path("grow", "a.jpg")
+    assert max(cv2.imread(working_path).shape[:2]) < 1600
+
+    # 预测接口从 static/image/<类型>/ 读取原图，与上传目录不同
+    response = client.post("/predict_image", json={"imageid": "a.jpg", "modelid": "1"})
+    assert json.loads(response.get_data(as_text=True))["code"] == "200"
+    response = client.post(
+        "/predict_images", json={"imageids": ["a.jpg"], "modelid": "1"}
+    )
+    assert json.loads(response.get_data(as_text=True))["code"] == "200"
+    assert paths == [working_path, working_path]
+
+    # 带目录部分的imageid不使用工作副本
+    paths.clear()
+    client.post("/predict_image", json={"imageid": "x/../a.jpg", "modelid": "1"})
+    assert paths == []
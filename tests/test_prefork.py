@@ -0,0 +1,89 @@
+"""预fork服务测试：SIGTERM后空闲工作进程及时排空退出"""
+
+import http.client
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import prefork
+from app.prefork import PreforkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="需要os.fork")
+
+
+def hello_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_serving(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            return connection.getresponse().read()
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError("服务未启动")
+
+
+def wait_for_exit(pid, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return status
+        time.sleep(0.05)
+    # 连同工作进程一起结束
+    os.killpg(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+    return None
+
+
+def test_sigterm_drains_idle_workers(monkeypatch):
+    monkeypatch.setattr(prefork, "prepare_master", lambda: None)
+    port = free_port()
+    server = PreforkServer(hello_app, "127.0.0.1", port, workers=2, graceful_timeout=30)
+
+    pid = os.fork()
+    if pid == 0:
+        os.setpgid(0, 0)
+        code = 1
+        try:
+            server.run()
+            code = 0
+        finally:
+            os._exit(code)
+
+    # 并发请求使多个工作进程同时被唤醒、争抢同一连接
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: wait_until_serving(port), range(40)))
+    assert results == [b"ok"] * 40
+    time.sleep(0.5)  # 两个工作进程都在等待新连接
+    os.kill(pid, signal.SIGTERM)
+
+    # 不应等到graceful_timeout后被强制结束
+    status = wait_for_exit(pid, timeout=10)
+    assert status is not None and os.waitstatus_to_exitcode(status) == 0
+
+
+def test_listening_socket_is_nonblocking():
+    # 被唤醒但没抢到连接的工作进程的accept不能阻塞，否则收不到停止信号
+    server = PreforkServer(hello_app, "127.0.0.1", 0)
+    sock = server._bind()
+    try:
+        assert not sock.getblocking()
+        assert sock.get_inheritable()
+    finally:
+        sock.close()
@@ -0,0 +1,141 @@
+"""预测结果缓存测试"""
+
+import os
+
+from app.models import result_cache
+from app.models.result_cache import PredictionCache, hash_bytes, hash_file
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_key(cache, image=b"image", identity="yolo_grow:abc"):
+    return cache.make_key(hash_bytes(image), identity)
+
+
+def test_hit_miss_and_copy_isolation():
+    cache = PredictionCache(max_entries=4)
+    key = make_key(cache)
+    assert cache.get("yolo_grow", key) is None
+
+    value = {"result": "分蘖期", "confidence": [0.9]}
+    cache.put("yolo_grow", key, value)
+    value["confidence"].append(0.1)  # 写入后修改原对象不影响缓存
+
+    cached = cache.get("yolo_grow", key)
+    assert cached == {"result": "分蘖期", "confidence": [0.9]}
+    cached["result"] = "changed"  # 修改读取结果不影响缓存
+    assert cache.get("yolo_grow", key)["result"] == "分蘖期"
+
+    stats = cache.get_stats("yolo_grow")
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+
+
+def test_errors_are_not_cached():
+    cache = PredictionCache()
+    key = make_key(cache)
+    cache.put("yolo_grow", key, {"error": "预测失败"})
+    cache.put("yolo_grow", key, {})
+    assert cache.get("yolo_grow", key) is None
+
+
+def test_key_depends_on_image_and_model():
+    cache = PredictionCache()
+    keys = {
+        make_key(cache, b"a", "yolo_grow:1"),
+        make_key(cache, b"b", "yolo_grow:1"),
+        make_key(cache, b"a", "yolo_grow:2"),
+        make_key(cache, b"a", "yolo_disease:1"),
+    }
+    assert len(keys) == 4
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    keys = [make_key(cache, bytes([i])) for i in range(3)]
+    cache.put("yolo_grow", keys[0], {"v": 0})
+    cache.put("yolo_grow", keys[1], {"v": 1})
+    cache.get("yolo_grow", keys[0])  # keys[0]最近使用
+    cache.put("yolo_grow", keys[2], {"v": 2})
+
+    assert cache.get("yolo_grow", keys[1]) is None
+    assert cache.get("yolo_grow", keys[0]) == {"v": 0}
+    assert cache.get_stats("yolo_grow")["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    cache = PredictionCache(ttl_seconds=60)
+    key = make_key(cache)
+    cache.put("yolo_grow", key, {"v": 1})
+
+    clock.now += 59
+    assert cache.get("yolo_grow", key) == {"v": 1}
+    clock.now += 2
+    assert cache.get("yolo_grow", key) is None
+    assert cache.get_stats("yolo_grow")["expired"] == 1
+
+
+def test_disk_layer(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    disk_dir = str(tmp_path / "cache")
+    key = make_key(PredictionCache())
+
+    PredictionCache(disk_dir=disk_dir, ttl_seconds=60).put("yolo_grow", key, {"v": 1})
+
+    # 新实例（如重启后）从磁盘层命中，并回填内存层
+    cache = PredictionCache(disk_dir=disk_dir, ttl_seconds=60)
+    assert cache.get("yolo_grow", key) == {"v": 1}
+    assert cache.get_stats("yolo_grow")["disk_hits"] == 1
+    assert cache.get_stats("yolo_grow")["entries"] == 1
+
+    # 磁盘条目过期后删除
+    clock.now += 61
+    cache = PredictionCache(disk_dir=disk_dir, ttl_seconds=60)
+    assert cache.get("yolo_grow", key) is None
+    assert not os.path.exists(cache._disk_path(key))
+
+
+def test_model_identity_follows_weights(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"v1")
+    cache = PredictionCache()
+
+    identity = cache.get_model_identity("yolo_grow", str(weights))
+    assert identity == f"yolo_grow:{hash_file(str(weights))[:16]}"
+    key = cache.make_key("img", identity)
+    cache.put("yolo_grow", key, {"v": 1})
+    cache.put("yolo_disease", cache.make_key("img", "yolo_disease:x"), {"v": 2})
+
+    # 权重文件变化：标识变化，并清除该模型在内存层中的旧条目
+    weights.write_bytes(b"version 2")
+    new_identity = cache.get_model_identity("yolo_grow", str(weights))
+    assert new_identity != identity
+    assert cache.get("yolo_grow", key) is None
+    assert cache.get("yolo_disease", cache.make_key("img", "yolo_disease:x")) == {
+        "v": 2
+    }
+    assert cache.get_stats("yolo_grow")["invalidations"] == 1
+
+    assert cache.get_model_identity("yolo_grow", str(tmp_path / "missing.pt")) == (
+        "yolo_grow:missing"
+    )
+
+
+def test_invalidate_model():
+    cache = PredictionCache()
+    grow, disease = make_key(cache, b"a"), make_key(cache, b"b")
+    cache.put("yolo_grow", grow, {"v": 1})
+    cache.put("yolo_disease", disease, {"v": 2})
+
+    cache.invalidate_model("yolo_grow")
+    assert cache.get("yolo_grow", grow) is None
+    assert cache.get("yolo_disease", disease) == {"v": 2}
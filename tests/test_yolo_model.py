@@ -0,0 +1,46 @@
+"""YOLO模型测试：按路径批量预测时单张图像出错不影响同批其他图像"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.config import Config
+from app.models.yolo_model import YOLOModel
+from scripts.benchmark import build_tiny_model
+
+
+@pytest.fixture(scope="module")
+def grow_model(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("models") / "grow.pt")
+    build_tiny_model("grow", path, seed=0)
+    model = YOLOModel(path, "grow")
+    assert model.load_model()
+    return model
+
+
+def write_image(path, seed):
+    image = np.random.default_rng(seed).integers(0, 255, (96, 128, 3), np.uint8)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_corrupt_image_fails_alone(grow_model, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "INMEMORY_INFERENCE", False)
+    corrupt = tmp_path / "corrupt.jpg"
+    corrupt.write_bytes(b"\xff\xd8\xff\xe0 not really a jpeg")
+    paths = [
+        write_image(tmp_path / "a.jpg", 0),
+        str(corrupt),
+        write_image(tmp_path / "b.jpg", 1),
+    ]
+
+    outputs = grow_model.predict_images(paths, save_result=False)
+
+    assert "error" in outputs[1]
+    for i in (0, 2):
+        # 与单独预测该图像的结果相同（各阶段耗时除外）
+        expected = grow_model.predict_image(paths[i], save_result=False)
+        assert "error" not in expected
+        outputs[i].pop("speed", None)
+        expected.pop("speed", None)
+        assert outputs[i] == expected